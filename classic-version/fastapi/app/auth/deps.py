@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Annotated, cast
+from typing import Annotated, Optional, cast
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
 from sqlmodel import select
@@ -9,9 +9,11 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.exceptions import InvalidTokenException
 from app.auth.models import AdminToken
-from app.auth.utils.auth import get_token_content
+from app.auth.utils.auth import get_token_content, is_well_formed_jwt
 from app.common.deps.db import SessionDep
 from app.common.exceptions import NotFoundException
+from app.core.config import settings
+from app.user.cache import user_identity_cache
 from app.user.models import User
 from app.user.repository import UserRepo
 
@@ -35,25 +37,60 @@ async def get_user_from_admin_token(
     return user
 
 
-async def get_current_user(*, token: AnnotatedTokenDep, session: SessionDep) -> User:
-    try:
-        admin_user_overrides = await get_user_from_admin_token(session, token)
-        if admin_user_overrides is not None:
-            return admin_user_overrides
+async def get_user_from_token(session: AsyncSession, token: str) -> User:
+    """
+    Admin tokens are arbitrary strings set through the admin, they are looked up
+    first. Other tokens must then be shaped like a JWT before being decoded.
+    """
+    admin_user_overrides = await get_user_from_admin_token(session, token)
+    if admin_user_overrides is not None:
+        return admin_user_overrides
+    if not is_well_formed_jwt(token):
+        raise InvalidTokenException()
 
+    try:
         payload = get_token_content(token)
-        email = payload.get("email", None)
-        if email is None:
-            raise InvalidTokenException()
     except JWTError as exc:
         raise InvalidTokenException() from exc
+    email = payload.get("email", None)
+    if email is None:
+        raise InvalidTokenException()
+
+    if settings.USER_CACHE_ENABLED:
+        cached_user = user_identity_cache.get(cast(str, email))
+        if cached_user is not None:
+            return cached_user
 
     try:
         db_user = await UserRepo.get_by_email(session, email=cast(str, email))
     except NotFoundException as exc:
         raise InvalidTokenException() from exc
+    if settings.USER_CACHE_ENABLED:
+        user_identity_cache.set(db_user)
     return db_user
 
 
+async def get_current_user(
+    *, request: Request, token: AnnotatedTokenDep, session: SessionDep
+) -> User:
+    """
+    The user is resolved once per request and stored on its state, every
+    dependency asking for it afterwards reuses the result, or the failure
+    """
+    resolved: Optional[tuple[str, Optional[User]]] = getattr(
+        request.state, "current_user", None
+    )
+    if resolved is None or resolved[0] != token:
+        try:
+            user: Optional[User] = await get_user_from_token(session, token)
+        except InvalidTokenException:
+            user = None
+        resolved = (token, user)
+        request.state.current_user = resolved
+    if resolved[1] is None:
+        raise InvalidTokenException()
+    return resolved[1]
+
+
 CurrentUserDep = Depends(get_current_user)
 AnnotatedCurrentUserDep = Annotated[User, CurrentUserDep]
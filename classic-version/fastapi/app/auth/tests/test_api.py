@@ -1,7 +1,11 @@
+import bcrypt
 from fastapi import status
+from sqlmodel import select, update
+
 from app.auth.api import api_login
 from app.auth.models import AdminToken
-from app.auth.utils.auth import get_token_content
+from app.auth.utils.auth import create_access_token, get_token_content
+from app.auth.utils.password_policy import password_policy
 from app.common.test_utils.utils import authenticate_client, get_route
 from app.user.api_v1 import get_user_by_id
 from app.user.models import User
@@ -27,6 +31,32 @@ class TestLoginRoute:
         user_out = content["user"]
         assert user_out.get("email") == user.email
 
+    async def test_login_upgrades_password_hash_below_current_cost(
+        self, client, factory, session
+    ):
+        password = "Test123@"
+        user = await factory(User, password=password)
+        user_id, email = user.id, user.email
+        rounds = password_policy.bcrypt_rounds - 1
+        old_hash = bcrypt.hashpw(
+            password.encode(), bcrypt.gensalt(rounds=rounds)
+        ).decode()
+        await session.exec(
+            update(User).where(User.id == user_id).values(hashed_password=old_hash)
+        )
+        await session.commit()
+
+        payload = {"username": email, "password": password}
+        response = await client.post(get_route(api_login), data=payload)
+
+        assert response.status_code == status.HTTP_200_OK
+        new_hash = await session.scalar(
+            select(User.hashed_password).where(User.id == user_id)
+        )
+        assert new_hash.startswith(f"$2b${password_policy.bcrypt_rounds:02d}$")
+        assert not password_policy.needs_rehash(new_hash)
+        assert bcrypt.checkpw(password.encode(), new_hash.encode())
+
 
 class TestAuthDependency:
     async def test_get_with_expired_token_returns_401(self, client, factory):
@@ -57,3 +87,14 @@ class TestAuthDependency:
         client.headers.update({"Authorization": f"Bearer {token.token}"})
         response = await client.get(get_route(get_user_by_id, user_id=user_id))
         assert response.status_code == status.HTTP_200_OK
+
+    async def test_get_with_admin_token_shaped_like_a_jwt_returns_200(
+        self, client, factory
+    ):
+        user_ = await factory(User, is_superuser=True)
+        user_id = user_.id
+        jwt_token = create_access_token({"email": "not-a-user@example.com"})
+        token = await factory(AdminToken, user=user_, token=jwt_token)
+        client.headers.update({"Authorization": f"Bearer {token.token}"})
+        response = await client.get(get_route(get_user_by_id, user_id=user_id))
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,88 @@
+import base64
+import json
+import time
+
+import pytest
+from jose import jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.auth.utils.tokens import JWTVerifier
+
+SECRET_KEY = "test_secret_key"
+
+
+def b64encode(value: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+def encode(claims: dict, algorithm: str = "HS256", key: str = SECRET_KEY) -> str:
+    return jwt.encode(claims, key, algorithm=algorithm)
+
+
+@pytest.fixture
+def verifier():
+    return JWTVerifier(secret_key=SECRET_KEY, algorithm="HS256")
+
+
+class TestJWTVerifier:
+    def test_verifies_like_jose(self, verifier):
+        token = encode({"email": "user@test.com", "exp": time.time() + 60})
+
+        assert verifier.verify(token) == jwt.decode(
+            token, SECRET_KEY, algorithms=["HS256"]
+        )
+
+    def test_rejects_bad_signature(self, verifier):
+        token = encode({"email": "user@test.com"}, key="another_secret_key")
+
+        with pytest.raises(JWTError, match="Signature verification failed"):
+            verifier.verify(token)
+
+    def test_rejects_tampered_payload(self, verifier):
+        header, _, signature = encode({"email": "user@test.com"}).split(".")
+        payload = b64encode({"email": "admin@test.com"})
+
+        with pytest.raises(JWTError, match="Signature verification failed"):
+            verifier.verify(f"{header}.{payload}.{signature}")
+
+    def test_rejects_alg_none(self, verifier):
+        header = b64encode({"alg": "none", "typ": "JWT"})
+        payload = b64encode({"email": "user@test.com"})
+
+        with pytest.raises(JWTError, match="alg"):
+            verifier.verify(f"{header}.{payload}.")
+
+    def test_rejects_mismatched_alg(self, verifier):
+        token = encode({"email": "user@test.com"}, algorithm="HS512")
+
+        with pytest.raises(JWTError, match="alg"):
+            verifier.verify(token)
+
+    def test_rejects_expired_token(self, verifier):
+        token = encode({"email": "user@test.com", "exp": time.time() - 1})
+
+        with pytest.raises(ExpiredSignatureError):
+            verifier.verify(token)
+
+    def test_rejects_token_not_yet_valid(self, verifier):
+        token = encode({"email": "user@test.com", "nbf": time.time() + 60})
+
+        with pytest.raises(JWTClaimsError):
+            verifier.verify(token)
+
+    def test_rejects_malformed_token(self, verifier):
+        with pytest.raises(JWTError):
+            verifier.verify("not.a.token")
+        assert not verifier.is_well_formed("not_a_token")
+
+    def test_cached_token_is_rejected_after_exp(self, verifier):
+        token = encode({"email": "user@test.com", "exp": time.time() + 0.05})
+        verifier.verify(token)
+        verifier.verify(token)
+        assert verifier.get_stats() == {"size": 1, "hits": 1, "misses": 1}
+
+        time.sleep(0.1)
+
+        with pytest.raises(ExpiredSignatureError):
+            verifier.verify(token)
+        assert verifier.get_stats()["size"] == 0
@@ -1,20 +1,63 @@
-from dataclasses import dataclass
-from typing import Annotated
+import asyncio
+import logging
+from dataclasses import dataclass, fields
+from typing import Annotated, Any, Tuple
 
 from fastapi import Depends
 
+from app.common.search import MeiliSearchBaseClass
 from app.user.search import UserSearch
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class StructuredSearchClient:
     user: UserSearch
 
+    def all(self) -> Tuple[MeiliSearchBaseClass[Any], ...]:
+        return tuple(getattr(self, field.name) for field in fields(self))
+
+
+search_clients = StructuredSearchClient(
+    user=UserSearch(),
+)
+
+
+def setup_search_indexes(clients: StructuredSearchClient = search_clients) -> None:
+    """
+    Provisions every index and its settings. Blocking, run it once at startup.
+    """
+    for client in clients.all():
+        client.setup_index()
+
+
+async def setup_search_indexes_on_startup() -> None:
+    try:
+        await asyncio.to_thread(setup_search_indexes)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Could not set up the search indexes")
+
+
+def start_search_write_buffers(
+    clients: StructuredSearchClient = search_clients,
+) -> None:
+    for client in clients.all():
+        client.write_buffer.start()
+
+
+async def stop_search_write_buffers(
+    clients: StructuredSearchClient = search_clients,
+) -> None:
+    """
+    Flushes what is still pending
+    """
+    for client in clients.all():
+        await client.write_buffer.stop()
+
 
 def get_search_clients() -> StructuredSearchClient:
-    return StructuredSearchClient(
-        user=UserSearch(),
-    )
+    return search_clients
 
 
 SearchClientsDep = Depends(get_search_clients)
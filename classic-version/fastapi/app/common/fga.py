@@ -1,14 +1,36 @@
-from typing import List, Literal, LiteralString, cast
+import asyncio
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    LiteralString,
+    Optional,
+    Set,
+    Tuple,
+    cast,
+)
 
 from openfga_sdk import OpenFgaClient
 from openfga_sdk.client.models.check_request import ClientCheckRequest
+from openfga_sdk.client.models.list_objects_request import ClientListObjectsRequest
 from openfga_sdk.client.models.tuple import ClientTuple
-from openfga_sdk.client.models.write_request import ClientWriteRequest
+
+from app.common.fga_batcher import write_tuples
+from app.common.fga_cache import fga_decision_cache
+from app.common.fga_local import (
+    get_synced_local_evaluator,
+    mirror_tuples,
+    unsync_local_fga_evaluator,
+)
+from app.core.config import settings
 
 AllowedUserRelations = Literal["can_read", "can_update", "can_delete"]
 
 UserRole = Literal["superuser", "user"]
 
+Consistency = Literal["minimize_latency", "higher_consistency"]
+
 
 class BaseFGA:
     object_name: str
@@ -35,10 +57,8 @@ class BaseFGA:
         role: LiteralString,
         object_id: int,
     ) -> None:
-        body = ClientWriteRequest(
-            writes=cls.get_tuples(user_id, role, object_id),
-        )
-        await fga_client.write(body)
+        tuples = cls.get_tuples(user_id, role, object_id)
+        await cls.write_relationships(fga_client, writes=tuples)
 
     @classmethod
     async def delete_relationships(
@@ -48,14 +68,115 @@ class BaseFGA:
         role: LiteralString,
         object_id: int,
     ) -> None:
-        body = ClientWriteRequest(deletes=cls.get_tuples(user_id, role, object_id))
-        await fga_client.write(body)
+        tuples = cls.get_tuples(user_id, role, object_id)
+        await cls.write_relationships(fga_client, deletes=tuples)
+
+    @staticmethod
+    async def write_relationships(
+        fga_client: OpenFgaClient,
+        writes: Optional[List[ClientTuple]] = None,
+        deletes: Optional[List[ClientTuple]] = None,
+    ) -> None:
+        """
+        Writes tuples of any number of objects at once, keeping the decision cache
+        and the local evaluator in sync
+        """
+        try:
+            await write_tuples(fga_client, writes=writes, deletes=deletes)
+        except BaseException:
+            # Some chunks may be written, the local evaluator can't tell which
+            unsync_local_fga_evaluator(fga_client)
+            raise
+        else:
+            mirror_tuples(fga_client, writes=writes, deletes=deletes)
+        finally:
+            fga_decision_cache.invalidate([*(writes or []), *(deletes or [])])
 
     @staticmethod
-    async def check(fga_client: OpenFgaClient, body: ClientCheckRequest) -> bool:
+    async def check_remote(fga_client: OpenFgaClient, body: ClientCheckRequest) -> bool:
         response = await fga_client.check(body)
         return cast(bool, response.allowed)
 
+    @classmethod
+    async def check(
+        cls,
+        fga_client: OpenFgaClient,
+        body: ClientCheckRequest,
+        consistency: Optional[Consistency] = None,
+    ) -> bool:
+        """
+        With `higher_consistency` OpenFGA is always asked. Otherwise the local
+        evaluator answers when it mirrors the client's store, then the decision cache.
+        """
+        consistency = consistency or settings.FGA_CHECK_CONSISTENCY
+        if consistency == "higher_consistency":
+            return await cls.check_remote(fga_client, body)
+        evaluator = get_synced_local_evaluator(fga_client)
+        if evaluator is not None:
+            return evaluator.check(body.user, body.relation, body.object)
+        if not settings.FGA_CHECK_CACHE_ENABLED:
+            return await cls.check_remote(fga_client, body)
+        key = fga_decision_cache.get_key(fga_client, body)
+        allowed = fga_decision_cache.get(key)
+        if allowed is not None:
+            return allowed
+        generation = fga_decision_cache.generation
+        allowed = await cls.check_remote(fga_client, body)
+        fga_decision_cache.set(key, allowed, generation)
+        return allowed
+
+    @classmethod
+    async def batch_check(
+        cls,
+        fga_client: OpenFgaClient,
+        user_id: int,
+        checks: Iterable[Tuple[str, int]],
+    ) -> Dict[Tuple[str, int], bool]:
+        """
+        Checks many (relation, object_id) pairs concurrently, at most
+        FGA_BATCH_CHECK_MAX_CONCURRENCY at a time, through the decision cache
+        """
+        semaphore = asyncio.Semaphore(settings.FGA_BATCH_CHECK_MAX_CONCURRENCY)
+
+        async def check_one(relation: str, object_id: int) -> bool:
+            async with semaphore:
+                body = cls.has_user_relationship(user_id, relation, object_id)
+                return await cls.check(fga_client, body)
+
+        pairs = list(dict.fromkeys(checks))
+        results = await asyncio.gather(
+            *(check_one(relation, object_id) for relation, object_id in pairs)
+        )
+        return dict(zip(pairs, results))
+
+    @classmethod
+    async def filter_allowed(
+        cls,
+        fga_client: OpenFgaClient,
+        user_id: int,
+        relation: str,
+        object_ids: Iterable[int],
+    ) -> Set[int]:
+        results = await cls.batch_check(
+            fga_client, user_id, ((relation, object_id) for object_id in object_ids)
+        )
+        return {object_id for (_, object_id), allowed in results.items() if allowed}
+
+    @classmethod
+    async def list_objects(
+        cls, fga_client: OpenFgaClient, user_id: int, relation: str
+    ) -> List[str]:
+        """
+        Ids of every object of this type the user has the relation with.
+        Prefer `filter_allowed` when the candidates are known, this walks the whole store.
+        """
+        response = await fga_client.list_objects(
+            ClientListObjectsRequest(
+                user=f"user:{user_id}", relation=relation, type=cls.object_name
+            )
+        )
+        return [object_.split(":", 1)[1] for object_ in response.objects]
+
     @classmethod
     async def can_read(
         cls, fga_client: OpenFgaClient, user_id: int, object_id: int
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from openfga_sdk import OpenFgaClient
+from openfga_sdk.client.models.check_request import ClientCheckRequest
+from openfga_sdk.client.models.tuple import ClientTuple
+
+from app.core.config import settings
+
+# (store_id, authorization_model_id, user, relation, object)
+DecisionKey = Tuple[str, str, str, str, str]
+
+
+class FGADecisionCache:
+    """
+    Bounded LRU of `check` decisions, each kept at most `ttl` seconds.
+    Writing a tuple drops the decisions of its user and of its object. With our
+    model, relations are only derived from the user's own tuples (e.g. superuser
+    of the app) or the object's own tuples (e.g. its parent app), so this is
+    enough. Tuples written by another process are only seen once the TTL expires.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.FGA_CHECK_CACHE_MAX_SIZE,
+        ttl: float = settings.FGA_CHECK_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[DecisionKey, Tuple[bool, float]] = OrderedDict()
+        self.keys_by_user: Dict[str, Set[DecisionKey]] = {}
+        self.keys_by_object: Dict[str, Set[DecisionKey]] = {}
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every invalidation, so a check started before a write
+        # does not cache its now outdated answer
+        self.generation = 0
+
+    @staticmethod
+    def get_key(fga_client: OpenFgaClient, body: ClientCheckRequest) -> DecisionKey:
+        return (
+            fga_client.get_store_id() or "",
+            fga_client.get_authorization_model_id() or "",
+            body.user,
+            body.relation,
+            body.object,
+        )
+
+    def get(self, key: DecisionKey) -> Optional[bool]:
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: DecisionKey, allowed: bool, generation: int) -> None:
+        if generation != self.generation:
+            return
+        self.entries[key] = (allowed, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        self.keys_by_user.setdefault(key[2], set()).add(key)
+        self.keys_by_object.setdefault(key[4], set()).add(key)
+        while len(self.entries) > self.max_size:
+            self._discard(next(iter(self.entries)))
+
+    def _discard(self, key: DecisionKey) -> None:
+        self.entries.pop(key, None)
+        for index, name in ((self.keys_by_user, key[2]), (self.keys_by_object, key[4])):
+            keys = index.get(name)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[name]
+
+    def invalidate(self, tuples: Iterable[ClientTuple]) -> None:
+        self.generation += 1
+        for tuple_ in tuples:
+            keys = self.keys_by_user.get(tuple_.user, set()) | self.keys_by_object.get(
+                tuple_.object, set()
+            )
+            for key in keys:
+                self._discard(key)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.entries.clear()
+        self.keys_by_user.clear()
+        self.keys_by_object.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+fga_decision_cache = FGADecisionCache()
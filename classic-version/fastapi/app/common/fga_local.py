@@ -0,0 +1,337 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from openfga_sdk import OpenFgaClient
+from openfga_sdk.client.models.check_request import ClientCheckRequest
+from openfga_sdk.client.models.list_objects_request import ClientListObjectsRequest
+from openfga_sdk.client.models.tuple import ClientTuple
+from openfga_sdk.client.models.write_request import ClientWriteRequest
+from openfga_sdk.exceptions import ValidationException
+from openfga_sdk.models.check_response import CheckResponse
+from openfga_sdk.models.list_objects_response import ListObjectsResponse
+from openfga_sdk.models.read_request_tuple_key import ReadRequestTupleKey
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ABSOLUTE_PATH = os.path.dirname(os.path.abspath(__file__))
+JSON_AUTHZ_MODEL = os.path.join(
+    ABSOLUTE_PATH, "..", "..", "authorization", "model.json"
+)
+# Same as OpenFGA's default OPENFGA_RESOLVE_NODE_LIMIT
+MAX_RESOLUTION_DEPTH = 25
+READ_PAGE_SIZE = 100
+
+TupleKey = Tuple[str, str, str]
+# Models exported by the CLI use snake case keys, the API's use camel case
+REWRITE_KEYS = {
+    "computed_userset": "computedUserset",
+    "tuple_to_userset": "tupleToUserset",
+}
+
+
+def get_tuple_key(tuple_: Any) -> TupleKey:
+    return tuple_.user, tuple_.relation, tuple_.object
+
+
+def normalize_rewrite(rewrite: Any) -> Any:
+    """
+    Camel cases the keys of a relation rewrite and drops the unset (null) ones
+    """
+    if isinstance(rewrite, list):
+        return [normalize_rewrite(child) for child in rewrite]
+    if not isinstance(rewrite, dict):
+        return rewrite
+    return {
+        REWRITE_KEYS.get(key, key): normalize_rewrite(value)
+        for key, value in rewrite.items()
+        if value is not None
+    }
+
+
+class LocalFGAEvaluator:
+    """
+    In-process evaluation of our authorization model, with its own tuple store.
+    Supports direct relations (users, usersets and wildcards), computed usersets,
+    tuple to usersets, unions, intersections and differences, which covers
+    `authorization/model.fga`, from either JSON export of the model.
+    Conditions are not supported.
+    """
+
+    def __init__(self, model: Dict[str, Any]) -> None:
+        self.model_id: str = model.get("id", "")
+        self.relations: Dict[str, Dict[str, Any]] = {
+            type_definition["type"]: normalize_rewrite(
+                type_definition.get("relations") or {}
+            )
+            for type_definition in model["type_definitions"]
+        }
+        self.users_by_object_relation: Dict[Tuple[str, str], Set[str]] = {}
+        self.store_id: Optional[str] = None
+
+    @classmethod
+    def from_file(cls, path: str = JSON_AUTHZ_MODEL) -> "LocalFGAEvaluator":
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    @property
+    def tuple_count(self) -> int:
+        return sum(len(users) for users in self.users_by_object_relation.values())
+
+    def has_tuple(self, key: TupleKey) -> bool:
+        user, relation, object_ = key
+        return user in self.users_by_object_relation.get((object_, relation), set())
+
+    def write(self, tuples: Iterable[Any]) -> None:
+        for tuple_ in tuples:
+            user, relation, object_ = get_tuple_key(tuple_)
+            self.users_by_object_relation.setdefault((object_, relation), set()).add(
+                user
+            )
+
+    def delete(self, tuples: Iterable[Any]) -> None:
+        for tuple_ in tuples:
+            user, relation, object_ = get_tuple_key(tuple_)
+            users = self.users_by_object_relation.get((object_, relation))
+            if users is not None:
+                users.discard(user)
+
+    def clear(self) -> None:
+        self.users_by_object_relation.clear()
+
+    async def load(self, fga_client: OpenFgaClient) -> None:
+        """
+        Replaces the tuple store with every tuple of the client's store, which
+        holds the client's authorization model
+        """
+        self.clear()
+        continuation_token = ""
+        while True:
+            options: Dict[str, Any] = {"page_size": READ_PAGE_SIZE}
+            if continuation_token:
+                options["continuation_token"] = continuation_token
+            response = await fga_client.read(ReadRequestTupleKey(), options)
+            self.write(tuple_.key for tuple_ in response.tuples)
+            continuation_token = response.continuation_token
+            if not continuation_token:
+                break
+        self.model_id = fga_client.get_authorization_model_id() or ""
+        self.store_id = fga_client.get_store_id()
+
+    def is_synced_with(self, fga_client: Any) -> bool:
+        """
+        Answers for the client only while it points at the store and the model
+        that were loaded
+        """
+        return (
+            self.store_id is not None
+            and self.store_id == fga_client.get_store_id()
+            and self.model_id == (fga_client.get_authorization_model_id() or "")
+        )
+
+    def check(self, user: str, relation: str, object_: str, depth: int = 0) -> bool:
+        if depth > MAX_RESOLUTION_DEPTH:
+            raise ValidationException(reason="Authorization model resolution too deep")
+        object_type = object_.split(":", 1)[0]
+        rewrite = self.relations.get(object_type, {}).get(relation)
+        if rewrite is None:
+            raise ValidationException(
+                reason=f"Relation {relation} does not exist on type {object_type}"
+            )
+        return self._check_rewrite(rewrite, user, relation, object_, depth)
+
+    def _check_rewrite(
+        self,
+        rewrite: Dict[str, Any],
+        user: str,
+        relation: str,
+        object_: str,
+        depth: int,
+    ) -> bool:
+        if "this" in rewrite:
+            return self._check_direct(user, relation, object_, depth)
+        if "computedUserset" in rewrite:
+            computed_relation = rewrite["computedUserset"]["relation"]
+            return self.check(user, computed_relation, object_, depth + 1)
+        if "tupleToUserset" in rewrite:
+            tupleset = rewrite["tupleToUserset"]["tupleset"]["relation"]
+            computed_relation = rewrite["tupleToUserset"]["computedUserset"]["relation"]
+            parents = self.users_by_object_relation.get((object_, tupleset), set())
+            return any(
+                self.check(user, computed_relation, parent, depth + 1)
+                for parent in parents
+            )
+        if "union" in rewrite:
+            return any(
+                self._check_rewrite(child, user, relation, object_, depth)
+                for child in rewrite["union"]["child"]
+            )
+        if "intersection" in rewrite:
+            return all(
+                self._check_rewrite(child, user, relation, object_, depth)
+                for child in rewrite["intersection"]["child"]
+            )
+        if "difference" in rewrite:
+            difference = rewrite["difference"]
+            return self._check_rewrite(
+                difference["base"], user, relation, object_, depth
+            ) and not self._check_rewrite(
+                difference["subtract"], user, relation, object_, depth
+            )
+        raise ValidationException(reason=f"Unsupported relation rewrite {rewrite}")
+
+    def _check_direct(self, user: str, relation: str, object_: str, depth: int) -> bool:
+        users = self.users_by_object_relation.get((object_, relation), set())
+        user_type = user.split(":", 1)[0]
+        if user in users or f"{user_type}:*" in users:
+            return True
+        for userset in users:
+            if "#" not in userset:
+                continue
+            userset_object, userset_relation = userset.split("#", 1)
+            if self.check(user, userset_relation, userset_object, depth + 1):
+                return True
+        return False
+
+    def list_objects(self, user: str, relation: str, object_type: str) -> List[str]:
+        objects = {
+            object_
+            for object_, _ in self.users_by_object_relation
+            if object_.startswith(f"{object_type}:")
+        }
+        return sorted(
+            object_ for object_ in objects if self.check(user, relation, object_)
+        )
+
+
+class LocalFgaClient:
+    """
+    Stand-in for OpenFgaClient backed by a LocalFGAEvaluator, for the calls the app
+    makes. Writes are validated like OpenFGA does: writing an existing tuple,
+    deleting a missing one or exceeding `max_tuples_per_write` rejects the whole
+    request.
+    """
+
+    def __init__(
+        self,
+        evaluator: Optional[LocalFGAEvaluator] = None,
+        store_id: str = "local",
+        max_tuples_per_write: int = settings.FGA_MAX_TUPLES_PER_WRITE,
+    ) -> None:
+        self.evaluator = evaluator or LocalFGAEvaluator.from_file()
+        self.max_tuples_per_write = max_tuples_per_write
+        self.evaluator.store_id = store_id
+        self.store_id = store_id
+        self.authorization_model_id = self.evaluator.model_id
+
+    def get_store_id(self) -> str:
+        return self.store_id
+
+    def set_store_id(self, store_id: str) -> None:
+        self.store_id = store_id
+
+    def get_authorization_model_id(self) -> str:
+        return self.authorization_model_id
+
+    def set_authorization_model_id(self, authorization_model_id: str) -> None:
+        self.authorization_model_id = authorization_model_id
+
+    async def write(
+        self, body: ClientWriteRequest, options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        writes: List[ClientTuple] = body.writes or []
+        deletes: List[ClientTuple] = body.deletes or []
+        if len(writes) + len(deletes) > self.max_tuples_per_write:
+            raise ValidationException(
+                reason=f"Writes are limited to {self.max_tuples_per_write} tuples"
+            )
+        for tuple_ in writes:
+            if self.evaluator.has_tuple(get_tuple_key(tuple_)):
+                raise ValidationException(
+                    reason=f"Tuple {get_tuple_key(tuple_)} already exists"
+                )
+        for tuple_ in deletes:
+            if not self.evaluator.has_tuple(get_tuple_key(tuple_)):
+                raise ValidationException(
+                    reason=f"Tuple {get_tuple_key(tuple_)} does not exist"
+                )
+        self.evaluator.delete(deletes)
+        self.evaluator.write(writes)
+
+    async def check(
+        self, body: ClientCheckRequest, options: Optional[Dict[str, Any]] = None
+    ) -> CheckResponse:
+        allowed = self.evaluator.check(body.user, body.relation, body.object)
+        return CheckResponse(allowed=allowed)
+
+    async def list_objects(
+        self, body: ClientListObjectsRequest, options: Optional[Dict[str, Any]] = None
+    ) -> ListObjectsResponse:
+        objects = self.evaluator.list_objects(body.user, body.relation, body.type)
+        return ListObjectsResponse(objects=objects)
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "LocalFgaClient":
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        await self.close()
+
+
+_local_fga_evaluator: Optional[LocalFGAEvaluator] = None
+
+
+def get_local_fga_evaluator() -> LocalFGAEvaluator:
+    """
+    The app's evaluator, mirroring the store of the shared client once loaded
+    """
+    global _local_fga_evaluator  # pylint: disable=global-statement
+    if _local_fga_evaluator is None:
+        _local_fga_evaluator = LocalFGAEvaluator.from_file()
+    return _local_fga_evaluator
+
+
+async def load_local_fga_evaluator(fga_client: OpenFgaClient) -> None:
+    try:
+        await get_local_fga_evaluator().load(fga_client)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Could not load the local FGA evaluator, checks go to OpenFGA")
+
+
+def get_synced_local_evaluator(fga_client: Any) -> Optional[LocalFGAEvaluator]:
+    if not settings.FGA_LOCAL_EVALUATOR_ENABLED or _local_fga_evaluator is None:
+        return None
+    if not _local_fga_evaluator.is_synced_with(fga_client):
+        return None
+    return _local_fga_evaluator
+
+
+def mirror_tuples(
+    fga_client: Any,
+    writes: Optional[Iterable[Any]] = None,
+    deletes: Optional[Iterable[Any]] = None,
+) -> None:
+    """
+    Applies tuples written to OpenFGA to the local evaluator, if it mirrors that store
+    """
+    evaluator = get_synced_local_evaluator(fga_client)
+    if evaluator is None:
+        return
+    evaluator.delete(deletes or [])
+    evaluator.write(writes or [])
+
+
+def unsync_local_fga_evaluator(fga_client: Any) -> None:
+    """
+    For writes that may have been partly applied to OpenFGA: the checks go to
+    OpenFGA until the evaluator is loaded again
+    """
+    evaluator = get_synced_local_evaluator(fga_client)
+    if evaluator is not None:
+        logger.warning("The local FGA evaluator is out of sync, checks go to OpenFGA")
+        evaluator.store_id = None
@@ -0,0 +1,34 @@
+from dataclasses import asdict, dataclass
+from typing import Dict
+
+
+@dataclass
+class LatencyStats:
+    """
+    In-process latency accumulator. Cheap enough to be updated on hot paths.
+    """
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.last = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {**asdict(self), "average": self.average}
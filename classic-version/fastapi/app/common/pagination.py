@@ -0,0 +1,40 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+from app.common.exceptions import BadRequestException
+
+ItemT = TypeVar("ItemT")
+
+
+class InvalidCursorException(BadRequestException):
+    def __init__(self) -> None:
+        super().__init__(target="pagination", additional_info="invalid_cursor")
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: List[ItemT]
+    # Pass it back to get the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Cursors are opaque to clients, they only hold the position of the last item
+    """
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(data)
+    except (binascii.Error, ValueError) as exc:
+        raise InvalidCursorException() from exc
+    if not isinstance(payload, dict):
+        raise InvalidCursorException()
+    return payload
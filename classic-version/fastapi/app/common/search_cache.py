@@ -0,0 +1,83 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.config import settings
+
+# (index, generation, query, options)
+SearchCacheKey = Tuple[str, int, str, str]
+
+
+class SearchResultCache:
+    """
+    Results of recent searches, keyed by index, query and search options
+    (filter, offset, limit, sort). Each index has a generation, bumped on every
+    write this process sends to it: entries of an older generation are never
+    hit again and age out of the LRU. Writes from other workers or the CLI are
+    only seen once the entry expires.
+    Cached results are shared between callers, they must not be mutated.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.MEILI_SEARCH_CACHE_MAX_SIZE,
+        ttl: float = settings.MEILI_SEARCH_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[SearchCacheKey, Tuple[Dict[str, Any], float]] = (
+            OrderedDict()
+        )
+        self.generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_key(
+        self, index_name: str, query: str, opts: Mapping[str, Any]
+    ) -> SearchCacheKey:
+        return (
+            index_name,
+            self.generations.get(index_name, 0),
+            query,
+            json.dumps(opts, sort_keys=True, separators=(",", ":")),
+        )
+
+    def get(
+        self, index_name: str, query: str, opts: Mapping[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        key = self.get_key(index_name, query, opts)
+        entry = self.entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(
+        self,
+        index_name: str,
+        query: str,
+        opts: Mapping[str, Any],
+        result: Dict[str, Any],
+    ) -> None:
+        key = self.get_key(index_name, query, opts)
+        self.entries[key] = (result, time.monotonic() + self.ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def bump(self, index_name: str) -> None:
+        self.generations[index_name] = self.generations.get(index_name, 0) + 1
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+search_result_cache = SearchResultCache()
@@ -0,0 +1,219 @@
+import asyncio
+from typing import (
+    Any,
+    AsyncIterable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Union,
+    cast,
+)
+
+import httpx
+from meilisearch.errors import (
+    MeilisearchApiError,
+    MeilisearchCommunicationError,
+    MeilisearchTimeoutError,
+)
+from meilisearch.models.task import Task, TaskInfo
+
+from app.core.config import settings
+
+DocumentId = Union[int, str]
+NDJSON_HEADERS = {"Content-Type": "application/x-ndjson"}
+# Streamed bodies are sent with a chunked transfer encoding
+NDJSONBody = Union[bytes, AsyncIterable[bytes]]
+
+
+class AsyncMeiliSearchClient:
+    """
+    Non-blocking Meilisearch client built on a pooled httpx.AsyncClient.
+    It only covers the endpoints the app needs at request time, admin operations
+    still go through the synchronous SDK client.
+    Errors are raised as the SDK's exceptions so callers can handle both alike.
+    """
+
+    def __init__(self, url: str, api_key: str) -> None:
+        self.url = url
+        self.api_key = api_key
+        self._http: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_http(self) -> httpx.AsyncClient:
+        # Pooled connections are bound to the event loop they were opened on
+        loop = asyncio.get_running_loop()
+        if self._http is not None and self._loop is not loop:
+            self._drop_http()
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                base_url=self.url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=settings.MEILI_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=settings.MEILI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.MEILI_MAX_KEEPALIVE_CONNECTIONS,
+                ),
+            )
+            self._loop = loop
+        return self._http
+
+    def _drop_http(self) -> None:
+        """
+        Releases the client opened on another event loop. It can only be closed on
+        that loop, which may still run in another thread, otherwise its connections
+        died with it and only the reference is left to drop
+        """
+        http, loop = self._http, self._loop
+        self._http = None
+        self._loop = None
+        if http is None or http.is_closed or loop is None:
+            return
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop)
+
+    async def close(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._loop = None
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        *,
+        json: Any = None,
+        content: Optional[NDJSONBody] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        params: Optional[Mapping[str, Any]] = None,
+    ) -> Any:
+        try:
+            response = await self._get_http().request(
+                method, path, json=json, content=content, headers=headers, params=params
+            )
+        except httpx.TimeoutException as exc:
+            raise MeilisearchTimeoutError(str(exc)) from exc
+        except httpx.TransportError as exc:
+            raise MeilisearchCommunicationError(str(exc)) from exc
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as exc:
+            # The SDK error only reads `status_code` and `text` from the response
+            raise MeilisearchApiError(str(exc), cast(Any, response)) from exc
+        if not response.content:
+            return None
+        return response.json()
+
+    async def search(
+        self, index_uid: str, query: str, opts: Optional[Mapping[str, Any]] = None
+    ) -> Dict[str, Any]:
+        body = {"q": query, **(opts or {})}
+        return cast(
+            Dict[str, Any],
+            await self.request("POST", f"/indexes/{index_uid}/search", json=body),
+        )
+
+    async def add_documents(
+        self,
+        index_uid: str,
+        documents: List[Dict[str, Any]],
+        primary_key: Optional[str] = None,
+    ) -> TaskInfo:
+        params = {"primaryKey": primary_key} if primary_key else None
+        response = await self.request(
+            "POST", f"/indexes/{index_uid}/documents", json=documents, params=params
+        )
+        return TaskInfo(**response)
+
+    async def update_documents(
+        self,
+        index_uid: str,
+        documents: List[Dict[str, Any]],
+        primary_key: Optional[str] = None,
+    ) -> TaskInfo:
+        params = {"primaryKey": primary_key} if primary_key else None
+        response = await self.request(
+            "PUT", f"/indexes/{index_uid}/documents", json=documents, params=params
+        )
+        return TaskInfo(**response)
+
+    async def send_ndjson_documents(
+        self,
+        method: str,
+        index_uid: str,
+        body: NDJSONBody,
+        primary_key: Optional[str] = None,
+    ) -> TaskInfo:
+        params = {"primaryKey": primary_key} if primary_key else None
+        response = await self.request(
+            method,
+            f"/indexes/{index_uid}/documents",
+            content=body,
+            headers=NDJSON_HEADERS,
+            params=params,
+        )
+        return TaskInfo(**response)
+
+    async def add_ndjson_documents(
+        self, index_uid: str, body: NDJSONBody, primary_key: Optional[str] = None
+    ) -> TaskInfo:
+        return await self.send_ndjson_documents("POST", index_uid, body, primary_key)
+
+    async def update_ndjson_documents(
+        self, index_uid: str, body: NDJSONBody, primary_key: Optional[str] = None
+    ) -> TaskInfo:
+        return await self.send_ndjson_documents("PUT", index_uid, body, primary_key)
+
+    async def delete_document(
+        self, index_uid: str, document_id: DocumentId
+    ) -> TaskInfo:
+        response = await self.request(
+            "DELETE", f"/indexes/{index_uid}/documents/{document_id}"
+        )
+        return TaskInfo(**response)
+
+    async def delete_documents(
+        self, index_uid: str, document_ids: Iterable[DocumentId]
+    ) -> TaskInfo:
+        response = await self.request(
+            "POST",
+            f"/indexes/{index_uid}/documents/delete-batch",
+            json=list(document_ids),
+        )
+        return TaskInfo(**response)
+
+    async def fetch_documents(
+        self,
+        index_uid: str,
+        *,
+        filter_: Optional[List[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"limit": limit, "offset": offset}
+        if filter_:
+            body["filter"] = filter_
+        return cast(
+            Dict[str, Any],
+            await self.request(
+                "POST", f"/indexes/{index_uid}/documents/fetch", json=body
+            ),
+        )
+
+    async def get_task(self, task_uid: int) -> Task:
+        response = await self.request("GET", f"/tasks/{task_uid}")
+        return Task(**response)
+
+    async def get_tasks(self, task_uids: Iterable[int]) -> List[Task]:
+        uids = [str(uid) for uid in task_uids]
+        response = await self.request(
+            "GET", "/tasks", params={"uids": ",".join(uids), "limit": len(uids)}
+        )
+        return [Task(**task) for task in response["results"]]
+
+
+async_meili_search_client = AsyncMeiliSearchClient(
+    settings.MEILI_URL, settings.MEILI_MASTER_KEY
+)
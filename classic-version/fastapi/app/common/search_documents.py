@@ -0,0 +1,49 @@
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, Iterable, Tuple, Type, cast
+
+from pydantic import BaseModel
+from pydantic_core import to_json, to_jsonable_python
+
+
+class DocumentProjection:
+    """
+    Builds the search documents of entities from an explicit list of fields,
+    read straight from their attributes. Fields outside of the list, such as
+    password hashes, never reach the index.
+    Documents are encoded to JSON bytes in a single pass, no intermediate
+    string is parsed back.
+    """
+
+    def __init__(self, fields: Iterable[str]) -> None:
+        self.fields = tuple(fields)
+        self.get_values: Callable[[Any], Tuple[Any, ...]]
+        if len(self.fields) > 1:
+            self.get_values = attrgetter(*self.fields)
+        else:
+            # attrgetter returns a bare value, not a tuple, for a single field
+            field = self.fields[0]
+            self.get_values = lambda obj: (getattr(obj, field),)
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        return dict(zip(self.fields, self.get_values(obj)))
+
+    def to_document(self, obj: Any) -> Dict[str, Any]:
+        """
+        The document as Meilisearch gives it back, JSON types only
+        """
+        return cast(Dict[str, Any], to_jsonable_python(self.to_dict(obj)))
+
+    def to_json(self, obj: Any) -> bytes:
+        return to_json(self.to_dict(obj))
+
+    def to_ndjson(self, objs: Iterable[Any]) -> bytes:
+        return b"".join(self.to_json(obj) + b"\n" for obj in objs)
+
+
+@lru_cache(maxsize=None)
+def get_document_projection(document_model: Type[BaseModel]) -> DocumentProjection:
+    """
+    Compiled once per model, the documents hold the fields of `document_model`
+    """
+    return DocumentProjection(document_model.model_fields)
@@ -1,4 +1,17 @@
-from app.common.deps.search import StructuredSearchClient
+import json
+import operator
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import pytest
+from meilisearch.models.task import Task, TaskInfo
+
+from app.common.search_client import (
+    DocumentId,
+    NDJSONBody,
+    async_meili_search_client,
+)
+
+from app.common.deps.search import StructuredSearchClient, setup_search_indexes
 from app.common.search import meili_search_client
 from app.user.search import UserSearch
 
@@ -14,12 +27,149 @@ def get_test_search_clients(worker_id) -> StructuredSearchClient:
 
     user_search = UserSearch(index_name=user_index)
 
-    return StructuredSearchClient(
+    clients = StructuredSearchClient(
         user=user_search,
     )
+    setup_search_indexes(clients)
+    return clients
 
 
 def delete_search_indexes(worker_id):
     user_index = get_test_indexes(worker_id)
 
     meili_search_client.delete_index(user_index)
+
+
+TEST_TASK_DATE = "2024-01-01T00:00:00.000000Z"
+
+
+def make_task(
+    uid: int, status: str = "succeeded", index_uid: str = "test_index"
+) -> Task:
+    return Task(
+        uid=uid,
+        index_uid=index_uid,
+        status=status,
+        type="documentAdditionOrUpdate",
+        error={"message": "failed"} if status == "failed" else None,
+        enqueued_at=TEST_TASK_DATE,
+    )
+
+
+def make_task_info(uid: int, index_uid: str = "test_index") -> TaskInfo:
+    return TaskInfo(
+        task_uid=uid,
+        index_uid=index_uid,
+        status="enqueued",
+        type="documentAdditionOrUpdate",
+        enqueued_at=TEST_TASK_DATE,
+    )
+
+
+FILTER_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+
+class FakeSearchClient:
+    """
+    In-memory stand-in for `async_meili_search_client`, install it with
+    monkeypatch. Writes are applied at once and their tasks succeed, unless
+    their uid is in `failing_task_uids`.
+    """
+
+    def __init__(self) -> None:
+        self.indexes: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self.tasks: Dict[int, Task] = {}
+        self.ndjson_bodies: List[bytes] = []
+        self.failing_task_uids: Set[int] = set()
+
+    def install(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        for name in (
+            "add_documents",
+            "add_ndjson_documents",
+            "delete_documents",
+            "fetch_documents",
+            "get_task",
+        ):
+            monkeypatch.setattr(async_meili_search_client, name, getattr(self, name))
+
+    def get_documents(self, index_uid: str) -> List[Dict[str, Any]]:
+        return [
+            document for _, document in sorted(self.indexes.get(index_uid, {}).items())
+        ]
+
+    def enqueue(self, index_uid: str) -> TaskInfo:
+        uid = len(self.tasks) + 1
+        status = "failed" if uid in self.failing_task_uids else "succeeded"
+        self.tasks[uid] = make_task(uid, status, index_uid)
+        return make_task_info(uid, index_uid)
+
+    async def add_documents(
+        self,
+        index_uid: str,
+        documents: List[Dict[str, Any]],
+        primary_key: Optional[str] = None,
+    ) -> TaskInfo:
+        task_info = self.enqueue(index_uid)
+        # A failed task leaves the index as it was
+        if self.tasks[task_info.task_uid].status == "succeeded":
+            index = self.indexes.setdefault(index_uid, {})
+            index.update((document["id"], document) for document in documents)
+        return task_info
+
+    async def add_ndjson_documents(
+        self, index_uid: str, body: NDJSONBody, primary_key: Optional[str] = None
+    ) -> TaskInfo:
+        if not isinstance(body, bytes):
+            body = b"".join([piece async for piece in body])
+        self.ndjson_bodies.append(body)
+        documents = [json.loads(line) for line in body.splitlines()]
+        return await self.add_documents(index_uid, documents, primary_key)
+
+    async def delete_documents(
+        self, index_uid: str, document_ids: Iterable[DocumentId]
+    ) -> TaskInfo:
+        task_info = self.enqueue(index_uid)
+        if self.tasks[task_info.task_uid].status == "succeeded":
+            index = self.indexes.setdefault(index_uid, {})
+            for document_id in document_ids:
+                index.pop(document_id, None)
+        return task_info
+
+    async def fetch_documents(
+        self,
+        index_uid: str,
+        *,
+        filter_: Optional[List[str]] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> Dict[str, Any]:
+        """
+        Only understands filters such as `id > 3`, all of them must match
+        """
+        conditions = []
+        for condition in filter_ or []:
+            field, operator_name, value = condition.split()
+            conditions.append((field, FILTER_OPERATORS[operator_name], int(value)))
+        documents = [
+            document
+            for document in self.get_documents(index_uid)
+            if all(
+                compare(document[field], value) for field, compare, value in conditions
+            )
+        ]
+        return {
+            "results": documents[offset : offset + limit],
+            "offset": offset,
+            "limit": limit,
+            "total": len(documents),
+        }
+
+    async def get_task(self, task_uid: int) -> Task:
+        return self.tasks[task_uid]
@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from app.common.deps import fga
+from app.common.deps.fga import SharedFGAClient
+from app.core.config import settings
+
+STORE_IDS = ("01HVMMBCMGZNT3SED4Z17ECXCA", "01HVMMBCMGZNT3SED4Z17ECXCB")
+MODEL_IDS = ("01HVMMBD5GB2WQYQ8CSDP8MXHA", "01HVMMBD5GB2WQYQ8CSDP8MXHB")
+
+
+def write_id(path, value, mtime):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(value)
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def id_files(monkeypatch, tmp_path):
+    store_id_file = tmp_path / ".fga_store_id"
+    model_id_file = tmp_path / ".fga_authorization_model_id"
+    write_id(store_id_file, STORE_IDS[0], 1_000)
+    write_id(model_id_file, MODEL_IDS[0], 1_000)
+    monkeypatch.setattr(fga, "STORE_ID_FILE", str(store_id_file))
+    monkeypatch.setattr(fga, "AUTHORIZATION_MODEL_ID_FILE", str(model_id_file))
+    return store_id_file, model_id_file
+
+
+@pytest.fixture
+async def shared_client():
+    shared = SharedFGAClient()
+    yield shared
+    await shared.close()
+
+
+class TestSharedFGAClient:
+    async def test_get_reloads_ids_when_files_change(
+        self, id_files, shared_client, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "FGA_IDS_RELOAD_INTERVAL_SECONDS", 0)
+        store_id_file, model_id_file = id_files
+        client = await shared_client.get()
+        assert client.get_store_id() == STORE_IDS[0]
+        assert client.get_authorization_model_id() == MODEL_IDS[0]
+
+        write_id(store_id_file, STORE_IDS[1], 2_000)
+        write_id(model_id_file, MODEL_IDS[1], 2_000)
+
+        assert await shared_client.get() is client
+        assert client.get_store_id() == STORE_IDS[1]
+        assert client.get_authorization_model_id() == MODEL_IDS[1]
+
+    async def test_ids_are_not_checked_before_interval(
+        self, id_files, shared_client, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "FGA_IDS_RELOAD_INTERVAL_SECONDS", 3600)
+        store_id_file, _ = id_files
+        client = await shared_client.get()
+
+        write_id(store_id_file, STORE_IDS[1], 2_000)
+
+        await shared_client.get()
+        assert client.get_store_id() == STORE_IDS[0]
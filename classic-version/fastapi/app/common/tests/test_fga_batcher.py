@@ -0,0 +1,152 @@
+import asyncio
+
+import pytest
+from openfga_sdk.client.models.tuple import ClientTuple
+from openfga_sdk.exceptions import ValidationException
+
+from app.common.fga_batcher import (
+    FGAWriteBatcher,
+    FGAWriteCancelledError,
+    write_tuples_in_chunks,
+)
+from app.common.fga_local import LocalFgaClient
+from app.core.config import settings
+
+
+def self_user_tuple(user_id: int) -> ClientTuple:
+    return ClientTuple(
+        user=f"user:{user_id}", relation="self_user", object=f"user_self:{user_id}"
+    )
+
+
+@pytest.fixture
+def fga_writes(monkeypatch):
+    fga_client = LocalFgaClient(store_id="test_fga_batcher")
+    write = fga_client.write
+    tuples_per_write = []
+
+    async def record_write(body, options=None):
+        tuples_per_write.append(len(body.writes or []) + len(body.deletes or []))
+        await write(body, options)
+
+    monkeypatch.setattr(fga_client, "write", record_write)
+    return fga_client, tuples_per_write
+
+
+class TestFGAWriteBatcher:
+    async def test_writes_over_max_tuples_are_sent_in_chunks(self, fga_writes):
+        fga_client, tuples_per_write = fga_writes
+        batcher = FGAWriteBatcher(fga_client, max_delay=0.01)
+        max_tuples = settings.FGA_MAX_TUPLES_PER_WRITE
+        tuples = [self_user_tuple(user_id) for user_id in range(max_tuples + 50)]
+
+        await batcher.write(writes=tuples)
+
+        assert sorted(tuples_per_write) == [50, max_tuples]
+        assert fga_client.evaluator.tuple_count == len(tuples)
+
+    async def test_concurrent_writes_are_merged(self, fga_writes):
+        fga_client, tuples_per_write = fga_writes
+        batcher = FGAWriteBatcher(fga_client, max_delay=0.01)
+
+        await asyncio.gather(
+            *(batcher.write(writes=[self_user_tuple(user_id)]) for user_id in range(3))
+        )
+
+        assert tuples_per_write == [3]
+        assert batcher.written_tuples_count == 3
+
+    async def test_rejected_batch_only_fails_the_faulty_caller(self, fga_writes):
+        fga_client, _ = fga_writes
+        batcher = FGAWriteBatcher(fga_client, max_delay=0.01)
+        await batcher.write(writes=[self_user_tuple(1)])
+
+        results = await asyncio.gather(
+            batcher.write(writes=[self_user_tuple(1)]),
+            batcher.write(writes=[self_user_tuple(2)]),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ValidationException)
+        assert results[1] is None
+        assert batcher.fallback_count == 1
+        assert fga_client.evaluator.tuple_count == 2
+
+    async def test_rejected_batch_keeps_each_call_atomic(self, fga_writes):
+        fga_client, tuples_per_write = fga_writes
+        batcher = FGAWriteBatcher(fga_client, max_delay=0.01)
+        await batcher.write(writes=[self_user_tuple(1)])
+
+        results = await asyncio.gather(
+            batcher.write(writes=[self_user_tuple(1), self_user_tuple(3)]),
+            batcher.write(writes=[self_user_tuple(2), self_user_tuple(4)]),
+            return_exceptions=True,
+        )
+
+        assert isinstance(results[0], ValidationException)
+        assert results[1] is None
+        # The merged batch, then each call as one write
+        assert tuples_per_write == [1, 4, 2, 2]
+        assert not fga_client.evaluator.has_tuple(
+            ("user:3", "self_user", "user_self:3")
+        )
+        assert fga_client.evaluator.tuple_count == 3
+        assert batcher.written_tuples_count == 3
+
+    async def test_cancelled_flush_fails_waiting_callers(self, fga_writes):
+        fga_client, _ = fga_writes
+        batcher = FGAWriteBatcher(fga_client, max_delay=60)
+        write = asyncio.create_task(batcher.write(writes=[self_user_tuple(1)]))
+        await asyncio.sleep(0)
+
+        for flush_task in list(batcher._flush_tasks):
+            flush_task.cancel()
+
+        with pytest.raises(FGAWriteCancelledError):
+            await asyncio.wait_for(write, 1)
+        assert not batcher.batches
+
+    async def test_flush_cancelled_while_writing_fails_its_callers(
+        self, fga_writes, monkeypatch
+    ):
+        fga_client, _ = fga_writes
+        writing = asyncio.Event()
+
+        async def hang(body, options=None):
+            writing.set()
+            await asyncio.sleep(60)
+
+        monkeypatch.setattr(fga_client, "write", hang)
+        batcher = FGAWriteBatcher(fga_client, max_delay=0)
+        write = asyncio.create_task(batcher.write(writes=[self_user_tuple(1)]))
+        await asyncio.wait_for(writing.wait(), 1)
+
+        for flush_task in list(batcher._flush_tasks):
+            flush_task.cancel()
+
+        with pytest.raises(FGAWriteCancelledError):
+            await asyncio.wait_for(write, 1)
+
+
+class TestWriteTuplesInChunks:
+    async def test_tuple_written_then_deleted_is_applied_in_order(
+        self, fga_writes, monkeypatch
+    ):
+        fga_client, tuples_per_write = fga_writes
+        record_write = fga_client.write
+
+        async def slow_large_chunks(body, options=None):
+            # Run in parallel, the smaller last chunk would be applied first
+            await asyncio.sleep(0.01 * len(body.writes or []))
+            await record_write(body, options)
+
+        monkeypatch.setattr(fga_client, "write", slow_large_chunks)
+        tuples = [self_user_tuple(user_id) for user_id in range(5)]
+
+        await write_tuples_in_chunks(
+            fga_client, writes=tuples, deletes=[tuples[0], tuples[4]], max_tuples=2
+        )
+
+        # The delete of tuples[4] can't share a chunk with its write
+        assert tuples_per_write == [2, 2, 2, 1]
+        assert fga_client.evaluator.tuple_count == 3
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+from openfga_sdk.client.models.check_request import ClientCheckRequest
+from openfga_sdk.client.models.tuple import ClientTuple
+
+from app.common.fga_cache import FGADecisionCache, fga_decision_cache
+from app.common.fga_local import LocalFgaClient
+from app.core.config import settings
+from app.user.fga import UserFGA
+
+STORE_ID = "test_fga_cache"
+
+
+def get_key(user: str, relation: str, object_: str):
+    return STORE_ID, "", user, relation, object_
+
+
+@pytest.fixture
+def decision_cache(monkeypatch):
+    monkeypatch.setattr(settings, "FGA_CHECK_CACHE_ENABLED", True)
+    fga_decision_cache.clear()
+    yield fga_decision_cache
+    fga_decision_cache.clear()
+
+
+class TestFGADecisionCache:
+    def test_decisions_expire_after_ttl(self):
+        cache = FGADecisionCache(ttl=0.01)
+        key = get_key("user:1", "can_read", "user_self:2")
+        cache.set(key, True, cache.generation)
+        assert cache.get(key) is True
+
+        time.sleep(0.02)
+
+        assert cache.get(key) is None
+        assert cache.get_stats() == {"size": 0, "hits": 1, "misses": 1}
+
+    def test_invalidate_drops_decisions_of_the_user_and_of_the_object(self):
+        cache = FGADecisionCache()
+        of_user = get_key("user:1", "can_read", "user_self:3")
+        of_object = get_key("user:2", "can_read", "user_self:1")
+        unrelated = get_key("user:2", "can_read", "user_self:3")
+        for key in (of_user, of_object, unrelated):
+            cache.set(key, True, cache.generation)
+
+        cache.invalidate(
+            [ClientTuple(user="user:1", relation="self_user", object="user_self:1")]
+        )
+
+        assert cache.get(of_user) is None
+        assert cache.get(of_object) is None
+        assert cache.get(unrelated) is True
+
+    def test_decision_started_before_a_write_is_not_cached(self):
+        cache = FGADecisionCache()
+        key = get_key("user:1", "can_read", "user_self:2")
+        generation = cache.generation
+        cache.invalidate([])
+
+        cache.set(key, True, generation)
+
+        assert cache.get(key) is None
+
+    def test_least_recently_used_decision_is_evicted(self):
+        cache = FGADecisionCache(max_size=2)
+        first, second, third = (
+            get_key(f"user:{user_id}", "can_read", "user_self:1")
+            for user_id in range(3)
+        )
+        cache.set(first, True, cache.generation)
+        cache.set(second, True, cache.generation)
+        cache.get(first)
+
+        cache.set(third, True, cache.generation)
+
+        assert cache.get(second) is None
+        assert cache.get(first) is True
+
+
+class TestFGACheckCache:
+    async def test_writes_invalidate_cached_checks(self, decision_cache):
+        fga_client = LocalFgaClient(store_id=STORE_ID)
+        await UserFGA.create_relationships(fga_client, 2, "client")
+        body = ClientCheckRequest(
+            user="user:1", relation="can_read", object="user_self:2"
+        )
+        client = ClientTuple(user="user:1", relation="client", object="app:app")
+        assert await UserFGA.check(fga_client, body) is False
+
+        # Written behind the cache's back, the cached decision is still served
+        fga_client.evaluator.write([client])
+        assert await UserFGA.check(fga_client, body) is False
+        fga_client.evaluator.delete([client])
+
+        await UserFGA.write_relationships(fga_client, writes=[client])
+        assert await UserFGA.check(fga_client, body) is True
@@ -0,0 +1,156 @@
+import itertools
+
+import pytest
+from openfga_sdk.client.models.check_request import ClientCheckRequest
+from openfga_sdk.client.models.tuple import ClientTuple
+from openfga_sdk.client.models.write_request import ClientWriteRequest
+
+from app.common import fga_local
+from app.common.fga_local import (
+    LocalFGAEvaluator,
+    LocalFgaClient,
+    get_synced_local_evaluator,
+)
+from app.core.config import settings
+from app.user.fga import UserFGA
+
+USERS = [f"user:{user_id}" for user_id in range(1, 5)]
+OBJECTS_BY_TYPE = {
+    "app": ["app:app"],
+    "user_self": [f"user_self:{user_id}" for user_id in range(1, 4)],
+}
+# user:1 is a superuser, user:2 a client, user:3 has no role and user:4 no tuple
+TUPLES = [
+    ClientTuple(user="user:1", relation="superuser", object="app:app"),
+    ClientTuple(user="user:2", relation="client", object="app:app"),
+    *(
+        ClientTuple(user=f"user:{user_id}", relation="self_user", object=object_)
+        for user_id, object_ in enumerate(OBJECTS_BY_TYPE["user_self"], start=1)
+    ),
+    *(
+        ClientTuple(user="app:app", relation="parent_app", object=object_)
+        for object_ in OBJECTS_BY_TYPE["user_self"]
+    ),
+]
+MODEL_RELATIONS = [
+    (object_type, relation)
+    for object_type, relations in LocalFGAEvaluator.from_file().relations.items()
+    for relation in relations
+]
+
+
+@pytest.fixture
+def evaluator():
+    evaluator_ = LocalFGAEvaluator.from_file()
+    evaluator_.write(TUPLES)
+    return evaluator_
+
+
+@pytest.fixture
+def app_evaluator(monkeypatch):
+    """
+    The app's evaluator, mirroring the store of a LocalFgaClient standing in
+    for OpenFGA
+    """
+    monkeypatch.setattr(settings, "FGA_LOCAL_EVALUATOR_ENABLED", True)
+    monkeypatch.setattr(settings, "FGA_WRITE_BATCHING_ENABLED", False)
+    remote = LocalFgaClient(store_id="test_remote_store")
+    evaluator_ = LocalFGAEvaluator.from_file()
+    evaluator_.store_id = remote.get_store_id()
+    monkeypatch.setattr(fga_local, "_local_fga_evaluator", evaluator_)
+    return remote, evaluator_
+
+
+class TestLocalFGAEvaluator:
+    def test_model_relations_are_loaded(self):
+        assert sorted(MODEL_RELATIONS) == [
+            ("app", "client"),
+            ("app", "superuser"),
+            ("user_self", "can_delete"),
+            ("user_self", "can_read"),
+            ("user_self", "can_update"),
+            ("user_self", "parent_app"),
+            ("user_self", "self_user"),
+        ]
+
+    @pytest.mark.parametrize(
+        "relation, object_, allowed_users",
+        [
+            ("superuser", "app:app", {"user:1"}),
+            ("client", "app:app", {"user:1", "user:2"}),
+            ("can_read", "user_self:3", {"user:1", "user:2"}),
+            ("can_update", "user_self:3", {"user:3"}),
+            ("can_delete", "user_self:3", {"user:3"}),
+        ],
+    )
+    def test_check(self, evaluator, relation, object_, allowed_users):
+        assert {
+            user for user in USERS if evaluator.check(user, relation, object_)
+        } == allowed_users
+
+    @pytest.mark.parametrize("object_type, relation", MODEL_RELATIONS)
+    async def test_check_matches_openfga(
+        self, evaluator, fga_client, object_type, relation
+    ):
+        await fga_client.write(ClientWriteRequest(writes=TUPLES))
+
+        for user, object_ in itertools.product(USERS, OBJECTS_BY_TYPE[object_type]):
+            response = await fga_client.check(
+                ClientCheckRequest(user=user, relation=relation, object=object_)
+            )
+            assert evaluator.check(user, relation, object_) is response.allowed, (
+                user,
+                relation,
+                object_,
+            )
+
+
+class TestLocalEvaluatorMirroring:
+    async def test_evaluator_unsynced_when_model_or_store_changes(self, app_evaluator):
+        remote, evaluator = app_evaluator
+        assert get_synced_local_evaluator(remote) is evaluator
+
+        remote.set_authorization_model_id("01HVMMBD5GB2WQYQ8CSDP8MXHB")
+        assert get_synced_local_evaluator(remote) is None
+
+        remote.set_authorization_model_id(evaluator.model_id)
+        remote.set_store_id("test_other_store")
+        assert get_synced_local_evaluator(remote) is None
+
+    async def test_written_tuples_are_mirrored(self, app_evaluator):
+        remote, evaluator = app_evaluator
+
+        await UserFGA.write_relationships(remote, writes=TUPLES)
+
+        assert evaluator.tuple_count == len(TUPLES)
+        assert get_synced_local_evaluator(remote) is evaluator
+
+    async def test_partly_applied_write_unsyncs_evaluator(
+        self, app_evaluator, monkeypatch
+    ):
+        remote, evaluator = app_evaluator
+        write = remote.write
+        calls = []
+
+        async def fail_after_first_chunk(body, options=None):
+            calls.append(body)
+            if len(calls) > 1:
+                raise ConnectionError("openfga is down")
+            await write(body, options)
+
+        monkeypatch.setattr(remote, "write", fail_after_first_chunk)
+        tuples = [
+            ClientTuple(user=f"user:{user_id}", relation="client", object="app:app")
+            for user_id in range(settings.FGA_MAX_TUPLES_PER_WRITE + 1)
+        ]
+
+        with pytest.raises(ConnectionError):
+            await UserFGA.write_relationships(remote, writes=tuples)
+
+        assert evaluator.tuple_count == 0
+        assert get_synced_local_evaluator(remote) is None
+        # Checks now go to the store, which holds the first chunk
+        assert await UserFGA.check(
+            remote,
+            ClientCheckRequest(user="user:0", relation="client", object="app:app"),
+        )
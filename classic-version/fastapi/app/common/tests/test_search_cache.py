@@ -0,0 +1,135 @@
+import time
+
+import pytest
+
+from app.common import search as search_module
+from app.common.search_cache import SearchResultCache, search_result_cache
+from app.common.test_utils.search import make_task, make_task_info
+from app.core.config import settings
+from app.user.search import UserSearch
+
+INDEX_NAME = "test_cache_users"
+OPTS = {"filter": ["id > 1"], "sort": ["id:asc"], "offset": 0, "limit": 3}
+
+
+def make_result(query: str):
+    return {"hits": [], "query": query}
+
+
+@pytest.fixture
+def result_cache(monkeypatch):
+    monkeypatch.setattr(settings, "MEILI_SEARCH_CACHE_ENABLED", True)
+    search_result_cache.clear()
+    yield search_result_cache
+    search_result_cache.clear()
+
+
+@pytest.fixture
+def meili_searches(monkeypatch):
+    searches = []
+
+    async def search(index_name, query, opts):
+        searches.append((index_name, query, opts))
+        return make_result(query)
+
+    async def wait_for_task(task_uid):
+        return make_task(task_uid, index_uid=INDEX_NAME)
+
+    monkeypatch.setattr(search_module.async_meili_search_client, "search", search)
+    monkeypatch.setattr(search_module, "async_wait_for_task", wait_for_task)
+    monkeypatch.setattr(
+        search_module.search_task_reconciler, "track", lambda task_info: None
+    )
+    return searches
+
+
+class TestSearchResultCache:
+    def test_key_holds_index_generation_query_and_options(self):
+        cache = SearchResultCache()
+        cache.bump(INDEX_NAME)
+
+        assert cache.get_key(INDEX_NAME, "john", OPTS) == (
+            INDEX_NAME,
+            1,
+            "john",
+            '{"filter":["id > 1"],"limit":3,"offset":0,"sort":["id:asc"]}',
+        )
+        assert cache.get_key(INDEX_NAME, "john", dict(reversed(OPTS.items()))) == (
+            cache.get_key(INDEX_NAME, "john", OPTS)
+        )
+
+    @pytest.mark.parametrize(
+        "index_name, query, opts",
+        [
+            ("test_cache_other", "john", OPTS),
+            (INDEX_NAME, "jane", OPTS),
+            (INDEX_NAME, "john", {**OPTS, "offset": 3}),
+            (INDEX_NAME, "john", {**OPTS, "filter": ["id > 2"]}),
+            (INDEX_NAME, "john", {**OPTS, "sort": ["id:desc"]}),
+        ],
+    )
+    def test_other_search_is_a_miss(self, index_name, query, opts):
+        cache = SearchResultCache()
+        cache.set(INDEX_NAME, "john", OPTS, make_result("john"))
+
+        assert cache.get(index_name, query, opts) is None
+        assert cache.get(INDEX_NAME, "john", OPTS) == make_result("john")
+
+    def test_results_expire_after_ttl(self):
+        cache = SearchResultCache(ttl=0.01)
+        cache.set(INDEX_NAME, "john", OPTS, make_result("john"))
+        assert cache.get(INDEX_NAME, "john", OPTS) is not None
+
+        time.sleep(0.02)
+
+        assert cache.get(INDEX_NAME, "john", OPTS) is None
+        assert cache.get_stats() == {"size": 0, "hits": 1, "misses": 1}
+
+    def test_least_recently_used_result_is_evicted(self):
+        cache = SearchResultCache(max_size=2)
+        for query in ("first", "second"):
+            cache.set(INDEX_NAME, query, OPTS, make_result(query))
+        cache.get(INDEX_NAME, "first", OPTS)
+
+        cache.set(INDEX_NAME, "third", OPTS, make_result("third"))
+
+        assert cache.get(INDEX_NAME, "second", OPTS) is None
+        assert cache.get(INDEX_NAME, "first", OPTS) is not None
+        assert cache.get(INDEX_NAME, "third", OPTS) is not None
+
+    def test_bump_only_reaches_its_index(self):
+        cache = SearchResultCache()
+        cache.set(INDEX_NAME, "john", OPTS, make_result("john"))
+        cache.set("test_cache_other", "john", OPTS, make_result("john"))
+
+        cache.bump(INDEX_NAME)
+
+        assert cache.get(INDEX_NAME, "john", OPTS) is None
+        assert cache.get("test_cache_other", "john", OPTS) is not None
+
+
+class TestSearchResultCacheInSearch:
+    async def test_same_search_is_served_from_cache(self, result_cache, meili_searches):
+        search = UserSearch(index_name=INDEX_NAME)
+
+        first = await search.search("john", OPTS)
+        second = await search.search("john", OPTS)
+
+        assert first is second
+        assert len(meili_searches) == 1
+
+    @pytest.mark.parametrize("wait_for_tasks", [True, False])
+    async def test_handled_task_makes_older_results_unreachable(
+        self, result_cache, meili_searches, monkeypatch, wait_for_tasks
+    ):
+        search = UserSearch(index_name=INDEX_NAME)
+        monkeypatch.setattr(search, "wait_for_tasks", wait_for_tasks)
+        await search.search("john", OPTS)
+        old_key = result_cache.get_key(INDEX_NAME, "john", OPTS)
+
+        await search.handle_task(make_task_info(1, INDEX_NAME))
+        await search.search("john", OPTS)
+
+        assert len(meili_searches) == 2
+        assert result_cache.get_key(INDEX_NAME, "john", OPTS) != old_key
+        assert old_key in result_cache.entries
@@ -0,0 +1,45 @@
+import pytest
+from typer.testing import CliRunner
+
+from app.user.search import UserSearch
+from commands import search as search_commands
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls_ = []
+    monkeypatch.setattr(
+        search_commands, "setup_search_indexes", lambda: calls_.append("setup")
+    )
+    monkeypatch.setattr(
+        search_commands,
+        "seed_search_index",
+        lambda search_class, restart: calls_.append(("seed", search_class, restart)),
+    )
+    monkeypatch.setattr(
+        search_commands, "update_indexes_if_needed", lambda: calls_.append("update")
+    )
+    return calls_
+
+
+class TestSearchCommands:
+    def test_setup_indexes(self, calls):
+        result = runner.invoke(search_commands.app, ["setup-indexes"])
+
+        assert result.exit_code == 0, result.output
+        assert calls == ["setup"]
+
+    @pytest.mark.parametrize("args,restart", [([], False), (["--restart"], True)])
+    def test_seed(self, calls, args, restart):
+        result = runner.invoke(search_commands.app, ["seed", *args])
+
+        assert result.exit_code == 0, result.output
+        assert calls == [("seed", UserSearch, restart)]
+
+    def test_update_sets_up_indexes_first(self, calls):
+        result = runner.invoke(search_commands.app, ["update"])
+
+        assert result.exit_code == 0, result.output
+        assert calls == ["setup", "update"]
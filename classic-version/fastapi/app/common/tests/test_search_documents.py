@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from app.common.search_documents import DocumentProjection, get_document_projection
+from app.common.test_utils.search import FakeSearchClient
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.models import User, UserOut
+from app.user.search import UserSearch
+
+INDEX_NAME = "test_documents_users"
+PRIVATE_FIELDS = {"hashed_password", "is_superuser"}
+
+
+@pytest.fixture
+def meili(monkeypatch):
+    fake = FakeSearchClient()
+    fake.install(monkeypatch)
+    return fake
+
+
+def new_user(user_id: int) -> User:
+    return User(
+        id=user_id,
+        email=random_email(),
+        username=random_lower_string(),
+        first_name="Ada",
+        hashed_password=random_lower_string(),
+        is_superuser=True,
+    )
+
+
+class TestDocumentProjection:
+    def test_user_documents_leave_out_private_fields(self):
+        projection = get_document_projection(UserOut)
+        user = new_user(1)
+
+        document = projection.to_document(user)
+
+        assert set(projection.fields) == set(UserOut.model_fields)
+        assert PRIVATE_FIELDS.isdisjoint(document)
+        assert document == UserOut.model_validate(user).model_dump(mode="json")
+
+    def test_json_matches_document(self):
+        projection = get_document_projection(UserOut)
+        users = [new_user(1), new_user(2)]
+
+        lines = projection.to_ndjson(users).splitlines()
+
+        assert [json.loads(line) for line in lines] == [
+            projection.to_document(user) for user in users
+        ]
+        assert json.loads(projection.to_json(users[0])) == projection.to_document(
+            users[0]
+        )
+
+    def test_single_field(self):
+        projection = DocumentProjection(["id"])
+
+        assert projection.to_document(new_user(7)) == {"id": 7}
+
+    def test_projection_is_compiled_once_per_model(self):
+        assert get_document_projection(UserOut) is get_document_projection(UserOut)
+
+    async def test_indexed_user_documents_leave_out_private_fields(self, meili):
+        search = UserSearch(index_name=INDEX_NAME)
+
+        await search.add_documents([new_user(1), new_user(2)])
+
+        documents = meili.get_documents(INDEX_NAME)
+        assert len(documents) == 2
+        assert all(PRIVATE_FIELDS.isdisjoint(document) for document in documents)
+        assert all(
+            PRIVATE_FIELDS.isdisjoint(document)
+            for document in search.get_formatted_documents([new_user(3)])
+        )
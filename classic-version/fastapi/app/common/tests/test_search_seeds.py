@@ -0,0 +1,116 @@
+import pytest
+
+from app.common.test_utils.search import FakeSearchClient
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.models import User, UserOut
+from app.user.search import UserSearch
+from commands.search_commands import seeds
+from commands.search_commands.seeds import (
+    SearchIndexSeeder,
+    SearchSeedError,
+    SeedCheckpoint,
+)
+
+INDEX_NAME = "test_seed_users"
+
+
+@pytest.fixture
+def meili(monkeypatch):
+    fake = FakeSearchClient()
+    fake.install(monkeypatch)
+    return fake
+
+
+@pytest.fixture
+def checkpoint(monkeypatch, tmp_path):
+    monkeypatch.setattr(seeds, "CHECKPOINT_FOLDER", str(tmp_path))
+    return SeedCheckpoint(INDEX_NAME)
+
+
+async def create_users(session, count: int):
+    users = [
+        User(
+            email=random_email(),
+            username=random_lower_string(),
+            hashed_password=random_lower_string(),
+        )
+        for _ in range(count)
+    ]
+    session.add_all(users)
+    await session.flush()
+    return users
+
+
+def get_documents(users):
+    return [UserOut.model_validate(user).model_dump(mode="json") for user in users]
+
+
+class TestSeedCheckpoint:
+    def test_load_without_checkpoint(self, checkpoint):
+        assert checkpoint.load() is None
+
+    def test_save_then_load(self, checkpoint):
+        checkpoint.save(12)
+        checkpoint.save(42)
+
+        assert checkpoint.load() == 42
+        assert SeedCheckpoint(INDEX_NAME).load() == 42
+
+    def test_clear(self, checkpoint):
+        checkpoint.save(42)
+
+        checkpoint.clear()
+        checkpoint.clear()
+
+        assert checkpoint.load() is None
+
+
+class TestSearchIndexSeeder:
+    async def test_seed_uploads_every_chunk_and_moves_checkpoint(
+        self, session, meili, checkpoint
+    ):
+        users = await create_users(session, 5)
+        documents = get_documents(users)
+        seeder = SearchIndexSeeder(
+            UserSearch(index_name=INDEX_NAME), User, checkpoint, chunk_size=2
+        )
+
+        seeded = await seeder.seed(session)
+
+        assert seeded == 5
+        assert len(meili.ndjson_bodies) == 3
+        assert meili.get_documents(INDEX_NAME) == documents
+        assert checkpoint.load() == users[-1].id
+
+    async def test_seed_resumes_after_checkpoint(self, session, meili, checkpoint):
+        users = await create_users(session, 5)
+        documents = get_documents(users)
+        checkpoint.save(users[2].id)
+        seeder = SearchIndexSeeder(
+            UserSearch(index_name=INDEX_NAME), User, checkpoint, chunk_size=2
+        )
+
+        seeded = await seeder.seed(session, checkpoint.load())
+
+        assert seeded == 2
+        assert meili.get_documents(INDEX_NAME) == documents[3:]
+        assert checkpoint.load() == users[-1].id
+
+    async def test_failed_chunk_keeps_checkpoint_before_it(
+        self, session, meili, checkpoint
+    ):
+        users = await create_users(session, 5)
+        meili.failing_task_uids.add(2)
+        seeder = SearchIndexSeeder(
+            UserSearch(index_name=INDEX_NAME),
+            User,
+            checkpoint,
+            chunk_size=2,
+            max_parallel_uploads=1,
+        )
+
+        with pytest.raises(SearchSeedError):
+            await seeder.seed(session)
+
+        assert seeder.seeded == 2
+        assert checkpoint.load() == users[1].id
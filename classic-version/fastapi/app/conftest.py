@@ -13,6 +13,7 @@ from app.common.deps.fga import get_fga_client
 from app.common.deps.db import get_db
 from app.common.deps.search import StructuredSearchClient, get_search_clients
 from app.common.deps.tasks import tasks
+from app.common.fga_local import LocalFgaClient
 from app.common.test_utils.authz import (
     create_store_and_authorization_model,
     delete_store,
@@ -80,6 +81,10 @@ def background_tasks():
 
 @pytest.fixture(scope="function")
 async def fga_client(worker_id):
+    if settings.FGA_TEST_LOCAL_EVALUATOR:
+        async with LocalFgaClient(store_id=f"test_skeleton_{worker_id}") as fga:
+            yield fga
+        return
     store_id, authorization_model_id = await create_store_and_authorization_model(
         worker_id
     )
@@ -6,17 +6,14 @@ from fastapi.requests import Request
 from jose import JWTError
 from sqladmin import Admin
 from sqladmin.authentication import AuthenticationBackend
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.admin import TokenAdminView
-from app.auth.utils.auth import (
-    create_access_token,
-    get_token_content,
-    verify_password_against_hash,
-)
+from app.auth.utils.auth import create_access_token, get_token_content
+from app.auth.utils.hashing import verify_password
 from app.common.exceptions import NotFoundException
 from app.core.config import settings
+from app.core.db import get_engine
 from app.core.sync_db import engine
 from app.user.admin import UserAdminView
 from app.user.repository import UserRepo
@@ -36,9 +33,7 @@ def create_admin(app: FastAPI) -> None:
 class AdminAuth(AuthenticationBackend):
     async def login(self, request: Request, *args: Any, **kwargs: Any) -> bool:
         form = await request.form()
-        db_url = settings.SQLALCHEMY_DATABASE_URI.unicode_string()  # type: ignore
-        engine_ = create_async_engine(db_url, echo=settings.DEBUG_SQL)
-        async with AsyncSession(engine_) as session:
+        async with AsyncSession(get_engine()) as session:
             email, password = form["username"], form["password"]
             if not isinstance(email, str) or not isinstance(password, str):
                 return False
@@ -47,7 +42,7 @@ class AdminAuth(AuthenticationBackend):
             except NotFoundException:
                 return False
 
-            if not verify_password_against_hash(
+            if not await verify_password(
                 password=password, hashed_password=db_user.hashed_password
             ):
                 return False
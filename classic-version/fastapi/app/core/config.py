@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, List, Optional, Union
+from typing import Any, List, Literal, Optional, Union
 
 from dotenv import load_dotenv
 from pydantic import (
@@ -24,6 +24,29 @@ class Settings(BaseSettings):
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     ALGORITHM: str = "HS256"
+    # Verified token payloads kept until they expire, 0 disables the cache
+    JWT_CACHE_MAX_SIZE: int = 10_000
+    # Caches the users resolved from access tokens across requests. Changes made
+    # by other processes are only seen once an entry expires
+    USER_CACHE_ENABLED: bool = False
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+    USER_CACHE_INVALIDATION_CHECK_SECONDS: float = 1.0
+    # "thread" or "process", bcrypt releases the GIL so threads are usually enough
+    PASSWORD_HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASHING_MAX_WORKERS: int = 4
+    # Existing hashes are upgraded on login when the scheme or its cost changes
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "scrypt"] = "bcrypt"
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_SCRYPT_LOG_N: int = 15
+    PASSWORD_SCRYPT_R: int = 8
+    PASSWORD_SCRYPT_P: int = 1
+    # When set, the cost is tuned at startup for a hash to take about that long
+    PASSWORD_HASH_TARGET_SECONDS: Optional[float] = None
+    PASSWORD_REHASH_ON_LOGIN: bool = True
+    USER_IMPORT_BATCH_SIZE: int = 1000
+    PAGINATION_DEFAULT_LIMIT: int = 20
+    PAGINATION_MAX_LIMIT: int = 100
     BACKEND_CORS_ORIGINS: List[Any] = ["*"]
     DEBUG_SQL: bool = False
     SKIP_TEST_DB_SETUP: bool = False
@@ -100,6 +123,15 @@ class Settings(BaseSettings):
             port=port,
         )
 
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    # Recycle connections after 30 minutes, before server-side idle timeouts kick in
+    DB_POOL_RECYCLE: int = 60 * 30
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_SLOW_CHECKOUT_SECONDS: float = 0.1
+
     MINIO_USER: Optional[str] = None
     MINIO_PASSWORD: Optional[str] = None
     MINIO_BUCKET: Optional[str] = None
@@ -147,6 +179,32 @@ class Settings(BaseSettings):
         port = values.data.get("MEILI_PORT") if host != "meilisearch" else 7700
         return f"{scheme}://{host}:{port}"
 
+    MEILI_SETUP_INDEXES_ON_STARTUP: bool = True
+    MEILI_TIMEOUT_SECONDS: float = 5.0
+    MEILI_MAX_CONNECTIONS: int = 100
+    MEILI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    MEILI_TASK_POLL_INITIAL_SECONDS: float = 0.005
+    MEILI_TASK_POLL_MAX_SECONDS: float = 0.5
+    MEILI_TASK_TIMEOUT_SECONDS: float = 30.0
+    # When disabled, writes return as soon as Meilisearch enqueued them and the
+    # task statuses are checked in batches in the background
+    MEILI_WAIT_FOR_TASKS: bool = True
+    MEILI_TASK_RECONCILE_INTERVAL_SECONDS: float = 1.0
+    # Index writes from the repositories are buffered, collapsed per document
+    # and sent in batches
+    MEILI_WRITE_BUFFER_ENABLED: bool = True
+    MEILI_WRITE_BUFFER_MAX_BATCH_SIZE: int = 1000
+    MEILI_WRITE_BUFFER_FLUSH_INTERVAL_SECONDS: float = 0.5
+    # Seeding streams the tables by chunks, with a few uploads in flight
+    MEILI_SEED_CHUNK_SIZE: int = 1000
+    MEILI_SEED_MAX_PARALLEL_UPLOADS: int = 4
+    # Size of the pieces streamed NDJSON bodies are sent in
+    MEILI_NDJSON_PIECE_BYTES: int = 64 * 1024
+    # Search results are cached until a write to their index, or the TTL
+    MEILI_SEARCH_CACHE_ENABLED: bool = True
+    MEILI_SEARCH_CACHE_MAX_SIZE: int = 1000
+    MEILI_SEARCH_CACHE_TTL_SECONDS: float = 5.0
+
     FGA_API_SCHEME: str = "http"
     FGA_API_HOST: str = "localhost"
     FGA_API_PORT: int = 8080
@@ -159,5 +217,26 @@ class Settings(BaseSettings):
             return 8080
         return val
 
+    FGA_CONNECTION_POOL_MAXSIZE: int = 100
+    FGA_IDS_RELOAD_INTERVAL_SECONDS: float = 5.0
+    # Tuples written by concurrent requests are merged into a few large writes
+    FGA_WRITE_BATCHING_ENABLED: bool = True
+    # Must not exceed the OpenFGA server's OPENFGA_MAX_TUPLES_PER_WRITE
+    FGA_MAX_TUPLES_PER_WRITE: int = 100
+    FGA_WRITE_BATCH_MAX_DELAY_SECONDS: float = 0.01
+    FGA_MAX_PARALLEL_WRITES: int = 10
+    FGA_CHECK_CACHE_ENABLED: bool = True
+    FGA_CHECK_CACHE_MAX_SIZE: int = 10_000
+    FGA_CHECK_CACHE_TTL_SECONDS: float = 10.0
+    FGA_BATCH_CHECK_MAX_CONCURRENCY: int = 20
+    # Loads every tuple at startup and answers checks in process. Tuples written by
+    # other processes are missed, use the higher_consistency mode where it matters
+    FGA_LOCAL_EVALUATOR_ENABLED: bool = False
+    FGA_CHECK_CONSISTENCY: Literal["minimize_latency", "higher_consistency"] = (
+        "minimize_latency"
+    )
+    # Runs the tests against the local evaluator instead of an OpenFGA server
+    FGA_TEST_LOCAL_EVALUATOR: bool = False
+
 
 settings = Settings()
@@ -0,0 +1,69 @@
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
+
+from app.common.metrics import LatencyStats
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+pool_checkout_stats = LatencyStats()
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool recording how long callers wait to get a connection, including
+    the time spent opening one when the pool has to overflow.
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            pool_checkout_stats.record(waited)
+            if waited > settings.DB_POOL_SLOW_CHECKOUT_SECONDS:
+                logger.warning(
+                    f"Waited {waited:.3f}s for a database connection ({self.status()})"
+                )
+
+
+_engine: Optional[AsyncEngine] = None
+
+
+def create_engine() -> AsyncEngine:
+    db_url = settings.SQLALCHEMY_DATABASE_URI.unicode_string()  # type: ignore
+    return create_async_engine(
+        db_url,
+        echo=settings.DEBUG_SQL,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+        },
+    )
+
+
+def get_engine() -> AsyncEngine:
+    """
+    Returns the process-wide engine, creating it on first use.
+    """
+    global _engine  # pylint: disable=global-statement
+    if _engine is None:
+        _engine = create_engine()
+    return _engine
+
+
+async def dispose_engine() -> None:
+    global _engine  # pylint: disable=global-statement
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = None
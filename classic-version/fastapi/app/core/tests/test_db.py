@@ -0,0 +1,113 @@
+import asyncio
+import logging
+
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import main
+from app.core import db
+from app.core.config import settings
+from app.core.db import TimedAsyncAdaptedQueuePool, pool_checkout_stats
+
+
+TEST_DATABASE_URL = settings.TEST_SQLALCHEMY_DATABASE_URI.unicode_string()  # type: ignore
+
+
+@pytest.fixture
+async def single_connection_engine(worker_id):
+    engine = create_async_engine(
+        TEST_DATABASE_URL + f"_{worker_id}",
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+    yield engine
+    await engine.dispose()
+
+
+class TestTimedAsyncAdaptedQueuePool:
+    async def test_checkout_wait_is_recorded(
+        self, single_connection_engine, monkeypatch, caplog
+    ):
+        monkeypatch.setattr(settings, "DB_POOL_SLOW_CHECKOUT_SECONDS", 0.05)
+        pool_checkout_stats.reset()
+
+        async def hold_connection(ready: asyncio.Event):
+            async with single_connection_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+                ready.set()
+                await asyncio.sleep(0.1)
+
+        ready = asyncio.Event()
+        holder = asyncio.create_task(hold_connection(ready))
+        await ready.wait()
+        with caplog.at_level(logging.WARNING, logger=db.__name__):
+            async with single_connection_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+        await holder
+
+        assert pool_checkout_stats.count == 2
+        assert pool_checkout_stats.max >= 0.05
+        assert pool_checkout_stats.last == pool_checkout_stats.max
+        assert "for a database connection" in caplog.text
+
+
+class TestEngine:
+    async def test_get_engine_is_shared_until_disposed(self, monkeypatch):
+        monkeypatch.setattr(db, "_engine", None)
+
+        engine = db.get_engine()
+
+        assert db.get_engine() is engine
+        assert isinstance(engine.pool, TimedAsyncAdaptedQueuePool)
+        await db.dispose_engine()
+        assert db._engine is None
+        new_engine = db.get_engine()
+        assert new_engine is not engine
+        await db.dispose_engine()
+
+
+class TestLifespan:
+    async def test_every_cleanup_runs_when_one_raises(self, monkeypatch):
+        calls = []
+
+        def record(name, error=None):
+            async def step(*_):
+                calls.append(name)
+                if error is not None:
+                    raise error
+
+            return step
+
+        monkeypatch.setattr(settings, "PASSWORD_HASH_TARGET_SECONDS", None)
+        monkeypatch.setattr(settings, "FGA_LOCAL_EVALUATOR_ENABLED", False)
+        monkeypatch.setattr(settings, "MEILI_SETUP_INDEXES_ON_STARTUP", False)
+        monkeypatch.setattr(settings, "MEILI_WAIT_FOR_TASKS", True)
+        monkeypatch.setattr(settings, "MEILI_WRITE_BUFFER_ENABLED", True)
+        monkeypatch.setattr(main, "get_engine", lambda: None)
+        monkeypatch.setattr(main, "dispose_engine", record("engine"))
+        monkeypatch.setattr(main, "start_search_write_buffers", lambda: None)
+        monkeypatch.setattr(
+            main,
+            "stop_search_write_buffers",
+            record("buffers", ConnectionError("meilisearch is down")),
+        )
+        monkeypatch.setattr(main.shared_fga_client, "open", record("open"))
+        monkeypatch.setattr(
+            main.shared_fga_client,
+            "close",
+            record("fga", ConnectionError("openfga is down")),
+        )
+        monkeypatch.setattr(main.async_meili_search_client, "close", record("meili"))
+        monkeypatch.setattr(
+            main.password_hashing_pool, "shutdown", lambda: calls.append("hashing")
+        )
+
+        with pytest.raises(ConnectionError):
+            async with main.lifespan(FastAPI()):
+                pass
+
+        assert calls == ["open", "buffers", "fga", "meili", "engine", "hashing"]
@@ -1,8 +1,8 @@
-from typing import Annotated, Union
+from typing import Annotated, List, Union
 
 from fastapi import UploadFile
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import Column
+from sqlalchemy import Column, Index
 from sqlmodel import AutoString, Field, SQLModel
 
 from app.auth.models import Token
@@ -18,6 +18,8 @@ class UserBase(SQLModel):
 
 class User(UserBase, table=True):
     __tablename__ = "users"
+    # Backs the keyset pagination ordered by username
+    __table_args__ = (Index("ix_users_username_id", "username", "id"),)
 
     id: Union[int, None] = Field(default=None, primary_key=True)
     hashed_password: str
@@ -56,3 +58,17 @@ class UserOut(UserBase):
 class UserAndToken(BaseModel):
     user: UserOut
     token: Token
+
+
+class UserImportError(BaseModel):
+    line: int
+    message: str
+
+
+class UserImportReport(BaseModel):
+    created: int = 0
+    # Rows whose email is already registered
+    skipped: int = 0
+    invalid: int = 0
+    # The first invalid rows only
+    errors: List[UserImportError] = []
@@ -1,18 +1,19 @@
-from typing import cast
+import asyncio
+import logging
+from typing import Any, Dict, List, Literal, Sequence, Tuple, cast, get_args
 
 from fastapi import UploadFile
+from openfga_sdk.client.models.tuple import ClientTuple
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import select
+from sqlmodel import select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.auth.exceptions import InvalidCredentialsException
 from app.auth.models import Token
-from app.auth.utils.auth import (
-    create_access_token,
-    get_password_hash,
-    verify_password_against_hash,
-)
+from app.auth.utils.auth import create_access_token
+from app.auth.utils.hashing import hash_password, verify_password
 from app.auth.utils.password import is_strong_password
+from app.auth.utils.password_policy import password_policy
 from app.common.deps.common import StructuredCommonDeps
 from app.common.exceptions import NotFoundException
 from app.common.repository import (
@@ -20,45 +21,99 @@ from app.common.repository import (
     UpdateSchemaOrDict,
     get_dict_from_obj_in_update,
 )
+from app.user.cache import user_identity_cache
 from app.user.fga import UserFGA, UserRole
 from app.user.exceptions import (
     EmailAlreadyRegisteredException,
     PasswordNotStrongException,
 )
+from app.core.config import settings
 from app.user.models import User, UserCreate, UserUpdate
 
+logger = logging.getLogger(__name__)
+
+UserOrderBy = Literal["id", "email", "username"]
+
+
+def get_user_role(db_obj: User) -> UserRole:
+    return cast(UserRole, "superuser" if db_obj.is_superuser else "client")
+
+
+def get_users_tuples(db_objs: Sequence[User]) -> List[ClientTuple]:
+    """
+    The tuples written when the users are created, and deleted with them
+    """
+    return [
+        tuple_
+        for db_obj in db_objs
+        for tuple_ in UserFGA.get_tuples(
+            cast(int, db_obj.id), get_user_role(db_obj), cast(int, db_obj.id)
+        )
+    ]
+
 
 class UserRepoClass(BaseRepo[User, UserCreate, UserUpdate]):
+    sortable_fields: Tuple[str, ...] = get_args(UserOrderBy)
+
     async def callback_create(
         self, db_obj: User, *, deps: StructuredCommonDeps
     ) -> None:
         user_id = cast(int, db_obj.id)
-        user_role = "client" if not db_obj.is_superuser else "superuser"
         deps.tasks.add_task(
             UserFGA.create_relationships,
             deps.fga_client,
             user_id,
-            cast(UserRole, user_role),
+            get_user_role(db_obj),
         )
-        deps.tasks.add_task(deps.search.user.add_documents, [db_obj])
+        deps.tasks.add_task(deps.search.user.queue_upserts, [db_obj])
 
     async def callback_delete(
         self, db_obj: User, *, deps: StructuredCommonDeps
     ) -> None:
         user_id = cast(int, db_obj.id)
-        user_role = "superuser" if db_obj.is_superuser else "client"
         deps.tasks.add_task(
             UserFGA.delete_relationships,
             deps.fga_client,
             user_id,
-            cast(UserRole, user_role),
+            get_user_role(db_obj),
         )
-        deps.tasks.add_task(deps.search.user.delete_document, db_obj)
+        deps.tasks.add_task(deps.search.user.queue_deletes, [db_obj])
+        user_identity_cache.invalidate(user_id, db_obj.email)
 
     async def callback_update(
         self, db_obj: User, *, deps: StructuredCommonDeps
     ) -> None:
-        deps.tasks.add_task(deps.search.user.update_documents, [db_obj])
+        user_identity_cache.invalidate(db_obj.id, db_obj.email)
+        deps.tasks.add_task(deps.search.user.queue_upserts, [db_obj])
+
+    async def callback_create_many(
+        self, db_objs: List[User], *, deps: StructuredCommonDeps
+    ) -> None:
+        deps.tasks.add_task(
+            UserFGA.write_relationships,
+            deps.fga_client,
+            writes=get_users_tuples(db_objs),
+        )
+        deps.tasks.add_task(deps.search.user.queue_upserts, db_objs)
+
+    async def callback_update_many(
+        self, db_objs: List[User], *, deps: StructuredCommonDeps
+    ) -> None:
+        for db_obj in db_objs:
+            user_identity_cache.invalidate(db_obj.id, db_obj.email)
+        deps.tasks.add_task(deps.search.user.queue_upserts, db_objs)
+
+    async def callback_delete_many(
+        self, db_objs: List[User], *, deps: StructuredCommonDeps
+    ) -> None:
+        deps.tasks.add_task(
+            UserFGA.write_relationships,
+            deps.fga_client,
+            deletes=get_users_tuples(db_objs),
+        )
+        deps.tasks.add_task(deps.search.user.queue_deletes, db_objs)
+        for db_obj in db_objs:
+            user_identity_cache.invalidate(cast(int, db_obj.id), db_obj.email)
 
     async def get_by_email(self, session: AsyncSession, *, email: str) -> User:
         stmt = select(User).where(User.email == email)
@@ -74,24 +129,17 @@ class UserRepoClass(BaseRepo[User, UserCreate, UserUpdate]):
         *,
         obj_in: UserCreate,
     ) -> User:
-        session = deps.session
         result = is_strong_password(obj_in.password)
         if result is False:
             raise PasswordNotStrongException()
-        hashed_password = get_password_hash(obj_in.password)
+        hashed_password = await hash_password(obj_in.password)
         obj_in_data = obj_in.model_dump()
         del obj_in_data["password"]
         obj_in_data["hashed_password"] = hashed_password
-        db_obj = User(**obj_in_data)
-        session.add(db_obj)
         try:
-            await session.commit()
+            return await self.insert_one(deps, obj_in_data)
         except IntegrityError as exc:
-            await session.rollback()
             raise EmailAlreadyRegisteredException() from exc
-        await session.refresh(db_obj)
-        await self.callback_create(db_obj, deps=deps)
-        return db_obj
 
     async def update(
         self,
@@ -100,17 +148,67 @@ class UserRepoClass(BaseRepo[User, UserCreate, UserUpdate]):
         id_: int,
         obj_in: UpdateSchemaOrDict[UserUpdate],
     ) -> User:
-        update_data = get_dict_from_obj_in_update(obj_in)
+        update_data = await self.get_update_data(obj_in)
+        try:
+            return await super().update(deps, id_=id_, obj_in=update_data)
+        except IntegrityError as exc:
+            raise EmailAlreadyRegisteredException() from exc
+
+    @staticmethod
+    async def get_update_data(
+        obj_in: UpdateSchemaOrDict[UserUpdate],
+    ) -> Dict[str, Any]:
+        """
+        Replaces the password to set by its hash
+        """
+        update_data = dict(get_dict_from_obj_in_update(obj_in))
         update_password: str | None = update_data.get("password", None)
         if update_password:
             result = is_strong_password(update_password)
             if result is False:
                 raise PasswordNotStrongException()
-            hashed_password = get_password_hash(update_password)
+            hashed_password = await hash_password(update_password)
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
+        return update_data
+
+    @staticmethod
+    async def get_create_values(objs_in: Sequence[UserCreate]) -> List[Dict[str, Any]]:
+        """
+        The rows to insert, the passwords are hashed in parallel on the hashing pool
+        """
+        hashed_passwords = await asyncio.gather(
+            *(hash_password(obj_in.password) for obj_in in objs_in)
+        )
+        return [
+            {**obj_in.model_dump(exclude={"password"}), "hashed_password": hashed}
+            for obj_in, hashed in zip(objs_in, hashed_passwords)
+        ]
+
+    async def create_many(
+        self,
+        deps: StructuredCommonDeps,
+        *,
+        objs_in: Sequence[UserCreate],
+    ) -> List[User]:
+        if not all(is_strong_password(obj_in.password) for obj_in in objs_in):
+            raise PasswordNotStrongException()
+        values = await self.get_create_values(objs_in)
         try:
-            return await super().update(deps, id_=id_, obj_in=update_data)
+            return await self.insert_many(deps, values)
+        except IntegrityError as exc:
+            raise EmailAlreadyRegisteredException() from exc
+
+    async def update_many(
+        self,
+        deps: StructuredCommonDeps,
+        *,
+        ids: Sequence[int],
+        obj_in: UpdateSchemaOrDict[UserUpdate],
+    ) -> List[User]:
+        update_data = await self.get_update_data(obj_in)
+        try:
+            return await super().update_many(deps, ids=ids, obj_in=update_data)
         except IntegrityError as exc:
             raise EmailAlreadyRegisteredException() from exc
 
@@ -121,21 +219,52 @@ class UserRepoClass(BaseRepo[User, UserCreate, UserUpdate]):
             db_user = await self.get_by_email(session, email=email)
         except NotFoundException as exc:
             raise InvalidCredentialsException() from exc
-        if not verify_password_against_hash(password, db_user.hashed_password):
+        if not await verify_password(password, db_user.hashed_password):
             raise InvalidCredentialsException()
-
         access_token = create_access_token(
             data={"email": db_user.email},
         )
+        if settings.PASSWORD_REHASH_ON_LOGIN and password_policy.needs_rehash(
+            db_user.hashed_password
+        ):
+            await self.rehash_password(session, db_user, password)
         return Token(access_token=access_token)
 
+    async def rehash_password(
+        self, session: AsyncSession, db_user: User, password: str
+    ) -> None:
+        """
+        Upgrades a hash made with an older password policy, the plain password
+        is only known at login. A failure does not fail the login.
+        """
+        # A rollback expires `db_user`, which can't be lazy loaded in async
+        user_id, email = cast(int, db_user.id), db_user.email
+        try:
+            hashed_password = await hash_password(password)
+            await session.exec(  # type: ignore[call-overload]
+                update(User)
+                .where(User.id == user_id)  # type: ignore[arg-type]
+                .values(hashed_password=hashed_password)
+            )
+            await self.commit(session)
+        except Exception:  # pylint: disable=broad-exception-caught
+            await session.rollback()
+            logger.exception(f"Could not rehash the password of user {user_id}")
+            return
+        user_identity_cache.invalidate(user_id, email)
+
     async def set_avatar_url(
         self, session: AsyncSession, id_: int, avatar: UploadFile
     ) -> User:
-        user = await self.get(session, id_=id_)
-        user.avatar_url = avatar
-        await session.commit()
-        await session.refresh(user)
+        stmt = (
+            update(User)
+            .where(User.id == id_)  # type: ignore[arg-type]
+            .values(avatar_url=avatar)
+            .returning(User)
+        )
+        user = await self.exec_returning_one(session, stmt)
+        await self.commit(session)
+        user_identity_cache.invalidate(id_, user.email)
         return user
 
 
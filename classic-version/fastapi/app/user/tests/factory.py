@@ -29,7 +29,7 @@ async def new_user(
 
     role = cast(UserRole, "client" if not user.is_superuser else "superuser")
     await UserFGA.create_relationships(fga_client, user_id, role)
-    user_search.add_documents([user])
+    await user_search.add_documents([user])
 
     return user
 
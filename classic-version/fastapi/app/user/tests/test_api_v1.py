@@ -5,14 +5,19 @@ import pytest
 from app.auth.utils.auth import verify_password_against_hash
 from app.common.exceptions import NotFoundException
 from app.common.test_utils.utils import authenticate_client, get_route
+from app.core.config import settings
 from app.user.api_v1 import (
     create_user,
     delete_user,
     get_user_by_id,
     get_user_me,
+    import_users,
+    list_users,
     search_users,
+    set_user_avatar,
     update_user,
 )
+from app.user.cache import user_identity_cache
 from app.user.fga import UserFGA
 from app.user.models import User
 from app.user.repository import UserRepo
@@ -63,6 +68,21 @@ class TestUserRoutes:
         assert response.status_code == status.HTTP_201_CREATED
         assert verify_password_against_hash(new_password, user.hashed_password)
 
+    async def test_set_user_avatar_endpoint(self, client, factory):
+        user = await factory(User)
+        user_id = user.id
+        authenticate_client(client, user.email)
+
+        response = await client.post(
+            get_route(set_user_avatar, user_id=user_id),
+            files={"avatar": ("avatar.png", b"avatar", "image/png")},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        content = response.json()
+        assert content["id"] == user_id
+        assert isinstance(content["avatar_url"], str)
+        assert "avatar.png" in content["avatar_url"]
+
     async def test_delete_user_endpoint(self, session, factory, client):
         user = await factory(User)
         authenticate_client(client, user.email)
@@ -82,6 +102,29 @@ class TestUserRoutes:
         assert content["email"] == user.email
         assert content["username"] == user.username
 
+    async def test_import_users_endpoint(self, client, factory, session):
+        user = await factory(User, is_superuser=True)
+        authenticate_client(client, user.email)
+        content = (
+            "email,username,password\n"
+            "imported@test.com,imported,secure_Password91\n"
+            f"{user.email},existing,secure_Password91\n"
+            "invalid,invalid,secure_Password91\n"
+        )
+        response = await client.post(
+            get_route(import_users),
+            files={"file": ("users.csv", content.encode(), "text/csv")},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        report = response.json()
+        assert report["created"] == 1
+        assert report["skipped"] == 1
+        assert report["errors"] == [{"line": 4, "message": "invalid_fields: email"}]
+        imported = await UserRepo.get_by_email(session, email="imported@test.com")
+        assert verify_password_against_hash(
+            "secure_Password91", imported.hashed_password
+        )
+
     async def test_search_users_does_not_return_self(self, factory, client):
         for _ in range(10):
             await factory(User)
@@ -91,7 +134,57 @@ class TestUserRoutes:
         response = await client.get(get_route(search_users))
         assert response.status_code == status.HTTP_200_OK
         content = response.json()
-        assert len(content) == 10
+        assert len(content["items"]) == 10
+        assert content["next_cursor"] is None
+
+    async def test_search_users_follows_cursor(self, factory, client):
+        users = []
+        for _ in range(6):
+            # Read before the next user's commit expires it
+            user = await factory(User)
+            users.append((user.id, user.email))
+        authenticate_client(client, users[0][1])
+        ids = []
+        params = {"limit": 2}
+        while True:
+            response = await client.get(get_route(search_users), params=params)
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            ids.extend(item["id"] for item in page["items"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        assert ids == [user_id for user_id, _ in users[1:]]
+
+    async def test_search_users_sees_new_users(self, factory, client):
+        client_user = await factory(User)
+        authenticate_client(client, client_user.email)
+        response = await client.get(get_route(search_users))
+        assert response.json()["items"] == []
+
+        user = await factory(User)
+        response = await client.get(get_route(search_users))
+        assert [item["id"] for item in response.json()["items"]] == [user.id]
+
+    async def test_list_users_follows_cursor(self, factory, client):
+        users = []
+        for _ in range(4):
+            # Read before the next user's commit expires it
+            user = await factory(User)
+            users.append((user.username, user.id, user.email))
+        authenticate_client(client, users[0][2])
+        ids = []
+        params = {"limit": 3, "order_by": "username"}
+        while True:
+            response = await client.get(get_route(list_users), params=params)
+            assert response.status_code == status.HTTP_200_OK
+            page = response.json()
+            assert len(page["items"]) <= 3
+            ids.extend(item["id"] for item in page["items"])
+            if page["next_cursor"] is None:
+                break
+            params["cursor"] = page["next_cursor"]
+        assert ids == [user_id for _, user_id, _ in sorted(users)]
 
 
 class TestUserRouteErrors:
@@ -220,7 +313,7 @@ class TestUserRouteBackgroundTasks:
         )
         db_user = await UserRepo.get(session, id_=user_id)
         background_tasks.add_task.assert_any_call(
-            search_clients.user.add_documents, [db_user]
+            search_clients.user.queue_upserts, [db_user]
         )
 
     async def test_user_delete_triggers_tuple_deletion(
@@ -234,7 +327,7 @@ class TestUserRouteBackgroundTasks:
             UserFGA.delete_relationships, unittest.mock.ANY, user.id, "client"
         )
         background_tasks.add_task.assert_any_call(
-            search_clients.user.delete_document, user
+            search_clients.user.queue_deletes, [user]
         )
 
     async def test_user_update_triggers_index_update(
@@ -247,7 +340,7 @@ class TestUserRouteBackgroundTasks:
         )
         assert response.status_code == status.HTTP_201_CREATED
         background_tasks.add_task.assert_any_call(
-            search_clients.user.update_documents, [user]
+            search_clients.user.queue_upserts, [user]
         )
 
 
@@ -278,6 +371,65 @@ class TestUserRoutePermissions:
         )
         assert response.status_code == status.HTTP_403_FORBIDDEN
 
+    async def test_cannot_import_users_without_being_superuser(self, factory, client):
+        user = await factory(User)
+        authenticate_client(client, user.email)
+        response = await client.post(
+            get_route(import_users),
+            files={"file": ("users.ndjson", b"", "application/x-ndjson")},
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
     async def test_cannot_search_users_without_being_authenticated(self, client):
         response = await client.get(get_route(search_users))
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    async def test_cannot_list_users_with_invalid_cursor(self, client, factory):
+        user = await factory(User)
+        authenticate_client(client, user.email)
+        response = await client.get(get_route(list_users), params={"cursor": "nope"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.fixture
+def user_cache_enabled(monkeypatch):
+    monkeypatch.setattr(settings, "USER_CACHE_ENABLED", True)
+    user_identity_cache.clear()
+    yield user_identity_cache
+    user_identity_cache.clear()
+
+
+class TestUserRoutesWithUserCache:
+    async def test_updated_user_is_not_served_stale(
+        self, client, factory, user_cache_enabled
+    ):
+        user = await factory(User)
+        user_id, email = user.id, user.email
+        authenticate_client(client, email)
+        response = await client.get(get_route(get_user_me))
+        assert response.status_code == status.HTTP_200_OK
+        assert user_cache_enabled.get(email) is not None
+
+        response = await client.patch(
+            get_route(update_user, user_id=user_id), json={"first_name": "Updated"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = await client.get(get_route(get_user_me))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["first_name"] == "Updated"
+
+    async def test_deleted_user_is_not_served_stale(
+        self, client, factory, user_cache_enabled
+    ):
+        user = await factory(User)
+        user_id, email = user.id, user.email
+        authenticate_client(client, email)
+        response = await client.get(get_route(get_user_me))
+        assert response.status_code == status.HTTP_200_OK
+
+        response = await client.delete(get_route(delete_user, user_id=user_id))
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = await client.get(get_route(get_user_me))
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
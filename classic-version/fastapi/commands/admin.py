@@ -1,14 +1,24 @@
 import asyncio
-from typing import cast
+from typing import Optional, cast
 
 import typer
 from rich.prompt import IntPrompt, Prompt
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.common.deps.search import search_clients
+from app.core.db import dispose_engine, get_engine
 from app.core.sync_db import engine
 from app.auth.utils.auth import get_password_hash
+from app.user.cache import invalidate_other_processes
 from app.user.models import User
 from app.user.fga import UserFGA
+from app.user.importer import (
+    ImportFormat,
+    UserImporter,
+    get_import_format,
+    read_user_rows,
+)
 
 from .authz import get_fga_client_config
 from openfga_sdk import OpenFgaClient
@@ -75,6 +85,7 @@ async def async_set_superuser() -> None:
                 return set_superuser()
             user.is_superuser = True
             session.commit()
+            invalidate_other_processes()
             print_success("User is now a superuser")
         case 2:
             email = Prompt.ask("Enter the user email")
@@ -85,6 +96,7 @@ async def async_set_superuser() -> None:
                 return set_superuser()
             user.is_superuser = True
             session.commit()
+            invalidate_other_processes()
             print_success("User is now a superuser")
         case _:
             print_error("Invalid choice")
@@ -94,6 +106,43 @@ async def async_set_superuser() -> None:
         await UserFGA.create_relationships(fga_client, cast(int, user.id), "superuser")
 
 
+@app.command()
+def import_users(path: str, import_format: Optional[str] = None) -> None:
+    """
+    Create the users of a CSV or NDJSON file, holding the fields of UserCreate
+    """
+    asyncio.run(
+        async_import_users(
+            path, cast(ImportFormat, import_format or get_import_format(path))
+        )
+    )
+
+
+async def async_import_users(path: str, import_format: ImportFormat) -> None:
+    print_info(f"Importing users from {path}...")
+    config = get_fga_client_config()
+    try:
+        async with AsyncSession(get_engine()) as session, OpenFgaClient(
+            config
+        ) as fga_client:
+            importer = UserImporter(session, fga_client, search_clients.user)
+            with open(path, "rb") as file:
+                report = await importer.import_rows(read_user_rows(file, import_format))
+    finally:
+        await dispose_engine()
+    print_success(
+        f"{report.created} users created, {report.skipped} already registered"
+    )
+    for error in report.errors:
+        print_error(f"Line {error.line}: {error.message}")
+    if report.invalid > len(report.errors):
+        print_error(f"... and {report.invalid - len(report.errors)} more invalid rows")
+
+
+def ask_import_users() -> None:
+    import_users(Prompt.ask("Path of the CSV or NDJSON file"))
+
+
 @app.command()
 def i(allow_back: bool = False) -> None:
     """
@@ -103,6 +152,7 @@ def i(allow_back: bool = False) -> None:
         [
             Option(index=1, description="Create a superuser", func=create_superuser),
             Option(index=2, description="Set a user as superuser", func=set_superuser),
+            Option(index=3, description="Import users", func=ask_import_users),
         ],
         allow_back=allow_back,
     )
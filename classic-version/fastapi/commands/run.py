@@ -4,7 +4,7 @@ import typer
 from dotenv import load_dotenv
 
 from .processes import run_apps
-from .search_commands.update import update_indexes_if_needed
+from .search import update as update_search_indexes
 from .docker import up, migrate_db
 from .authz import (
     setup_store,
@@ -19,7 +19,7 @@ def run(up_services: bool = True, host: str = "0.0.0.0", port: int = 8000) -> No
     if up_services:
         up()
     migrate_db()
-    update_indexes_if_needed()
+    update_search_indexes()
     load_dotenv(override=True)
     if is_first_time():
         setup_store()
@@ -0,0 +1,59 @@
+import typer
+
+from app.common.deps.search import search_clients, setup_search_indexes
+
+from .options import Option, handle_options
+from .print import print_info, print_success
+from .search_commands.seeds import seed_search_index
+from .search_commands.update import update_indexes_if_needed
+
+app = typer.Typer()
+
+
+@app.command()
+def setup_indexes() -> None:
+    """
+    Create the search indexes and update their settings
+    """
+    print_info("Setting up the search indexes...")
+    setup_search_indexes()
+    print_success("Search indexes are up to date")
+
+
+@app.command()
+def seed(restart: bool = False) -> None:
+    """
+    Seed every search index from the database, resuming an interrupted seed
+    unless restart is set
+    """
+    for client in search_clients.all():
+        seed_search_index(type(client), restart)
+
+
+@app.command()
+def update() -> None:
+    """
+    Sync the search indexes with the database, only sending what differs
+    """
+    # The reconciler filters on the ids, the settings must be up to date first
+    setup_indexes()
+    update_indexes_if_needed()
+
+
+@app.command()
+def i(allow_back: bool = False) -> None:
+    """
+    Interactive mode
+    """
+    handle_options(
+        [
+            Option(index=1, description="Setup indexes", func=setup_indexes),
+            Option(index=2, description="Seed indexes", func=seed),
+            Option(index=3, description="Update indexes", func=update),
+        ],
+        allow_back=allow_back,
+    )
+
+
+if __name__ == "__main__":
+    app()
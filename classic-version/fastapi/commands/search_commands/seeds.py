@@ -1,27 +1,159 @@
-from typing import Sequence, Type, cast
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Optional, Sequence, Tuple, Type
 
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.sync_db import engine
+from app.core.config import settings
+from app.core.db import dispose_engine, get_engine
 
 from app.common.search import MeiliSearchBaseClass, ModelT
+from app.common.search_client import async_meili_search_client
+from app.common.search_tasks import async_wait_for_task
 from app.user.models import User
 from app.user.search import UserSearch
 
 from commands.utils import import_all_models
-from commands.print import print_info, print_success
+from commands.print import print_default, print_info, print_success, print_warning
 
 import_all_models()
 
 search_model_map = {UserSearch.index_name: User}
 
+ABSOLUTE_PATH = os.path.dirname(os.path.abspath(__file__))
+CHECKPOINT_FOLDER = os.path.join(ABSOLUTE_PATH, "..", "..")
 
-def seed_search_index(search_class: Type[MeiliSearchBaseClass[ModelT]]) -> None:
+
+class SearchSeedError(Exception):
+    pass
+
+
+class SeedCheckpoint:
+    """
+    Highest id whose document, and every document before it, is indexed.
+    Kept in a file until the index is fully seeded.
+    """
+
+    def __init__(self, index_name: str) -> None:
+        self.path = os.path.join(CHECKPOINT_FOLDER, f".search_seed_{index_name}")
+
+    def load(self) -> Optional[int]:
+        if not os.path.isfile(self.path):
+            return None
+        with open(self.path, "r", encoding="utf-8") as file:
+            content = file.read().strip()
+        return int(content) if content else None
+
+    def save(self, last_id: int) -> None:
+        # Written aside then moved, a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(str(last_id))
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if os.path.isfile(self.path):
+            os.remove(self.path)
+
+
+class SearchIndexSeeder:
+    """
+    Streams the table in id order through a server-side cursor, `chunk_size`
+    rows at a time, and uploads each chunk as its own Meilisearch task with at
+    most `max_parallel_uploads` in flight. Memory stays bounded by the chunks
+    in flight whatever the size of the table.
+    The checkpoint only moves past a chunk once it and all the chunks before it
+    are indexed, so a resumed seed never leaves a hole. Uploads are upserts,
+    re-sending the chunks that were in flight on a failure is harmless.
+    """
+
+    def __init__(
+        self,
+        search: MeiliSearchBaseClass[ModelT],
+        model: Type[ModelT],
+        checkpoint: SeedCheckpoint,
+        chunk_size: int = settings.MEILI_SEED_CHUNK_SIZE,
+        max_parallel_uploads: int = settings.MEILI_SEED_MAX_PARALLEL_UPLOADS,
+    ) -> None:
+        self.search = search
+        self.model = model
+        self.checkpoint = checkpoint
+        self.chunk_size = chunk_size
+        self.max_parallel_uploads = max_parallel_uploads
+        self.seeded = 0
+
+    async def upload(self, chunk: Sequence[ModelT]) -> None:
+        # Encoded while it is sent, only the entities wait in memory
+        task_info = await async_meili_search_client.add_ndjson_documents(
+            self.search.index_name, self.search.stream_ndjson_body(chunk)
+        )
+        # Waits whatever MEILI_WAIT_FOR_TASKS, the checkpoint needs the outcome
+        task = await async_wait_for_task(task_info.task_uid)
+        if task.status != "succeeded":
+            raise SearchSeedError(
+                f"Task {task.uid} of {self.search.index_name} {task.status}: {task.error}"
+            )
+
+    async def complete_oldest(
+        self, in_flight: Deque[Tuple[int, int, "asyncio.Task[None]"]]
+    ) -> None:
+        last_id, size, upload = in_flight.popleft()
+        await upload
+        self.seeded += size
+        self.checkpoint.save(last_id)
+        print_default(f"{self.seeded} documents seeded, up to id {last_id}")
+
+    async def seed(self, session: AsyncSession, after: Optional[int] = None) -> int:
+        stmt = (
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=self.chunk_size)
+        )
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        in_flight: Deque[Tuple[int, int, "asyncio.Task[None]"]] = deque()
+        try:
+            result = await session.stream_scalars(stmt)
+            async for chunk in result.partitions():
+                last_id = chunk[-1].id
+                upload = asyncio.create_task(self.upload(chunk))
+                in_flight.append((last_id, len(chunk), upload))
+                if len(in_flight) >= self.max_parallel_uploads:
+                    await self.complete_oldest(in_flight)
+            while in_flight:
+                await self.complete_oldest(in_flight)
+        finally:
+            for _, _, upload in in_flight:
+                upload.cancel()
+        return self.seeded
+
+
+async def async_seed_search_index(
+    search_class: Type[MeiliSearchBaseClass[ModelT]], restart: bool = False
+) -> None:
+    search = search_class()
+    checkpoint = SeedCheckpoint(search.index_name)
+    if restart:
+        checkpoint.clear()
+    after = checkpoint.load()
+    if after is not None:
+        print_warning(f"Resuming after id {after}, pass --restart to start over")
+    seeder = SearchIndexSeeder(search, search_model_map[search.index_name], checkpoint)
+    try:
+        async with AsyncSession(get_engine()) as session:
+            await seeder.seed(session, after)
+    finally:
+        await dispose_engine()
+        await async_meili_search_client.close()
+    checkpoint.clear()
+
+
+def seed_search_index(
+    search_class: Type[MeiliSearchBaseClass[ModelT]], restart: bool = False
+) -> None:
     print_info(f"Seeding {search_class.index_name} index")
-    model_ = search_model_map[search_class.index_name]
-    with Session(engine) as session:
-        statement = select(model_)
-        documents = cast(Sequence[ModelT], session.exec(statement).all())
-        if len(documents) > 0:
-            search_class().add_documents(documents)
+    search_class().setup_index()
+    asyncio.run(async_seed_search_index(search_class, restart))
     print_success(f"{search_class.index_name} index seeded successfully")
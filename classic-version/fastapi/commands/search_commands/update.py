@@ -1,32 +1,161 @@
-from sqlalchemy import func
-from sqlmodel import Session, select
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
 
-from app.core.sync_db import engine
+from meilisearch.models.task import TaskInfo
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import dispose_engine, get_engine
+from app.common.deps.search import search_clients
+from app.common.search import MeiliSearchBaseClass, ModelT
+from app.common.search_client import async_meili_search_client
+from app.common.search_tasks import async_wait_for_task
 from app.user.search import UserSearch
 from app.user.models import User
 from commands.utils import import_all_models
-from app.common.search import meili_search_client
-from commands.print import print_success, print_warning
+from commands.print import print_default, print_success, print_warning
 
 import_all_models()
 
 index_model_map = {UserSearch.index_name: User}
 
-index_name_search_map = {
-    UserSearch.index_name: UserSearch,
-}
+
+class SearchReconcileError(Exception):
+    pass
+
+
+@dataclass
+class ReconcileReport:
+    unchanged: int = 0
+    upserted: int = 0
+    deleted: int = 0
+
+
+class IndexReconciler:
+    """
+    Brings an index in line with its table without ever emptying it.
+    Both sides are walked in the same id ranges of `chunk_size` rows: the
+    documents the table would produce are compared with the indexed ones, and
+    only the missing or changed ones are upserted, and the ones whose row is
+    gone are deleted. An index in sync costs reads only.
+    """
+
+    def __init__(
+        self,
+        search: MeiliSearchBaseClass[ModelT],
+        model: Type[ModelT],
+        chunk_size: int = settings.MEILI_SEED_CHUNK_SIZE,
+    ) -> None:
+        self.search = search
+        self.model = model
+        self.chunk_size = chunk_size
+        self.report = ReconcileReport()
+        self.task_infos: List[TaskInfo] = []
+
+    async def fetch_indexed_documents(
+        self, after: Optional[int], up_to: Optional[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Indexed documents with `after < id <= up_to`, bounds left out when None
+        """
+        filters = []
+        if after is not None:
+            filters.append(f"id > {after}")
+        if up_to is not None:
+            filters.append(f"id <= {up_to}")
+        documents: Dict[int, Dict[str, Any]] = {}
+        while True:
+            response = await async_meili_search_client.fetch_documents(
+                self.search.index_name,
+                filter_=filters,
+                limit=self.chunk_size,
+                offset=len(documents),
+            )
+            documents.update(
+                (document["id"], document) for document in response["results"]
+            )
+            if len(response["results"]) < self.chunk_size:
+                return documents
+
+    async def reconcile_range(
+        self, rows: List[ModelT], after: Optional[int], up_to: Optional[int]
+    ) -> None:
+        expected = {
+            document["id"]: document
+            for document in self.search.get_formatted_documents(rows)
+        }
+        indexed = await self.fetch_indexed_documents(after, up_to)
+        upserts = [
+            document
+            for id_, document in expected.items()
+            if indexed.get(id_) != document
+        ]
+        deletes = [id_ for id_ in indexed if id_ not in expected]
+        self.report.unchanged += len(expected) - len(upserts)
+        if upserts:
+            self.report.upserted += len(upserts)
+            self.task_infos.append(
+                await async_meili_search_client.add_documents(
+                    self.search.index_name, upserts
+                )
+            )
+        if deletes:
+            self.report.deleted += len(deletes)
+            self.task_infos.append(
+                await async_meili_search_client.delete_documents(
+                    self.search.index_name, deletes
+                )
+            )
+
+    async def wait_for_writes(self) -> None:
+        tasks = await asyncio.gather(
+            *(async_wait_for_task(task_info.task_uid) for task_info in self.task_infos)
+        )
+        for task in tasks:
+            if task.status != "succeeded":
+                raise SearchReconcileError(
+                    f"Task {task.uid} of {self.search.index_name} {task.status}: {task.error}"
+                )
+
+    async def reconcile(self, session: AsyncSession) -> ReconcileReport:
+        after: Optional[int] = None
+        while True:
+            stmt = select(self.model).order_by(self.model.id).limit(self.chunk_size)
+            if after is not None:
+                stmt = stmt.where(self.model.id > after)
+            rows = list((await session.exec(stmt)).all())
+            # The last range is left open to catch documents past the last row
+            up_to = rows[-1].id if len(rows) == self.chunk_size else None
+            await self.reconcile_range(rows, after, up_to)
+            session.expunge_all()
+            if up_to is None:
+                break
+            after = up_to
+        await self.wait_for_writes()
+        return self.report
+
+
+async def async_update_indexes_if_needed() -> None:
+    try:
+        async with AsyncSession(get_engine()) as session:
+            for search in search_clients.all():
+                reconciler = IndexReconciler(search, index_model_map[search.index_name])
+                report = await reconciler.reconcile(session)
+                if report.upserted or report.deleted:
+                    print_warning(
+                        f"{search.index_name} index: {report.upserted} documents "
+                        f"upserted, {report.deleted} deleted"
+                    )
+                print_default(
+                    f"{search.index_name} index: {report.unchanged} documents up to date"
+                )
+    finally:
+        await dispose_engine()
+        await async_meili_search_client.close()
+    print_success("Search indexes are in sync with the database")
 
 
 def update_indexes_if_needed() -> None:
-    stats = meili_search_client.get_all_stats()
-    with Session(engine) as session:
-        for index_name, index_value in stats["indexes"].items():
-            number_of_documents = index_value["numberOfDocuments"]
-            model_ = index_model_map[index_name]
-            stmt = select(func.count()).select_from(model_)
-            number_of_model_documents = session.exec(stmt).first()
-            if number_of_documents != number_of_model_documents:
-                print_warning(f"Updating {index_name} index")
-                meili_search_client.index(index_name).delete()
-                # seed_search_index(index_name_search_map[index_name])
-                print_success(f"{index_name} index updated")
+    asyncio.run(async_update_indexes_if_needed())
@@ -0,0 +1,58 @@
+import pytest
+from starlette.requests import Request
+
+from app.auth import deps
+from app.auth.deps import get_current_user
+from app.auth.exceptions import InvalidTokenException
+from app.auth.utils.auth import create_access_token
+from app.user.models import User
+
+
+def new_request() -> Request:
+    return Request({"type": "http", "headers": []})
+
+
+@pytest.fixture
+def token_lookups(monkeypatch):
+    get_user_from_token = deps.get_user_from_token
+    lookups = []
+
+    async def count_lookups(session, token):
+        lookups.append(token)
+        return await get_user_from_token(session, token)
+
+    monkeypatch.setattr(deps, "get_user_from_token", count_lookups)
+    return lookups
+
+
+class TestGetCurrentUser:
+    async def test_user_is_looked_up_once_per_request(
+        self, session, factory, token_lookups
+    ):
+        user = await factory(User)
+        user_id = user.id
+        token = create_access_token({"email": user.email})
+        request = new_request()
+
+        first = await get_current_user(request=request, token=token, session=session)
+        second = await get_current_user(request=request, token=token, session=session)
+
+        assert first is second
+        assert first.id == user_id
+        assert len(token_lookups) == 1
+
+        await get_current_user(request=new_request(), token=token, session=session)
+        assert len(token_lookups) == 2
+
+    async def test_invalid_token_is_looked_up_once_per_request(
+        self, session, token_lookups
+    ):
+        request = new_request()
+
+        for _ in range(2):
+            with pytest.raises(InvalidTokenException):
+                await get_current_user(
+                    request=request, token="not-a-token", session=session
+                )
+
+        assert token_lookups == ["not-a-token"]
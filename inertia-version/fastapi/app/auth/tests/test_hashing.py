@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.auth.utils.hashing import PasswordHashingPool, hash_password, verify_password
+
+
+class ConcurrencyProbe:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def work(self, value: int) -> int:
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.02)
+        with self.lock:
+            self.running -= 1
+        return value
+
+
+@pytest.fixture
+def pool():
+    pool_ = PasswordHashingPool(executor_type="thread", max_workers=2)
+    yield pool_
+    pool_.shutdown()
+
+
+class TestPasswordHashingPool:
+    async def test_runs_at_most_max_workers_calls_at_once(self, pool):
+        probe = ConcurrencyProbe()
+
+        results = await asyncio.gather(*(pool.run(probe.work, i) for i in range(6)))
+
+        assert results == list(range(6))
+        assert probe.max_running == 2
+        assert pool.max_queued >= 4
+        stats = pool.get_stats()
+        assert stats["queued"] == 0
+        assert stats["running"] == 0
+
+    async def test_does_not_block_the_event_loop(self, pool):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker = asyncio.create_task(tick())
+        try:
+            await pool.run(time.sleep, 0.05)
+        finally:
+            ticker.cancel()
+
+        assert ticks > 5
+
+    async def test_hash_password_is_verified(self):
+        hashed_password = await hash_password("strong@Sass139")
+
+        assert await verify_password("strong@Sass139", hashed_password)
+        assert not await verify_password("wrong@Sass139", hashed_password)
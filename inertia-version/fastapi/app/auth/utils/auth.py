@@ -1,12 +1,13 @@
 from fastapi.responses import Response
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, TypeVar, Union, cast
+from typing import Any, Dict, Optional, TypeVar, Union, cast
 
-import bcrypt
 from jose import jwt
 from jose.exceptions import JWTError
 
 from app.auth.exceptions import InvalidTokenException
+from app.auth.utils.password_policy import PasswordHashPolicy, password_policy
+from app.auth.utils.tokens import token_verifier
 from app.core.config import settings
 
 
@@ -27,23 +28,30 @@ def get_token_content(token: str) -> Dict[str, Any]:
     """
     Decode a JWT token or raise JWTError
     """
-    return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    return token_verifier.verify(token)
 
 
-def get_password_hash(password: str) -> str:
+def is_well_formed_jwt(token: str) -> bool:
     """
-    Encodes a password and returns its hash
+    Whether the token is shaped like a JWT, its signature is not verified
     """
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return token_verifier.is_well_formed(token)
+
+
+def get_password_hash(
+    password: str, policy: Optional[PasswordHashPolicy] = None
+) -> str:
+    """
+    Encodes a password with the password policy and returns its hash
+    """
+    return (policy or password_policy).hash(password)
 
 
 def verify_password_against_hash(password: str, hashed_password: str) -> bool:
     """
     Returns a boolean indicating if the password matches the hashed password
     """
-    return bcrypt.checkpw(
-        password=password.encode(), hashed_password=hashed_password.encode()
-    )
+    return PasswordHashPolicy.verify(password, hashed_password)
 
 
 def generate_password_reset_token(email: str) -> str:
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from app.auth.utils.auth import get_password_hash, verify_password_against_hash
+from app.auth.utils.password_policy import password_policy
+from app.common.metrics import LatencyStats
+from app.core.config import settings
+
+ResultT = TypeVar("ResultT")
+
+
+class PasswordHashingPool:
+    """
+    Runs bcrypt outside of the event loop, on at most `max_workers` threads or
+    processes. Extra calls wait in line without blocking the loop, so a login storm
+    slows logins down instead of freezing every other request of the worker.
+    bcrypt releases the GIL, so threads are usually enough.
+    """
+
+    def __init__(
+        self,
+        executor_type: str = settings.PASSWORD_HASHING_EXECUTOR,
+        max_workers: int = settings.PASSWORD_HASHING_MAX_WORKERS,
+    ) -> None:
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.wait_stats = LatencyStats()
+        self.run_stats = LatencyStats()
+        self.queued = 0
+        self.max_queued = 0
+        self.running = 0
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_type == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hashing"
+                )
+        return self._executor
+
+    def get_semaphore(self) -> asyncio.Semaphore:
+        # A semaphore is bound to the event loop it was first awaited on
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., ResultT], *args: Any) -> ResultT:
+        semaphore = self.get_semaphore()
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await semaphore.acquire()
+        finally:
+            self.queued -= 1
+        started_at = time.perf_counter()
+        self.wait_stats.record(started_at - queued_at)
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.get_executor(), func, *args)
+        finally:
+            self.running -= 1
+            self.run_stats.record(time.perf_counter() - started_at)
+            semaphore.release()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "running": self.running,
+            "wait": self.wait_stats.as_dict(),
+            "run": self.run_stats.as_dict(),
+        }
+
+
+password_hashing_pool = PasswordHashingPool()
+
+
+async def hash_password(password: str) -> str:
+    # The policy is passed along as process workers do not see it being tuned
+    return await password_hashing_pool.run(get_password_hash, password, password_policy)
+
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await password_hashing_pool.run(
+        verify_password_against_hash, password, hashed_password
+    )
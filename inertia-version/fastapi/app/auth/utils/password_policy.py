@@ -0,0 +1,157 @@
+import base64
+import hashlib
+import hmac
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+import bcrypt
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+SCRYPT_PREFIX = "$scrypt$"
+SCRYPT_SALT_BYTES = 16
+SCRYPT_KEY_BYTES = 32
+# Tuning never goes below these, whatever the host
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+MIN_SCRYPT_LOG_N = 14
+MAX_SCRYPT_LOG_N = 20
+BENCHMARK_PASSWORD = "benchmark_Password91"
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.b64encode(value).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.b64decode(value + "=" * (-len(value) % 4))
+
+
+def _scrypt(password: str, salt: bytes, log_n: int, r: int, p: int) -> bytes:
+    n = 2**log_n
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=256 * n * r * p,
+        dklen=SCRYPT_KEY_BYTES,
+    )
+
+
+def parse_scrypt_hash(hashed_password: str) -> Tuple[int, int, int, bytes, bytes]:
+    """
+    Splits `$scrypt$ln=14,r=8,p=1$<salt>$<key>` in (log_n, r, p, salt, key)
+    """
+    _, _, params, salt, key = hashed_password.split("$")
+    values = dict(param.split("=") for param in params.split(","))
+    return (
+        int(values["ln"]),
+        int(values["r"]),
+        int(values["p"]),
+        _b64decode(salt),
+        _b64decode(key),
+    )
+
+
+@dataclass
+class PasswordHashPolicy:
+    """
+    How new password hashes are made. Hashes made with another scheme or
+    parameters still verify, `needs_rehash` tells when to upgrade them.
+    Each cost step (bcrypt rounds, scrypt log N) doubles the time of a hash.
+    """
+
+    scheme: str = settings.PASSWORD_HASH_SCHEME
+    bcrypt_rounds: int = settings.PASSWORD_BCRYPT_ROUNDS
+    scrypt_log_n: int = settings.PASSWORD_SCRYPT_LOG_N
+    scrypt_r: int = settings.PASSWORD_SCRYPT_R
+    scrypt_p: int = settings.PASSWORD_SCRYPT_P
+
+    def hash(self, password: str) -> str:
+        if self.scheme == "scrypt":
+            salt = os.urandom(SCRYPT_SALT_BYTES)
+            key = _scrypt(
+                password, salt, self.scrypt_log_n, self.scrypt_r, self.scrypt_p
+            )
+            params = f"ln={self.scrypt_log_n},r={self.scrypt_r},p={self.scrypt_p}"
+            return f"{SCRYPT_PREFIX}{params}${_b64encode(salt)}${_b64encode(key)}"
+        salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
+        return bcrypt.hashpw(password.encode(), salt).decode()
+
+    @staticmethod
+    def verify(password: str, hashed_password: str) -> bool:
+        if hashed_password.startswith(SCRYPT_PREFIX):
+            log_n, r, p, salt, key = parse_scrypt_hash(hashed_password)
+            return hmac.compare_digest(_scrypt(password, salt, log_n, r, p), key)
+        return bcrypt.checkpw(
+            password=password.encode(), hashed_password=hashed_password.encode()
+        )
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        if self.scheme == "scrypt":
+            if not hashed_password.startswith(SCRYPT_PREFIX):
+                return True
+            log_n, r, p, _, _ = parse_scrypt_hash(hashed_password)
+            return (log_n, r, p) != (self.scrypt_log_n, self.scrypt_r, self.scrypt_p)
+        if not hashed_password.startswith(BCRYPT_PREFIXES):
+            return True
+        # $2b$12$<salt and hash>
+        return int(hashed_password[4:6]) != self.bcrypt_rounds
+
+    def benchmark(self) -> float:
+        """
+        Seconds one hash takes on this host with the current parameters
+        """
+        start = time.perf_counter()
+        self.hash(BENCHMARK_PASSWORD)
+        return time.perf_counter() - start
+
+    def tune(self, target_seconds: float) -> float:
+        """
+        Moves the cost to the value whose hash time is the closest to
+        `target_seconds` on this host, within safe bounds, and returns that time
+        """
+        seconds = self.benchmark()
+        steps = round(math.log2(target_seconds / seconds))
+        if steps == 0:
+            return seconds
+        if self.scheme == "scrypt":
+            self.scrypt_log_n = min(
+                max(self.scrypt_log_n + steps, MIN_SCRYPT_LOG_N), MAX_SCRYPT_LOG_N
+            )
+        else:
+            self.bcrypt_rounds = min(
+                max(self.bcrypt_rounds + steps, MIN_BCRYPT_ROUNDS), MAX_BCRYPT_ROUNDS
+            )
+        return self.benchmark()
+
+    def describe(self) -> str:
+        if self.scheme == "scrypt":
+            return f"scrypt ln={self.scrypt_log_n},r={self.scrypt_r},p={self.scrypt_p}"
+        return f"bcrypt rounds={self.bcrypt_rounds}"
+
+
+password_policy = PasswordHashPolicy()
+
+
+def tune_password_policy(target_seconds: float) -> None:
+    """
+    Benchmarks the policy on this host at startup. Each login costs one hash of
+    CPU, so the target bounds how many logins a worker can take per second.
+    """
+    seconds = password_policy.tune(target_seconds)
+    logger.info(
+        f"Password hashing uses {password_policy.describe()}, "
+        f"{seconds * 1000:.0f}ms per hash on this host "
+        f"(target {target_seconds * 1000:.0f}ms, "
+        f"~{settings.PASSWORD_HASHING_MAX_WORKERS / seconds:.0f} logins/s per process)"
+    )
@@ -0,0 +1,126 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from app.core.config import settings
+
+HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+class JWTVerifier:
+    """
+    Verifies the HMAC signed JWTs we issue, user access tokens and admin
+    session tokens alike. The HMAC key is prepared once, and verified payloads
+    are kept in a bounded LRU until their `exp`, so a token seen again only
+    costs a dict lookup. Accepts the same tokens as `jose.jwt.decode` with our
+    algorithm, and raises the same JWTError subclasses.
+    """
+
+    def __init__(
+        self,
+        secret_key: str = settings.SECRET_KEY,
+        algorithm: str = settings.ALGORITHM,
+        max_size: int = settings.JWT_CACHE_MAX_SIZE,
+    ) -> None:
+        if algorithm not in HMAC_DIGESTS:
+            raise ValueError(f"Unsupported JWT algorithm {algorithm}")
+        self.algorithm = algorithm
+        self.max_size = max_size
+        # Holds the padded key, every verification starts from a copy of it
+        self._hmac = hmac.new(secret_key.encode(), digestmod=HMAC_DIGESTS[algorithm])
+        # token -> (payload, exp)
+        self.entries: OrderedDict[str, Tuple[Dict[str, Any], Optional[float]]] = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        entry = self.entries.get(token)
+        if entry is not None:
+            payload, exp = entry
+            if exp is None or exp >= time.time():
+                self.entries.move_to_end(token)
+                self.hits += 1
+                return dict(payload)
+            del self.entries[token]
+        self.misses += 1
+        payload = self._verify(token)
+        exp = payload.get("exp")
+        if self.max_size > 0:
+            self.entries[token] = (payload, exp)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return dict(payload)
+
+    def is_well_formed(self, token: str) -> bool:
+        """
+        Whether the token is shaped like a JWT, its signature is not verified
+        """
+        if token in self.entries:
+            return True
+        try:
+            header_segment, _, _ = token.split(".")
+            return isinstance(json.loads(_b64decode(header_segment)), dict)
+        except (ValueError, TypeError, UnicodeError):
+            return False
+
+    def _verify(self, token: str) -> Dict[str, Any]:
+        try:
+            signing_input, signature = token.rsplit(".", 1)
+            header_segment, payload_segment = signing_input.split(".")
+            header = json.loads(_b64decode(header_segment))
+            expected = self._hmac.copy()
+            expected.update(signing_input.encode())
+            is_valid = hmac.compare_digest(expected.digest(), _b64decode(signature))
+        except (ValueError, TypeError, UnicodeError) as exc:
+            raise JWTError("Invalid token") from exc
+        if not isinstance(header, dict) or header.get("alg") != self.algorithm:
+            raise JWTError("The specified alg value is not allowed")
+        if not is_valid:
+            raise JWTError("Signature verification failed.")
+        try:
+            payload = json.loads(_b64decode(payload_segment))
+        except (ValueError, TypeError, UnicodeError) as exc:
+            raise JWTError("Invalid payload string") from exc
+        if not isinstance(payload, dict):
+            raise JWTError("Invalid payload string: must be a json object")
+        self._validate_claims(payload)
+        return payload
+
+    @staticmethod
+    def _validate_claims(payload: Dict[str, Any]) -> None:
+        now = time.time()
+        for claim in ("exp", "nbf", "iat"):
+            if claim in payload and (
+                isinstance(payload[claim], bool)
+                or not isinstance(payload[claim], (int, float))
+            ):
+                raise JWTClaimsError(f"{claim} claim must be a number.")
+        if "nbf" in payload and payload["nbf"] > now:
+            raise JWTClaimsError("The token is not yet valid (nbf)")
+        if "exp" in payload and payload["exp"] < now:
+            raise ExpiredSignatureError("Signature has expired.")
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+token_verifier = JWTVerifier()
@@ -1,5 +1,7 @@
-from typing import Annotated, AsyncGenerator
 import os
+import time
+from typing import Annotated, Optional, Tuple
+
 from fastapi import Depends
 from openfga_sdk import ClientConfiguration, OpenFgaClient
 
@@ -12,7 +14,7 @@ AUTHORIZATION_MODEL_ID_FILE = os.path.join(
 STORE_ID_FILE = os.path.join(ABSOLUTE_PATH, "..", "..", ".fga_store_id")
 
 
-def get_fga_config() -> ClientConfiguration:
+def ensure_fga_id_files() -> None:
     if not os.path.isfile(AUTHORIZATION_MODEL_ID_FILE):
         with open(AUTHORIZATION_MODEL_ID_FILE, "w", encoding="utf-8") as file:
             file.write("")
@@ -20,23 +22,92 @@ def get_fga_config() -> ClientConfiguration:
         with open(STORE_ID_FILE, "w", encoding="utf-8") as file:
             file.write("")
 
-    authorization_model_id = open(AUTHORIZATION_MODEL_ID_FILE).read().strip()
-    store_id = open(STORE_ID_FILE).read().strip()
 
-    return ClientConfiguration(
+def read_fga_ids() -> Tuple[str, str]:
+    """
+    Returns the (store_id, authorization_model_id) written by the authz commands
+    """
+    ensure_fga_id_files()
+    with open(STORE_ID_FILE, encoding="utf-8") as file:
+        store_id = file.read().strip()
+    with open(AUTHORIZATION_MODEL_ID_FILE, encoding="utf-8") as file:
+        authorization_model_id = file.read().strip()
+    return store_id, authorization_model_id
+
+
+def get_fga_ids_signature() -> Tuple[float, float]:
+    ensure_fga_id_files()
+    return (
+        os.path.getmtime(STORE_ID_FILE),
+        os.path.getmtime(AUTHORIZATION_MODEL_ID_FILE),
+    )
+
+
+def get_fga_config() -> ClientConfiguration:
+    store_id, authorization_model_id = read_fga_ids()
+
+    config = ClientConfiguration(
         api_scheme=settings.FGA_API_SCHEME,
         api_host=f"{settings.FGA_API_HOST}:{settings.FGA_API_PORT}",
         store_id=store_id,
         authorization_model_id=authorization_model_id,
     )
+    # Max number of keep-alive connections held by the client's HTTP session
+    config.connection_pool_maxsize = settings.FGA_CONNECTION_POOL_MAXSIZE
+    return config
+
+
+class SharedFGAClient:
+    """
+    App-scoped OpenFGA client, opened in the app lifespan and reused by every
+    request so they all share the same HTTP session.
+    The store and model ids are re-read when their files change on disk.
+    """
+
+    def __init__(self) -> None:
+        self.client: Optional[OpenFgaClient] = None
+        self._ids_signature: Optional[Tuple[float, float]] = None
+        self._last_ids_check = 0.0
+
+    async def open(self) -> OpenFgaClient:
+        if self.client is None:
+            self._ids_signature = get_fga_ids_signature()
+            self._last_ids_check = time.monotonic()
+            self.client = OpenFgaClient(get_fga_config())
+        return self.client
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
+    def reload_ids(self) -> None:
+        if self.client is None:
+            return
+        self._ids_signature = get_fga_ids_signature()
+        store_id, authorization_model_id = read_fga_ids()
+        self.client.set_store_id(store_id)
+        self.client.set_authorization_model_id(authorization_model_id)
+
+    def reload_ids_if_changed(self) -> None:
+        now = time.monotonic()
+        if now - self._last_ids_check < settings.FGA_IDS_RELOAD_INTERVAL_SECONDS:
+            return
+        self._last_ids_check = now
+        if get_fga_ids_signature() != self._ids_signature:
+            self.reload_ids()
+
+    async def get(self) -> OpenFgaClient:
+        client = await self.open()
+        self.reload_ids_if_changed()
+        return client
+
 
+shared_fga_client = SharedFGAClient()
 
-async def get_fga_client() -> AsyncGenerator[OpenFgaClient, None]:
-    config = get_fga_config()
-    async with OpenFgaClient(config) as client:
-        yield client
 
-        await client.close()
+async def get_fga_client() -> OpenFgaClient:
+    return await shared_fga_client.get()
 
 
 FGAClientDep = Depends(get_fga_client)
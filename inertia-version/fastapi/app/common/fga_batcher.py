@@ -0,0 +1,269 @@
+import asyncio
+import functools
+import logging
+import time
+import weakref
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Literal, Optional, Set, Tuple
+
+from openfga_sdk import OpenFgaClient
+from openfga_sdk.client.models.tuple import ClientTuple
+from openfga_sdk.client.models.write_request import ClientWriteRequest
+from openfga_sdk.exceptions import ValidationException
+
+from app.common.metrics import LatencyStats
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TupleOperation = Literal["write", "delete"]
+TupleKey = Tuple[TupleOperation, str, str, str]
+OPPOSITE_OPERATIONS: Dict[TupleOperation, TupleOperation] = {
+    "write": "delete",
+    "delete": "write",
+}
+
+
+class FGAWriteCancelledError(Exception):
+    """
+    The batch holding the tuples was dropped before being written, e.g. at shutdown
+    """
+
+
+def get_tuple_key(operation: TupleOperation, tuple_: ClientTuple) -> TupleKey:
+    return operation, tuple_.user, tuple_.relation, tuple_.object
+
+
+class FGAWriteBatch:
+    """
+    Tuples of several callers, written together in one transaction.
+    Every caller waits on its own future, resolved once its tuples are written.
+    """
+
+    def __init__(self, max_tuples: int) -> None:
+        self.max_tuples = max_tuples
+        self.tuples: Dict[TupleKey, ClientTuple] = {}
+        self.entries: List[Tuple[List[TupleKey], "asyncio.Future[None]"]] = []
+        self.is_full = asyncio.Event()
+
+    def accepts(self, keys: List[TupleKey]) -> bool:
+        """
+        OpenFGA rejects a write holding the same tuple in both `writes` and `deletes`,
+        those go in the next batch so the order of the calls is kept.
+        """
+        new_keys = {key for key in keys if key not in self.tuples}
+        if len(self.tuples) + len(new_keys) > self.max_tuples:
+            return False
+        return not any(
+            (OPPOSITE_OPERATIONS[operation], *rest) in self.tuples
+            for operation, *rest in keys
+        )
+
+    def add(
+        self, tuples: Dict[TupleKey, ClientTuple], future: "asyncio.Future[None]"
+    ) -> None:
+        self.tuples.update(tuples)
+        self.entries.append((list(tuples), future))
+        if len(self.tuples) >= self.max_tuples:
+            self.is_full.set()
+
+    def get_write_request(self, keys: Iterable[TupleKey]) -> ClientWriteRequest:
+        writes = [self.tuples[key] for key in keys if key[0] == "write"]
+        deletes = [self.tuples[key] for key in keys if key[0] == "delete"]
+        return ClientWriteRequest(writes=writes or None, deletes=deletes or None)
+
+    def resolve(self, error: Optional[Exception] = None) -> None:
+        """
+        Resolves the futures not resolved yet with the outcome of the batch
+        """
+        for _, future in self.entries:
+            resolve_future(future, error)
+
+
+def resolve_future(future: "asyncio.Future[None]", error: Optional[Exception]) -> None:
+    # The caller may have been cancelled meanwhile
+    if future.done():
+        return
+    if error is None:
+        future.set_result(None)
+    else:
+        future.set_exception(error)
+
+
+class FGAWriteBatcher:
+    """
+    Merges the tuples written by concurrent callers into a few large writes.
+    A batch is sent once it holds `max_tuples` tuples, OpenFGA's per request
+    limit, or `max_delay` seconds after it was opened, whichever comes first.
+    When OpenFGA rejects a batch, e.g. a tuple already exists, the tuples of each
+    caller are retried as one write, so only the callers owning the faulty tuples
+    get the error and each call stays atomic.
+    """
+
+    def __init__(
+        self,
+        fga_client: OpenFgaClient,
+        max_tuples: int = settings.FGA_MAX_TUPLES_PER_WRITE,
+        max_delay: float = settings.FGA_WRITE_BATCH_MAX_DELAY_SECONDS,
+    ) -> None:
+        self.fga_client = fga_client
+        self.max_tuples = max_tuples
+        self.max_delay = max_delay
+        self.batches: Deque[FGAWriteBatch] = deque()
+        self.write_stats = LatencyStats()
+        self.written_tuples_count = 0
+        self.fallback_count = 0
+        self._lock = asyncio.Lock()
+        self._flush_tasks: Set["asyncio.Task[None]"] = set()
+
+    def _get_open_batch(self, keys: List[TupleKey]) -> FGAWriteBatch:
+        if self.batches and self.batches[-1].accepts(keys):
+            return self.batches[-1]
+        if self.batches:
+            self.batches[-1].is_full.set()
+        batch = FGAWriteBatch(self.max_tuples)
+        self.batches.append(batch)
+        task = asyncio.create_task(self._flush_later(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(functools.partial(self._on_flush_done, batch))
+        return batch
+
+    async def write(
+        self,
+        writes: Optional[List[ClientTuple]] = None,
+        deletes: Optional[List[ClientTuple]] = None,
+    ) -> None:
+        tuples = {get_tuple_key("write", tuple_): tuple_ for tuple_ in writes or []}
+        tuples.update(
+            {get_tuple_key("delete", tuple_): tuple_ for tuple_ in deletes or []}
+        )
+        if len(tuples) > self.max_tuples:
+            # OpenFGA rejects it as one transaction, whether batched or not
+            await write_tuples_in_chunks(
+                self.fga_client, writes, deletes, self.max_tuples
+            )
+            return
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._get_open_batch(list(tuples)).add(tuples, future)
+        await future
+
+    def _on_flush_done(self, batch: FGAWriteBatch, task: "asyncio.Task[None]") -> None:
+        self._flush_tasks.discard(task)
+        # Cancelled, e.g. at shutdown, before the batch was written: its callers
+        # would otherwise wait forever
+        if task.cancelled() and batch in self.batches:
+            self.batches.remove(batch)
+            batch.resolve(FGAWriteCancelledError("The write batch was cancelled"))
+
+    async def _flush_later(self, batch: FGAWriteBatch) -> None:
+        try:
+            await asyncio.wait_for(batch.is_full.wait(), self.max_delay)
+        except asyncio.TimeoutError:
+            pass
+        async with self._lock:
+            # Older batches go first
+            while batch in self.batches:
+                writing = self.batches.popleft()
+                try:
+                    await self._write_batch(writing)
+                except asyncio.CancelledError:
+                    writing.resolve(
+                        FGAWriteCancelledError("The write batch was cancelled")
+                    )
+                    raise
+
+    async def _write_batch(self, batch: FGAWriteBatch) -> None:
+        start = time.perf_counter()
+        try:
+            await self.fga_client.write(batch.get_write_request(batch.tuples))
+        except ValidationException:
+            self.fallback_count += 1
+            await self._write_each_entry(batch)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            batch.resolve(exc)
+        else:
+            self.written_tuples_count += len(batch.tuples)
+            batch.resolve()
+        finally:
+            self.write_stats.record(time.perf_counter() - start)
+
+    async def _write_each_entry(self, batch: FGAWriteBatch) -> None:
+        for keys, future in batch.entries:
+            try:
+                await self.fga_client.write(batch.get_write_request(keys))
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                logger.warning(f"Could not write {len(keys)} tuples: {exc}")
+                resolve_future(future, exc)
+            else:
+                self.written_tuples_count += len(keys)
+                resolve_future(future, None)
+
+
+async def write_tuples_in_chunks(
+    fga_client: OpenFgaClient,
+    writes: Optional[List[ClientTuple]] = None,
+    deletes: Optional[List[ClientTuple]] = None,
+    max_tuples: int = settings.FGA_MAX_TUPLES_PER_WRITE,
+) -> None:
+    """
+    OpenFGA rejects writes of more than `max_tuples` tuples, larger writes are sent
+    as several transactions, FGA_MAX_PARALLEL_WRITES at a time. Each chunk is atomic,
+    the whole write is not.
+    A tuple both written and deleted has its delete moved to a later chunk, as
+    OpenFGA rejects a write holding both, and the chunks are then sent one after
+    another so they are applied in order.
+    """
+    operations: List[Tuple[TupleOperation, ClientTuple]] = [
+        ("write", tuple_) for tuple_ in writes or []
+    ]
+    operations.extend(("delete", tuple_) for tuple_ in deletes or [])
+    semaphore = asyncio.Semaphore(settings.FGA_MAX_PARALLEL_WRITES)
+
+    async def write_chunk(chunk: List[Tuple[TupleOperation, ClientTuple]]) -> None:
+        chunk_writes = [tuple_ for operation, tuple_ in chunk if operation == "write"]
+        chunk_deletes = [tuple_ for operation, tuple_ in chunk if operation == "delete"]
+        async with semaphore:
+            await fga_client.write(
+                ClientWriteRequest(
+                    writes=chunk_writes or None, deletes=chunk_deletes or None
+                )
+            )
+
+    chunks: List[List[Tuple[TupleOperation, ClientTuple]]] = []
+    chunk_keys: Set[TupleKey] = set()
+    for operation, tuple_ in operations:
+        opposite_key = get_tuple_key(OPPOSITE_OPERATIONS[operation], tuple_)
+        if not chunks or len(chunks[-1]) >= max_tuples or opposite_key in chunk_keys:
+            chunks.append([])
+            chunk_keys = set()
+        chunks[-1].append((operation, tuple_))
+        chunk_keys.add(get_tuple_key(operation, tuple_))
+    written = {get_tuple_key("write", tuple_)[1:] for tuple_ in writes or []}
+    deleted = {get_tuple_key("delete", tuple_)[1:] for tuple_ in deletes or []}
+    if written.isdisjoint(deleted):
+        await asyncio.gather(*(write_chunk(chunk) for chunk in chunks))
+        return
+    for chunk in chunks:
+        await write_chunk(chunk)
+
+
+fga_write_batchers: "weakref.WeakKeyDictionary[OpenFgaClient, FGAWriteBatcher]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_fga_write_batcher(fga_client: OpenFgaClient) -> FGAWriteBatcher:
+    if fga_client not in fga_write_batchers:
+        fga_write_batchers[fga_client] = FGAWriteBatcher(fga_client)
+    return fga_write_batchers[fga_client]
+
+
+async def write_tuples(
+    fga_client: OpenFgaClient,
+    writes: Optional[List[ClientTuple]] = None,
+    deletes: Optional[List[ClientTuple]] = None,
+) -> None:
+    if not settings.FGA_WRITE_BATCHING_ENABLED:
+        await write_tuples_in_chunks(fga_client, writes, deletes)
+        return
+    await get_fga_write_batcher(fga_client).write(writes, deletes)
@@ -1,11 +1,27 @@
-from typing import Any, Dict, Generic, Type, TypeAlias, TypeVar, Union, cast
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeAlias,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from pydantic import BaseModel
+from sqlalchemy import delete, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.common.deps.common import StructuredCommonDeps
-from app.common.exceptions import NotFoundException
+from app.common.exceptions import BadRequestException, NotFoundException
+from app.common.pagination import InvalidCursorException, decode_cursor, encode_cursor
 
 ModelT = TypeVar("ModelT", bound=Any)
 CreateSchemaT = TypeVar("CreateSchemaT", bound=BaseModel)
@@ -22,8 +38,29 @@ def get_dict_from_obj_in_update(
     return obj_in.model_dump(exclude_unset=True)
 
 
+def get_python_type(column: Any) -> type:
+    # Type decorators such as sqlmodel's AutoString only know their impl's type
+    return cast(type, getattr(column.type, "impl_instance", column.type).python_type)
+
+
+def is_value_of_column_type(column: Any, value: Any) -> bool:
+    python_type = get_python_type(column)
+    # bool is a subclass of int, but true is no id
+    if isinstance(value, bool) and python_type is not bool:
+        return False
+    return isinstance(value, python_type)
+
+
+def with_returned_rows_loaded(stmt: Any) -> Any:
+    # Entities already in the session would otherwise keep their stale attributes
+    return stmt.execution_options(populate_existing=True)
+
+
 class BaseRepo(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
     model: Type[ModelT]
+    # Columns `list` can order by, each needs an index on (column, id), or on
+    # the column alone when it is unique
+    sortable_fields: Tuple[str, ...] = ("id",)
 
     def __init__(self, model: Type[ModelT]):
         self.model = model
@@ -51,6 +88,65 @@ class BaseRepo(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
         Callback after entity update. Useful for updating search indexes.
         """
 
+    async def callback_create_many(
+        self, db_objs: List[ModelT], *, deps: StructuredCommonDeps
+    ) -> None:
+        """
+        Callback after `create_many`. Override it to batch the side effects,
+        the default runs `callback_create` for each entity.
+        """
+        for db_obj in db_objs:
+            await self.callback_create(db_obj, deps=deps)
+
+    async def callback_update_many(
+        self, db_objs: List[ModelT], *, deps: StructuredCommonDeps
+    ) -> None:
+        """
+        Callback after `update_many`, runs `callback_update` for each entity by default
+        """
+        for db_obj in db_objs:
+            await self.callback_update(db_obj, deps=deps)
+
+    async def callback_delete_many(
+        self, db_objs: List[ModelT], *, deps: StructuredCommonDeps
+    ) -> None:
+        """
+        Callback after `remove_many`, runs `callback_delete` for each entity by default
+        """
+        for db_obj in db_objs:
+            await self.callback_delete(db_obj, deps=deps)
+
+    @staticmethod
+    async def commit(session: AsyncSession) -> None:
+        """
+        Commits without expiring the loaded entities. The ones written with a
+        RETURNING clause are up to date, refreshing them would cost a SELECT each.
+        """
+        sync_session = session.sync_session
+        expire_on_commit = sync_session.expire_on_commit
+        sync_session.expire_on_commit = False
+        try:
+            await session.commit()
+        except Exception as exc:
+            await session.rollback()
+            raise exc
+        finally:
+            sync_session.expire_on_commit = expire_on_commit
+
+    async def exec_returning_one(self, session: AsyncSession, stmt: Any) -> ModelT:
+        """
+        Runs an INSERT, UPDATE or DELETE returning the entity it wrote
+        """
+        try:
+            result = await session.exec(with_returned_rows_loaded(stmt))
+            db_obj = result.scalars().one_or_none()
+        except Exception as exc:
+            await session.rollback()
+            raise exc
+        if db_obj is None:
+            raise NotFoundException(self.model.__name__.lower())
+        return cast(ModelT, db_obj)
+
     async def get(self, session: AsyncSession, id_: Any) -> ModelT:
         stmt = select(self.model).where(self.model.id == id_)
         res = await session.exec(stmt)
@@ -59,21 +155,80 @@ class BaseRepo(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
             raise NotFoundException(self.model.__name__.lower())
         return db_obj
 
+    async def list(
+        self,
+        session: AsyncSession,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        descending: bool = False,
+    ) -> Tuple[List[ModelT], Optional[str]]:
+        """
+        Keyset pagination: the page starts right after the cursor's row through
+        the index, so every page costs the same whatever its depth.
+        Returns the page and the cursor of the next one, None on the last page.
+        """
+        if order_by not in self.sortable_fields:
+            raise BadRequestException(
+                target="pagination", additional_info="invalid_order_by"
+            )
+        column = self.model.__table__.c[order_by]
+        # Rows with the same value are ordered by id
+        keys = (
+            [column] if column.unique or column.primary_key else [column, self.model.id]
+        )
+        stmt = select(self.model)
+        if cursor is not None:
+            payload = decode_cursor(cursor)
+            values = payload.get("after")
+            if (
+                payload.get("order_by") != order_by
+                or payload.get("descending") != descending
+                or not isinstance(values, list)
+                or len(values) != len(keys)
+                or not all(
+                    is_value_of_column_type(key, value)
+                    for key, value in zip(keys, values)
+                )
+            ):
+                raise InvalidCursorException()
+            position = tuple_(*keys)
+            stmt = stmt.where(
+                position < tuple_(*values) if descending else position > tuple_(*values)
+            )
+        stmt = stmt.order_by(*(key.desc() if descending else key for key in keys))
+        db_objs = list((await session.exec(stmt.limit(limit + 1))).all())
+        if len(db_objs) <= limit:
+            return db_objs, None
+        db_objs = db_objs[:limit]
+        next_cursor = encode_cursor(
+            {
+                "order_by": order_by,
+                "descending": descending,
+                "after": [getattr(db_objs[-1], key.key) for key in keys],
+            }
+        )
+        return db_objs, next_cursor
+
     async def create(
         self,
         deps: StructuredCommonDeps,
         *,
         obj_in: CreateSchemaT,
     ) -> ModelT:
-        db_obj = cast(ModelT, self.model(**obj_in.model_dump()))
+        return await self.insert_one(deps, obj_in.model_dump())
+
+    async def insert_one(
+        self, deps: StructuredCommonDeps, values: Dict[str, Any]
+    ) -> ModelT:
+        """
+        A single INSERT ... RETURNING, the entity needs no refresh afterwards
+        """
         session = deps.session
-        session.add(db_obj)
-        try:
-            await session.commit()
-        except Exception as exc:
-            await session.rollback()
-            raise exc
-        await session.refresh(db_obj)
+        stmt = insert(self.model).values(**values).returning(self.model)
+        db_obj = await self.exec_returning_one(session, stmt)
+        await self.commit(session)
         await self.callback_create(db_obj, deps=deps)
         return db_obj
 
@@ -84,19 +239,26 @@ class BaseRepo(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
         id_: int,
         obj_in: UpdateSchemaOrDict[UpdateSchemaT],
     ) -> ModelT:
-        update_data = get_dict_from_obj_in_update(obj_in)
+        """
+        A single UPDATE ... WHERE id = ... RETURNING, the row is not loaded first
+        """
+        update_data = {
+            field: value
+            for field, value in get_dict_from_obj_in_update(obj_in).items()
+            if hasattr(self.model, field)
+        }
         session = deps.session
-        db_obj = await self.get(session, id_)
-        for field in update_data:
-            if hasattr(db_obj, field):
-                setattr(db_obj, field, update_data[field])
-        session.add(db_obj)
-        try:
-            await session.commit()
-        except Exception as exc:
-            await session.rollback()
-            raise exc
-        await session.refresh(db_obj)
+        if not update_data:
+            db_obj = await self.get(session, id_)
+        else:
+            stmt = (
+                update(self.model)
+                .where(self.model.id == id_)
+                .values(**update_data)
+                .returning(self.model)
+            )
+            db_obj = await self.exec_returning_one(session, stmt)
+            await self.commit(session)
         await self.callback_update(db_obj, deps=deps)
         return db_obj
 
@@ -107,11 +269,140 @@ class BaseRepo(Generic[ModelT, CreateSchemaT, UpdateSchemaT]):
         id_: int,
     ) -> None:
         session = deps.session
-        obj = await self.get(session, id_)
-        await session.delete(obj)
+        stmt = delete(self.model).where(self.model.id == id_).returning(self.model)
+        obj = await self.exec_returning_one(session, stmt)
+        await self.commit(session)
+        # The deleted row would otherwise stay in the identity map
+        session.expunge(obj)
+        await self.callback_delete(obj, deps=deps)
+
+    async def create_many(
+        self,
+        deps: StructuredCommonDeps,
+        *,
+        objs_in: Sequence[CreateSchemaT],
+    ) -> List[ModelT]:
+        """
+        Creates every entity in one transaction, the entities are returned in order
+        """
+        return await self.insert_many(deps, [obj_in.model_dump() for obj_in in objs_in])
+
+    async def insert_many(
+        self, deps: StructuredCommonDeps, values: List[Dict[str, Any]]
+    ) -> List[ModelT]:
+        if not values:
+            return []
+        db_objs = await self.exec_insert_many(deps.session, values)
+        await self.callback_create_many(db_objs, deps=deps)
+        return db_objs
+
+    async def exec_insert_many(
+        self,
+        session: AsyncSession,
+        values: List[Dict[str, Any]],
+        on_conflict_do_nothing: Optional[Sequence[str]] = None,
+    ) -> List[ModelT]:
+        """
+        Inserts every row with a single INSERT ... RETURNING and commits, without
+        any callback. The rows conflicting on the `on_conflict_do_nothing` columns
+        are skipped, the entities are then not returned in the order of `values`.
+        """
+        if on_conflict_do_nothing is None:
+            stmt = insert(self.model).returning(
+                self.model, sort_by_parameter_order=True
+            )
+        else:
+            stmt = (
+                insert(self.model)
+                .on_conflict_do_nothing(index_elements=on_conflict_do_nothing)
+                .returning(self.model)
+            )
         try:
-            await session.commit()
-            await self.callback_delete(obj, deps=deps)
+            result = await session.exec(stmt, params=values)  # type: ignore[call-overload]
+            db_objs = cast(List[ModelT], list(result.scalars()))
+        except Exception as exc:
+            await session.rollback()
+            raise exc
+        await self.commit(session)
+        return db_objs
+
+    async def update_many(
+        self,
+        deps: StructuredCommonDeps,
+        *,
+        ids: Sequence[int],
+        obj_in: UpdateSchemaOrDict[UpdateSchemaT],
+    ) -> List[ModelT]:
+        """
+        Applies the same changes to every entity with a single UPDATE, and returns
+        them in the order of `ids`. Nothing is updated if one of them does not exist.
+        """
+        update_data = {
+            field: value
+            for field, value in get_dict_from_obj_in_update(obj_in).items()
+            if hasattr(self.model, field)
+        }
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        if not update_data:
+            stmt = select(self.model).where(self.model.id.in_(ids))
+            db_objs = list((await deps.session.exec(stmt)).all())
+            self._raise_if_missing(ids, db_objs)
+            return self._sort_by_ids(ids, db_objs)
+        stmt_update = (
+            update(self.model)
+            .where(self.model.id.in_(ids))
+            .values(**update_data)
+            .returning(self.model)
+        )
+        db_objs = await self._exec_returning(deps.session, stmt_update, ids)
+        await self.commit(deps.session)
+        await self.callback_update_many(db_objs, deps=deps)
+        return db_objs
+
+    async def remove_many(
+        self,
+        deps: StructuredCommonDeps,
+        *,
+        ids: Sequence[int],
+    ) -> List[ModelT]:
+        """
+        Deletes every entity with a single DELETE and returns them in the order of
+        `ids`. Nothing is deleted if one of them does not exist.
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        stmt = delete(self.model).where(self.model.id.in_(ids)).returning(self.model)
+        db_objs = await self._exec_returning(deps.session, stmt, ids)
+        await self.commit(deps.session)
+        for db_obj in db_objs:
+            deps.session.expunge(db_obj)
+        await self.callback_delete_many(db_objs, deps=deps)
+        return db_objs
+
+    async def _exec_returning(
+        self, session: AsyncSession, stmt: Any, ids: List[int]
+    ) -> List[ModelT]:
+        try:
+            result = await session.exec(with_returned_rows_loaded(stmt))
+            db_objs = cast(List[ModelT], list(result.scalars()))
+            self._raise_if_missing(ids, db_objs)
         except Exception as exc:
             await session.rollback()
             raise exc
+        return self._sort_by_ids(ids, db_objs)
+
+    @staticmethod
+    def _sort_by_ids(ids: List[int], db_objs: List[ModelT]) -> List[ModelT]:
+        # RETURNING and IN give no order guarantee
+        positions = {id_: position for position, id_ in enumerate(ids)}
+        return sorted(db_objs, key=lambda db_obj: positions[db_obj.id])
+
+    def _raise_if_missing(self, ids: List[int], db_objs: Sequence[ModelT]) -> None:
+        missing_ids = set(ids) - {db_obj.id for db_obj in db_objs}
+        if missing_ids:
+            raise NotFoundException(
+                self.model.__name__.lower(), ids=sorted(missing_ids)
+            )
@@ -1,13 +1,17 @@
-import json
-import time
 from typing import (
     Any,
+    AsyncIterable,
+    AsyncIterator,
+    Collection,
     Dict,
     Generic,
     List,
     Optional,
+    Tuple,
+    Type,
     TypedDict,
     TypeVar,
+    Union,
     cast,
     Iterable,
 )
@@ -15,13 +19,28 @@ from typing import (
 import meilisearch
 from meilisearch.errors import MeilisearchApiError
 from meilisearch.index import Index
-from meilisearch.models.task import Task
+from meilisearch.models.task import Task, TaskInfo
+from pydantic import BaseModel
 
+from app.common.pagination import InvalidCursorException, decode_cursor, encode_cursor
+from app.common.search_buffer import SearchWriteBuffer
+from app.common.search_cache import search_result_cache
+from app.common.search_documents import DocumentProjection, get_document_projection
+from app.common.search_client import async_meili_search_client
+from app.common.search_tasks import (
+    async_wait_for_task,
+    search_task_reconciler,
+    wait_for_task,
+)
 from app.core.config import settings
 
 meili_search_client = meilisearch.Client(settings.MEILI_URL, settings.MEILI_MASTER_KEY)
 ModelT = TypeVar("ModelT", bound=Any)
 
+# Meilisearch's default rules: a `sort` only breaks the ties left by the relevancy
+# rules, so it orders every hit of an empty query and keeps a query's relevancy
+DEFAULT_RANKING_RULES = ["words", "typo", "proximity", "attribute", "sort", "exactness"]
+
 
 class SearchResultT(TypedDict):
     hits: List[Dict[str, Any]]
@@ -34,87 +53,267 @@ class SearchResultT(TypedDict):
 
 class MeiliSearchBaseClass(Generic[ModelT]):
     index: Index
+    write_buffer: SearchWriteBuffer
     index_name: str = ""
     sortable_attributes: List[str] = []
     filterable_attributes: List[str] = []
+    ranking_rules: List[str] = DEFAULT_RANKING_RULES
+    # Unique, filterable and sortable numeric attribute the search cursors seek on
+    cursor_attribute: str = "id"
+    # Whitelist of the indexed fields, every field of the entities when None
+    document_model: Optional[Type[BaseModel]] = None
+    projection: Optional[DocumentProjection] = None
+    wait_for_tasks: bool = settings.MEILI_WAIT_FOR_TASKS
 
     def __init__(self, index_name: Optional[str] = None) -> None:
+        """
+        Cheap, does not call Meilisearch. Indexes are provisioned by `setup_index`,
+        at startup or through `poe cmd search setup-indexes`.
+        """
         if index_name:
             self.index_name = index_name
-        try:
-            self.create_index()
-        except MeilisearchApiError:
-            pass
-        self.index = meili_search_client.get_index(self.index_name)
-
-        if self.index.get_filterable_attributes() != self.filterable_attributes:
-            self.index.update_filterable_attributes(self.filterable_attributes)
-        if self.index.get_sortable_attributes() != self.sortable_attributes:
-            self.index.update_sortable_attributes(self.sortable_attributes)
+        self.index = meili_search_client.index(self.index_name)
+        if self.document_model is not None:
+            self.projection = get_document_projection(self.document_model)
+        self.write_buffer = SearchWriteBuffer(self.index_name, self.handle_task)
 
     def create_index(self) -> None:
         task_info = meili_search_client.create_index(
             self.index_name, {"primaryKey": "id"}
         )
-        task_uid = task_info.task_uid
-        status = task_info.status
+        wait_for_task(self.get_task, task_info.task_uid)
 
-        while status in ["enqueued", "processing"]:
-            time.sleep(0.01)
-            task = self.get_task(task_uid)
-            status = task.status
+    def get_settings_to_update(self) -> Dict[str, List[str]]:
+        current_settings = self.index.get_settings()
+        expected_settings = {
+            "filterableAttributes": self.filterable_attributes,
+            "sortableAttributes": self.sortable_attributes,
+        }
+        settings_to_update = {
+            key: value
+            for key, value in expected_settings.items()
+            if sorted(current_settings.get(key, [])) != sorted(value)
+        }
+        # The order of the ranking rules matters
+        if current_settings.get("rankingRules") != self.ranking_rules:
+            settings_to_update["rankingRules"] = self.ranking_rules
+        return settings_to_update
+
+    def setup_index(self) -> None:
+        """
+        Creates the index if needed and reconciles its settings. Blocking.
+        """
+        try:
+            self.create_index()
+        except MeilisearchApiError:
+            pass
+
+        settings_to_update = self.get_settings_to_update()
+        if settings_to_update:
+            task_info = self.index.update_settings(settings_to_update)
+            wait_for_task(self.get_task, task_info.task_uid)
+        # The index may have been recreated with other documents or settings
+        search_result_cache.bump(self.index_name)
 
     @staticmethod
     def get_task(task_id: int) -> Task:
         return meili_search_client.get_task(task_id)
 
-    @staticmethod
-    def get_formatted_documents(objs_in: Iterable[ModelT]) -> List[Dict[str, Any]]:
-        return [json.loads(obj_in.model_dump_json()) for obj_in in objs_in]
+    def get_formatted_documents(
+        self, objs_in: Iterable[ModelT]
+    ) -> List[Dict[str, Any]]:
+        if self.projection is None:
+            return [obj_in.model_dump(mode="json") for obj_in in objs_in]
+        return [self.projection.to_document(obj_in) for obj_in in objs_in]
+
+    def get_ndjson_line(self, obj_in: ModelT) -> bytes:
+        if self.projection is None:
+            return cast(bytes, obj_in.model_dump_json().encode() + b"\n")
+        return self.projection.to_json(obj_in) + b"\n"
 
-    def search(
+    def get_ndjson_body(self, objs_in: Iterable[ModelT]) -> bytes:
+        """
+        One JSON document per line, what Meilisearch ingests the fastest
+        """
+        if self.projection is None:
+            return b"".join(self.get_ndjson_line(obj_in) for obj_in in objs_in)
+        return self.projection.to_ndjson(objs_in)
+
+    async def stream_ndjson_body(
+        self,
+        objs_in: Union[Iterable[ModelT], AsyncIterable[ModelT]],
+        piece_size: int = settings.MEILI_NDJSON_PIECE_BYTES,
+    ) -> AsyncIterator[bytes]:
+        """
+        The NDJSON body in pieces of about `piece_size` bytes, encoded as they
+        are sent. Only one piece is held at a time, whatever the number of
+        entities.
+        """
+        piece = bytearray()
+        if isinstance(objs_in, AsyncIterable):
+            async for obj_in in objs_in:
+                piece += self.get_ndjson_line(obj_in)
+                if len(piece) >= piece_size:
+                    yield bytes(piece)
+                    piece.clear()
+        else:
+            for obj_in in objs_in:
+                piece += self.get_ndjson_line(obj_in)
+                if len(piece) >= piece_size:
+                    yield bytes(piece)
+                    piece.clear()
+        if piece:
+            yield bytes(piece)
+
+    async def handle_task(self, task_info: TaskInfo) -> Union[Task, TaskInfo]:
+        """
+        Waits for the task, or hands it to the reconciler when we don't wait for writes
+        """
+        # Every write goes through here. Cached results are dropped once the
+        # write is sent, and again once it is applied, so that a search made
+        # while it was processing is not kept.
+        search_result_cache.bump(self.index_name)
+        if not self.wait_for_tasks:
+            search_task_reconciler.track(task_info)
+            return task_info
+        task = await async_wait_for_task(task_info.task_uid)
+        search_result_cache.bump(self.index_name)
+        return task
+
+    async def search(
         self, query: str, opts: Optional[Dict[str, Any]] = None
     ) -> SearchResultT:
         opts = opts or {}
-        return cast(SearchResultT, self.index.search(query, opts))
+        if not settings.MEILI_SEARCH_CACHE_ENABLED:
+            return cast(
+                SearchResultT,
+                await async_meili_search_client.search(self.index_name, query, opts),
+            )
+        result = search_result_cache.get(self.index_name, query, opts)
+        if result is None:
+            result = await async_meili_search_client.search(
+                self.index_name, query, opts
+            )
+            search_result_cache.set(self.index_name, query, opts, result)
+        return cast(SearchResultT, result)
 
-    def add_documents(self, entities: Iterable[ModelT]) -> Task:
-        documents = self.get_formatted_documents(entities)
-        task_info = self.index.add_documents(documents)
-        task_uid = task_info.task_uid
-        status = task_info.status
-        task = self.get_task(task_uid)
-
-        while status in ["enqueued", "processing"]:
-            time.sleep(0.01)
-            task = self.get_task(task_uid)
-            status = task.status
+    async def search_page(
+        self,
+        query: str,
+        *,
+        limit: int,
+        cursor: Optional[str] = None,
+        filters: Optional[List[str]] = None,
+        excluded_ids: Collection[Any] = (),
+        descending: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Without a query, keyset pagination: hits are sorted on `cursor_attribute`,
+        and the next page filters on the last hit's value instead of skipping an
+        offset. Every page costs the same whatever its depth, and pages go past
+        Meilisearch's `maxTotalHits`.
+        With a query, the hits keep their relevancy order, `cursor_attribute`
+        only breaks ties, so pages go by offset.
+        Returns the hits and the cursor of the next page, None on the last page.
+        `excluded_ids` are dropped from the hits rather than filtered by
+        Meilisearch, so callers excluding their own document share the cache.
+        """
+        filters = list(filters or [])
+        # A cursor of a search with a query holds an offset, not an id
+        position_key = "offset" if query else "after"
+        offset = 0
+        if cursor is not None:
+            payload = decode_cursor(cursor)
+            position = payload.get(position_key)
+            if (
+                payload.get("descending") != descending
+                or not isinstance(position, int)
+                or isinstance(position, bool)
+                or (query and position < 0)
+            ):
+                raise InvalidCursorException()
+            if query:
+                offset = position
+            else:
+                filters.append(
+                    f"{self.cursor_attribute} {'<' if descending else '>'} {position}"
+                )
+        direction = "desc" if descending else "asc"
+        opts = {
+            "filter": filters,
+            "sort": [f"{self.cursor_attribute}:{direction}"],
+            "offset": offset,
+            "limit": limit + len(excluded_ids) + 1,
+        }
+        # Each hit with its offset in the search, before `excluded_ids` are dropped
+        hits = [
+            (hit_offset, hit)
+            for hit_offset, hit in enumerate(
+                (await self.search(query, opts))["hits"], start=offset
+            )
+            if hit[self.cursor_attribute] not in excluded_ids
+        ]
+        if len(hits) <= limit:
+            return [hit for _, hit in hits], None
+        hits = hits[:limit]
+        last_offset, last_hit = hits[-1]
+        next_position = last_offset + 1 if query else last_hit[self.cursor_attribute]
+        next_cursor = encode_cursor(
+            {position_key: next_position, "descending": descending}
+        )
+        return [hit for _, hit in hits], next_cursor
 
-        return task
+    async def add_documents(self, entities: Iterable[ModelT]) -> Union[Task, TaskInfo]:
+        task_info = await async_meili_search_client.add_ndjson_documents(
+            self.index_name, self.get_ndjson_body(entities)
+        )
+        return await self.handle_task(task_info)
 
-    def update_documents(self, entities: Iterable[ModelT]) -> Task:
-        documents = self.get_formatted_documents(entities)
-        task_info = self.index.update_documents(documents)
-        task_uid = task_info.task_uid
-        status = task_info.status
-        task = self.get_task(task_uid)
+    async def add_documents_ndjson(
+        self, entities: Union[Iterable[ModelT], AsyncIterable[ModelT]]
+    ) -> Union[Task, TaskInfo]:
+        """
+        Streaming `add_documents` for large batches: the entities are encoded
+        while the request body goes out, it is never built whole in memory.
+        """
+        task_info = await async_meili_search_client.add_ndjson_documents(
+            self.index_name, self.stream_ndjson_body(entities)
+        )
+        return await self.handle_task(task_info)
 
-        while status in ["enqueued", "processing"]:
-            time.sleep(0.01)
-            task = self.get_task(task_uid)
-            status = task.status
+    async def update_documents(
+        self, entities: Iterable[ModelT]
+    ) -> Union[Task, TaskInfo]:
+        task_info = await async_meili_search_client.update_ndjson_documents(
+            self.index_name, self.get_ndjson_body(entities)
+        )
+        return await self.handle_task(task_info)
 
-        return task
+    async def delete_document(self, entity: ModelT) -> Union[Task, TaskInfo]:
+        task_info = await async_meili_search_client.delete_document(
+            self.index_name, entity.id
+        )
+        return await self.handle_task(task_info)
 
-    def delete_document(self, entity: ModelT) -> Task:
-        task_info = self.index.delete_document(entity.id)
-        task_uid = task_info.task_uid
-        status = task_info.status
-        task = self.get_task(task_uid)
+    async def delete_documents(
+        self, entities: Iterable[ModelT]
+    ) -> Union[Task, TaskInfo]:
+        task_info = await async_meili_search_client.delete_documents(
+            self.index_name, [entity.id for entity in entities]
+        )
+        return await self.handle_task(task_info)
 
-        while status in ["enqueued", "processing"]:
-            time.sleep(0.01)
-            task = self.get_task(task_uid)
-            status = task.status
+    async def queue_upserts(self, entities: Iterable[ModelT]) -> None:
+        """
+        Goes through the write buffer when it runs, writes right away otherwise
+        """
+        if not self.write_buffer.is_running:
+            await self.add_documents(entities)
+            return
+        self.write_buffer.upsert(self.get_formatted_documents(entities))
 
-        return task
+    async def queue_deletes(self, entities: Iterable[ModelT]) -> None:
+        if not self.write_buffer.is_running:
+            await self.delete_documents(entities)
+            return
+        self.write_buffer.delete(entity.id for entity in entities)
@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from meilisearch.models.task import Task, TaskInfo
+
+from app.common.metrics import LatencyStats
+from app.common.search_client import DocumentId, async_meili_search_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# `None` marks a pending deletion
+PendingWrites = Dict[DocumentId, Optional[Dict[str, Any]]]
+
+
+class SearchWriteBuffer:
+    """
+    Write-behind buffer for one index.
+    Writes to the same document are collapsed so only its latest version, or its
+    deletion, is sent. Pending writes are flushed with one `add_documents` and one
+    `delete_documents` call, as soon as `max_batch_size` documents are pending or
+    `flush_interval` seconds after the first pending write.
+    Batches that could not be sent are requeued, while the ones Meilisearch
+    rejected are counted as failed: sending them again would fail alike.
+    It only buffers once started, which the app lifespan does.
+    """
+
+    def __init__(
+        self,
+        index_name: str,
+        handle_task: Callable[[TaskInfo], Awaitable[Any]],
+        max_batch_size: int = settings.MEILI_WRITE_BUFFER_MAX_BATCH_SIZE,
+        flush_interval: float = settings.MEILI_WRITE_BUFFER_FLUSH_INTERVAL_SECONDS,
+    ) -> None:
+        self.index_name = index_name
+        self.handle_task = handle_task
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.pending: PendingWrites = {}
+        self.flush_stats = LatencyStats()
+        self.max_depth = 0
+        self.flushed_documents_count = 0
+        self.failed_documents_count = 0
+        self.failed_flushes_count = 0
+        self._has_pending = asyncio.Event()
+        self._is_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._runner: Optional[asyncio.Task[None]] = None
+
+    @property
+    def depth(self) -> int:
+        return len(self.pending)
+
+    @property
+    def is_running(self) -> bool:
+        return self._runner is not None
+
+    def _put(self, document_id: DocumentId, document: Optional[Dict[str, Any]]) -> None:
+        self.pending[document_id] = document
+        self.max_depth = max(self.max_depth, len(self.pending))
+        self._has_pending.set()
+        if len(self.pending) >= self.max_batch_size:
+            self._is_full.set()
+
+    def upsert(self, documents: Iterable[Dict[str, Any]]) -> None:
+        for document in documents:
+            self._put(document["id"], document)
+
+    def delete(self, document_ids: Iterable[DocumentId]) -> None:
+        for document_id in document_ids:
+            self._put(document_id, None)
+
+    def _requeue(self, batch: PendingWrites) -> None:
+        # Writes queued during the failed flush are newer, they win
+        for document_id, document in batch.items():
+            if document_id not in self.pending:
+                self._put(document_id, document)
+
+    async def _send(self, task_info: TaskInfo, documents_count: int) -> None:
+        task = await self.handle_task(task_info)
+        if isinstance(task, Task) and task.status != "succeeded":
+            self.failed_documents_count += documents_count
+            logger.error(
+                f"Flushing {documents_count} writes to {self.index_name} ended as "
+                f"{task.status}: {task.error}"
+            )
+            return
+        self.flushed_documents_count += documents_count
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, {}
+            self._has_pending.clear()
+            self._is_full.clear()
+            documents = [
+                document for document in batch.values() if document is not None
+            ]
+            deleted_ids = [id_ for id_, document in batch.items() if document is None]
+            start = time.perf_counter()
+            try:
+                if documents:
+                    await self._send(
+                        await async_meili_search_client.add_documents(
+                            self.index_name, documents
+                        ),
+                        len(documents),
+                    )
+                if deleted_ids:
+                    await self._send(
+                        await async_meili_search_client.delete_documents(
+                            self.index_name, deleted_ids
+                        ),
+                        len(deleted_ids),
+                    )
+            except BaseException:
+                self._requeue(batch)
+                raise
+            finally:
+                self.flush_stats.record(time.perf_counter() - start)
+
+    async def flush_or_log(self) -> None:
+        try:
+            await self.flush()
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.failed_flushes_count += 1
+            logger.exception(
+                f"Could not flush {self.depth} pending writes to {self.index_name}"
+            )
+
+    async def run(self) -> None:
+        while True:
+            await self._has_pending.wait()
+            try:
+                await asyncio.wait_for(self._is_full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush_or_log()
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        await self.flush_or_log()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "flushed_documents": self.flushed_documents_count,
+            "failed_documents": self.failed_documents_count,
+            "failed_flushes": self.failed_flushes_count,
+            "flush_latency": self.flush_stats.as_dict(),
+        }
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Iterator, List, Optional, Set
+
+from meilisearch.errors import MeilisearchTimeoutError
+from meilisearch.models.task import Task, TaskInfo
+
+from app.common.search_client import async_meili_search_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PENDING_TASK_STATUSES = ("enqueued", "processing")
+# Keeps the `uids` query string of a reconciliation request reasonably short
+RECONCILE_BATCH_SIZE = 500
+
+
+def is_task_pending(status: str) -> bool:
+    return status in PENDING_TASK_STATUSES
+
+
+@dataclass
+class TaskBackoff:
+    """
+    Exponential backoff used while polling a Meilisearch task.
+    Most writes on small indexes finish in a few milliseconds, so we start
+    polling fast and slow down for the long ones.
+    """
+
+    initial_delay: float = settings.MEILI_TASK_POLL_INITIAL_SECONDS
+    max_delay: float = settings.MEILI_TASK_POLL_MAX_SECONDS
+    factor: float = 2.0
+    timeout: float = settings.MEILI_TASK_TIMEOUT_SECONDS
+
+    def delays(self) -> Iterator[float]:
+        delay = self.initial_delay
+        elapsed = 0.0
+        while elapsed < self.timeout:
+            delay = min(delay, self.timeout - elapsed)
+            yield delay
+            elapsed += delay
+            delay = min(delay * self.factor, self.max_delay)
+
+
+def task_timeout_error(task_uid: int, backoff: TaskBackoff) -> MeilisearchTimeoutError:
+    return MeilisearchTimeoutError(
+        f"timeout of {backoff.timeout}s has exceeded while waiting for task {task_uid}"
+    )
+
+
+def wait_for_task(
+    get_task: Callable[[int], Task],
+    task_uid: int,
+    backoff: Optional[TaskBackoff] = None,
+) -> Task:
+    """
+    Blocks until the task is done. Only meant for the CLI and startup code.
+    """
+    backoff = backoff or TaskBackoff()
+    for delay in backoff.delays():
+        task = get_task(task_uid)
+        if not is_task_pending(task.status):
+            return task
+        time.sleep(delay)
+    task = get_task(task_uid)
+    if not is_task_pending(task.status):
+        return task
+    raise task_timeout_error(task_uid, backoff)
+
+
+async def async_wait_for_task(
+    task_uid: int, backoff: Optional[TaskBackoff] = None
+) -> Task:
+    backoff = backoff or TaskBackoff()
+    for delay in backoff.delays():
+        task = await async_meili_search_client.get_task(task_uid)
+        if not is_task_pending(task.status):
+            return task
+        await asyncio.sleep(delay)
+    task = await async_meili_search_client.get_task(task_uid)
+    if not is_task_pending(task.status):
+        return task
+    raise task_timeout_error(task_uid, backoff)
+
+
+class TaskReconciler:
+    """
+    Tracks tasks that were enqueued without waiting for them ("fire and forget"),
+    and checks all of them at once with a single `GET /tasks?uids=...` call.
+    Failed tasks are logged and kept in `failed_tasks` for inspection.
+    Tasks Meilisearch no longer knows about (e.g. pruned from its task queue)
+    are dropped, as their outcome can't be known anymore.
+    """
+
+    def __init__(self, max_failed_tasks: int = 100) -> None:
+        self.pending: Set[int] = set()
+        self.failed_tasks: Deque[Task] = deque(maxlen=max_failed_tasks)
+        self.succeeded_count = 0
+        self.failed_count = 0
+        self.missing_count = 0
+        self._runner: Optional[asyncio.Task[None]] = None
+
+    def track(self, task_info: TaskInfo) -> None:
+        self.pending.add(task_info.task_uid)
+
+    async def reconcile(self) -> List[Task]:
+        """
+        Checks the pending tasks in batches and returns the newly failed ones
+        """
+        uids = list(self.pending)
+        tasks: List[Task] = []
+        for start in range(0, len(uids), RECONCILE_BATCH_SIZE):
+            batch = uids[start : start + RECONCILE_BATCH_SIZE]
+            tasks.extend(await async_meili_search_client.get_tasks(batch))
+        missing_uids = set(uids).difference(task.uid for task in tasks)
+        if missing_uids:
+            self.pending.difference_update(missing_uids)
+            self.missing_count += len(missing_uids)
+            logger.warning(
+                f"Search tasks {sorted(missing_uids)} are unknown to Meilisearch, dropping them"
+            )
+        failed: List[Task] = []
+        for task in tasks:
+            if is_task_pending(task.status):
+                continue
+            self.pending.discard(task.uid)
+            if task.status == "succeeded":
+                self.succeeded_count += 1
+                continue
+            self.failed_count += 1
+            self.failed_tasks.append(task)
+            failed.append(task)
+            logger.error(
+                f"Search task {task.uid} on {task.index_uid} ended as {task.status}: {task.error}"
+            )
+        return failed
+
+    async def reconcile_or_log(self) -> None:
+        try:
+            await self.reconcile()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Could not reconcile search tasks")
+
+    async def run(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.reconcile_or_log()
+
+    def start(
+        self, interval: float = settings.MEILI_TASK_RECONCILE_INTERVAL_SECONDS
+    ) -> None:
+        if self._runner is None:
+            self._runner = asyncio.create_task(self.run(interval))
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+        await self.reconcile_or_log()
+
+
+search_task_reconciler = TaskReconciler()
@@ -0,0 +1,84 @@
+import logging
+
+import pytest
+
+from app.common.deps import search as search_deps
+from app.common.deps.search import setup_search_indexes_on_startup
+from app.common.search import DEFAULT_RANKING_RULES
+from app.common.test_utils.search import make_task, make_task_info
+from app.user.search import UserSearch
+
+INDEX_NAME = "test_setup_users"
+
+
+class FakeIndex:
+    def __init__(self, current_settings):
+        self.current_settings = current_settings
+        self.updates = []
+
+    def get_settings(self):
+        return self.current_settings
+
+    def update_settings(self, settings_to_update):
+        self.updates.append(settings_to_update)
+        return make_task_info(len(self.updates), INDEX_NAME)
+
+
+@pytest.fixture
+def user_search(monkeypatch):
+    search = UserSearch(index_name=INDEX_NAME)
+    monkeypatch.setattr(search, "create_index", lambda: None)
+    monkeypatch.setattr(search, "get_task", lambda uid: make_task(uid))
+    return search
+
+
+class TestSetupIndex:
+    def test_setup_index_updates_settings_that_differ(self, user_search):
+        user_search.index = FakeIndex(
+            {
+                "filterableAttributes": [],
+                "sortableAttributes": ["id"],
+                "rankingRules": DEFAULT_RANKING_RULES,
+            }
+        )
+
+        user_search.setup_index()
+
+        assert user_search.index.updates == [{"filterableAttributes": ["id"]}]
+
+    def test_setup_index_in_sync_sends_nothing(self, user_search):
+        user_search.index = FakeIndex(
+            {
+                "filterableAttributes": ["id"],
+                "sortableAttributes": ["id"],
+                "rankingRules": DEFAULT_RANKING_RULES,
+            }
+        )
+
+        user_search.setup_index()
+
+        assert user_search.index.updates == []
+
+
+class TestSetupSearchIndexesOnStartup:
+    async def test_every_index_is_set_up_once(self, monkeypatch):
+        calls = []
+        for client in search_deps.search_clients.all():
+            monkeypatch.setattr(
+                client, "setup_index", lambda name=client.index_name: calls.append(name)
+            )
+
+        await setup_search_indexes_on_startup()
+
+        assert calls == [UserSearch.index_name]
+
+    async def test_setup_failure_does_not_stop_startup(self, monkeypatch, caplog):
+        def fail():
+            raise ConnectionError("meilisearch is down")
+
+        monkeypatch.setattr(search_deps, "setup_search_indexes", fail)
+
+        with caplog.at_level(logging.ERROR, logger=search_deps.__name__):
+            await setup_search_indexes_on_startup()
+
+        assert "Could not set up the search indexes" in caplog.text
@@ -0,0 +1,183 @@
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+from sqlmodel import select
+
+from app.common.deps.common import StructuredCommonDeps
+from app.common.exceptions import NotFoundException
+from app.common.pagination import InvalidCursorException, encode_cursor
+from app.common.repository import BaseRepo
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.models import User
+
+
+class UserSeed(BaseModel):
+    email: str
+    username: str
+    hashed_password: str = "hashed_password"
+
+
+class RecordingRepo(BaseRepo[User, UserSeed, UserSeed]):
+    """
+    Records the entities handed to the callbacks, which BaseRepo leaves to subclasses
+    """
+
+    def __init__(self) -> None:
+        super().__init__(User)
+        self.created: List[User] = []
+        self.updated: List[User] = []
+        self.deleted: List[User] = []
+
+    async def callback_create(self, db_obj, *, deps):
+        self.created.append(db_obj)
+
+    async def callback_update(self, db_obj, *, deps):
+        self.updated.append(db_obj)
+
+    async def callback_delete(self, db_obj, *, deps):
+        self.deleted.append(db_obj)
+
+
+@pytest.fixture
+def deps(session, background_tasks, fga_client, search_clients):
+    return StructuredCommonDeps(
+        session=session,
+        tasks=background_tasks,
+        fga_client=fga_client,
+        search=search_clients,
+    )
+
+
+def new_seeds(count: int) -> List[UserSeed]:
+    return [
+        UserSeed(email=random_email(), username=random_lower_string())
+        for _ in range(count)
+    ]
+
+
+async def get_usernames(session, ids) -> List[str]:
+    stmt = select(User.username).where(User.id.in_(ids)).order_by(User.id)
+    return list((await session.exec(stmt)).all())
+
+
+class TestBaseRepoMany:
+    async def test_create_many_returns_entities_in_input_order(self, deps):
+        repo = RecordingRepo()
+        seeds = new_seeds(5)
+
+        db_objs = await repo.create_many(deps, objs_in=seeds)
+
+        assert [db_obj.email for db_obj in db_objs] == [seed.email for seed in seeds]
+        assert repo.created == db_objs
+
+    async def test_insert_many_returns_entities_in_input_order(self, deps):
+        repo = RecordingRepo()
+        values = [seed.model_dump() for seed in new_seeds(5)]
+
+        db_objs = await repo.insert_many(deps, values)
+
+        assert [db_obj.email for db_obj in db_objs] == [
+            value["email"] for value in values
+        ]
+        assert await repo.insert_many(deps, []) == []
+
+    async def test_exec_insert_many_skips_conflicts_without_callbacks(
+        self, deps, factory
+    ):
+        repo = RecordingRepo()
+        user = await factory(User)
+        values = [seed.model_dump() for seed in new_seeds(2)]
+        conflicting = {**values[0], "email": user.email}
+
+        db_objs = await repo.exec_insert_many(
+            deps.session, [conflicting, *values], on_conflict_do_nothing=["email"]
+        )
+
+        assert sorted(db_obj.email for db_obj in db_objs) == sorted(
+            value["email"] for value in values
+        )
+        assert repo.created == []
+
+    async def test_update_many_returns_entities_in_ids_order(self, deps):
+        repo = RecordingRepo()
+        db_objs = await repo.create_many(deps, objs_in=new_seeds(4))
+        ids = [db_obj.id for db_obj in reversed(db_objs)]
+
+        updated = await repo.update_many(deps, ids=ids, obj_in={"username": "same"})
+
+        assert [db_obj.id for db_obj in updated] == ids
+        assert repo.updated == updated
+        assert await get_usernames(deps.session, ids) == ["same"] * len(ids)
+
+    async def test_update_many_with_a_missing_id_updates_nothing(self, deps):
+        repo = RecordingRepo()
+        db_objs = await repo.create_many(deps, objs_in=new_seeds(2))
+        ids = [db_obj.id for db_obj in db_objs]
+        missing_id = max(ids) + 1000
+
+        with pytest.raises(NotFoundException) as exc_info:
+            await repo.update_many(
+                deps, ids=[*ids, missing_id], obj_in={"username": "updated"}
+            )
+
+        assert exc_info.value.ids == [missing_id]
+        assert repo.updated == []
+        assert "updated" not in await get_usernames(deps.session, ids)
+
+    async def test_remove_many_returns_entities_in_ids_order(self, deps):
+        repo = RecordingRepo()
+        db_objs = await repo.create_many(deps, objs_in=new_seeds(4))
+        ids = [db_obj.id for db_obj in reversed(db_objs)]
+
+        removed = await repo.remove_many(deps, ids=ids)
+
+        assert [db_obj.id for db_obj in removed] == ids
+        assert repo.deleted == removed
+        assert await get_usernames(deps.session, ids) == []
+        assert not any(db_obj in deps.session for db_obj in removed)
+
+    async def test_remove_many_with_a_missing_id_removes_nothing(self, deps):
+        repo = RecordingRepo()
+        db_objs = await repo.create_many(deps, objs_in=new_seeds(2))
+        ids = [db_obj.id for db_obj in db_objs]
+        missing_id = max(ids) + 1000
+
+        with pytest.raises(NotFoundException) as exc_info:
+            await repo.remove_many(deps, ids=[missing_id, *ids])
+
+        assert exc_info.value.ids == [missing_id]
+        assert repo.deleted == []
+
+
+class TestBaseRepoRemove:
+    async def test_removed_entity_leaves_the_session(self, deps):
+        repo = RecordingRepo()
+        db_obj = await repo.create(deps, obj_in=new_seeds(1)[0])
+        id_ = db_obj.id
+
+        await repo.remove(deps, id_=id_)
+
+        assert db_obj not in deps.session
+        assert await deps.session.get(User, id_) is None
+        with pytest.raises(NotFoundException):
+            await repo.get(deps.session, id_)
+
+
+class TestBaseRepoList:
+    async def test_next_cursor_is_accepted(self, deps):
+        repo = RecordingRepo()
+        await repo.create_many(deps, objs_in=new_seeds(3))
+
+        first_page, cursor = await repo.list(deps.session, limit=2)
+        second_page, _ = await repo.list(deps.session, limit=2, cursor=cursor)
+
+        assert first_page[-1].id < second_page[0].id
+
+    @pytest.mark.parametrize("after", [[True], [False], ["1"], [1.5]])
+    async def test_cursor_not_matching_the_column_type_is_rejected(self, deps, after):
+        repo = RecordingRepo()
+        cursor = encode_cursor({"order_by": "id", "descending": False, "after": after})
+
+        with pytest.raises(InvalidCursorException):
+            await repo.list(deps.session, limit=2, cursor=cursor)
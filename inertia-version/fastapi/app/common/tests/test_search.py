@@ -0,0 +1,163 @@
+import pytest
+
+from app.common.pagination import InvalidCursorException, encode_cursor
+
+from app.common.search import DEFAULT_RANKING_RULES, MeiliSearchBaseClass
+from app.common.test_utils.search import FakeSearchClient
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.models import User, UserOut
+from app.user.search import UserSearch
+
+INDEX_NAME = "test_stream_users"
+
+
+class UnprojectedSearch(MeiliSearchBaseClass[UserOut]):
+    index_name: str = "test_stream_unprojected"
+
+
+@pytest.fixture
+def meili(monkeypatch):
+    fake = FakeSearchClient()
+    fake.install(monkeypatch)
+    return fake
+
+
+def new_users(count: int):
+    return [
+        User(
+            id=user_id,
+            email=random_email(),
+            username=random_lower_string(),
+            hashed_password=random_lower_string(),
+        )
+        for user_id in range(1, count + 1)
+    ]
+
+
+async def as_async_iterable(items):
+    for item in items:
+        yield item
+
+
+async def collect(pieces):
+    return [piece async for piece in pieces]
+
+
+class TestStreamNdjsonBody:
+    @pytest.mark.parametrize("piece_size", [1, 200, 1024 * 1024])
+    async def test_pieces_join_to_body(self, piece_size):
+        search = UserSearch(index_name=INDEX_NAME)
+        users = new_users(10)
+
+        pieces = await collect(search.stream_ndjson_body(users, piece_size))
+
+        assert b"".join(pieces) == search.get_ndjson_body(users)
+        assert all(len(piece) >= piece_size for piece in pieces[:-1])
+
+    async def test_async_iterable_pieces_join_to_body(self):
+        search = UserSearch(index_name=INDEX_NAME)
+        users = new_users(10)
+
+        pieces = await collect(
+            search.stream_ndjson_body(as_async_iterable(users), piece_size=200)
+        )
+
+        assert len(pieces) > 1
+        assert b"".join(pieces) == search.get_ndjson_body(users)
+
+    async def test_pieces_join_to_body_without_projection(self):
+        search = UnprojectedSearch()
+        users = [UserOut.model_validate(user) for user in new_users(10)]
+
+        pieces = await collect(search.stream_ndjson_body(users, piece_size=200))
+
+        assert len(pieces) > 1
+        assert b"".join(pieces) == search.get_ndjson_body(users)
+
+    async def test_no_entities_no_pieces(self):
+        search = UserSearch(index_name=INDEX_NAME)
+
+        assert await collect(search.stream_ndjson_body([])) == []
+
+    async def test_streamed_documents_are_indexed(self, meili):
+        search = UserSearch(index_name=INDEX_NAME)
+        users = new_users(10)
+
+        await search.add_documents_ndjson(as_async_iterable(users))
+
+        assert meili.ndjson_bodies == [search.get_ndjson_body(users)]
+        assert meili.get_documents(INDEX_NAME) == search.get_formatted_documents(users)
+
+
+class RankedHits:
+    """
+    Serves `hits` in the given order, as Meilisearch ranks a query's hits by
+    relevancy before the sort, and records the options of each search
+    """
+
+    def __init__(self, ids):
+        self.hits = [{"id": id_} for id_ in ids]
+        self.opts = []
+
+    async def search(self, query, opts):
+        self.opts.append(opts)
+        offset, limit = opts["offset"], opts["limit"]
+        return {"hits": self.hits[offset : offset + limit]}
+
+
+async def collect_pages(search, query, limit, **kwargs):
+    ids, cursor = [], None
+    while True:
+        hits, cursor = await search.search_page(
+            query, limit=limit, cursor=cursor, **kwargs
+        )
+        ids.extend(hit["id"] for hit in hits)
+        if cursor is None:
+            return ids
+
+
+class TestSearchPage:
+    def test_sort_only_breaks_relevancy_ties(self):
+        assert DEFAULT_RANKING_RULES.index("sort") > max(
+            DEFAULT_RANKING_RULES.index(rule)
+            for rule in ("words", "typo", "proximity", "attribute")
+        )
+
+    async def test_query_pages_keep_relevancy_order(self, monkeypatch):
+        search = UserSearch(index_name=INDEX_NAME)
+        ranked = RankedHits([5, 2, 9, 1, 7])
+        monkeypatch.setattr(search, "search", ranked.search)
+
+        ids = await collect_pages(search, "user", limit=2, excluded_ids=(9,))
+
+        assert ids == [5, 2, 1, 7]
+        assert all(opts["filter"] == [] for opts in ranked.opts)
+        assert all(opts["sort"] == ["id:asc"] for opts in ranked.opts)
+
+    async def test_empty_query_pages_filter_after_the_last_id(self, monkeypatch):
+        search = UserSearch(index_name=INDEX_NAME)
+        ranked = RankedHits([1, 2, 3])
+        monkeypatch.setattr(search, "search", ranked.search)
+
+        hits, cursor = await search.search_page("", limit=2)
+        await search.search_page("", limit=2, cursor=cursor)
+
+        assert [hit["id"] for hit in hits] == [1, 2]
+        assert ranked.opts[1]["filter"] == ["id > 2"]
+        assert ranked.opts[1]["offset"] == 0
+
+    @pytest.mark.parametrize(
+        "query, payload",
+        [
+            ("user", {"after": 2, "descending": False}),
+            ("user", {"offset": -1, "descending": False}),
+            ("user", {"offset": True, "descending": False}),
+            ("", {"offset": 2, "descending": False}),
+            ("", {"after": 2, "descending": True}),
+        ],
+    )
+    async def test_cursor_of_another_kind_of_search_is_rejected(self, query, payload):
+        search = UserSearch(index_name=INDEX_NAME)
+
+        with pytest.raises(InvalidCursorException):
+            await search.search_page(query, limit=2, cursor=encode_cursor(payload))
@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from app.common.search_buffer import SearchWriteBuffer
+from app.common.search_client import async_meili_search_client
+from app.common.test_utils.search import make_task, make_task_info
+
+INDEX_NAME = "test_buffer_index"
+
+
+class FakeMeili:
+    def __init__(self):
+        self.added = []
+        self.deleted = []
+        self.status = "succeeded"
+        self.on_add = None
+
+    async def add_documents(self, index_name, documents):
+        if self.on_add is not None:
+            self.on_add()
+        self.added.append(documents)
+        return make_task_info(len(self.added), index_name)
+
+    async def delete_documents(self, index_name, document_ids):
+        self.deleted.append(document_ids)
+        return make_task_info(len(self.deleted), index_name)
+
+    async def handle_task(self, task_info):
+        return make_task(task_info.task_uid, self.status, task_info.index_uid)
+
+
+@pytest.fixture
+def meili(monkeypatch):
+    fake = FakeMeili()
+    monkeypatch.setattr(async_meili_search_client, "add_documents", fake.add_documents)
+    monkeypatch.setattr(
+        async_meili_search_client, "delete_documents", fake.delete_documents
+    )
+    return fake
+
+
+async def wait_until(predicate, timeout=1.0):
+    async def poll():
+        while not predicate():
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+class TestSearchWriteBuffer:
+    async def test_flush_sends_latest_write_or_deletion(self, meili):
+        buffer = SearchWriteBuffer(INDEX_NAME, meili.handle_task)
+        buffer.upsert([{"id": 1, "v": "old"}, {"id": 2, "v": "old"}])
+        buffer.delete([1])
+        buffer.upsert([{"id": 2, "v": "new"}, {"id": 3, "v": "new"}])
+        buffer.delete([3])
+        buffer.upsert([{"id": 3, "v": "newest"}])
+
+        await buffer.flush()
+
+        assert meili.added == [[{"id": 2, "v": "new"}, {"id": 3, "v": "newest"}]]
+        assert meili.deleted == [[1]]
+        assert buffer.depth == 0
+        assert buffer.flushed_documents_count == 3
+
+    async def test_flush_sends_empty_documents(self, meili):
+        buffer = SearchWriteBuffer(INDEX_NAME, meili.handle_task)
+        buffer.pending = {1: {}, 2: None}
+
+        await buffer.flush()
+
+        assert meili.added == [[{}]]
+        assert meili.deleted == [[2]]
+
+    async def test_failed_flush_requeues_without_overriding_newer_writes(self, meili):
+        buffer = SearchWriteBuffer(INDEX_NAME, meili.handle_task)
+        buffer.upsert([{"id": 1, "v": "old"}, {"id": 2, "v": "old"}])
+
+        def write_then_fail():
+            buffer.upsert([{"id": 1, "v": "new"}])
+            raise ConnectionError("meilisearch is down")
+
+        meili.on_add = write_then_fail
+        await buffer.flush_or_log()
+
+        assert buffer.pending == {1: {"id": 1, "v": "new"}, 2: {"id": 2, "v": "old"}}
+        assert buffer.failed_flushes_count == 1
+        assert buffer.flushed_documents_count == 0
+
+    async def test_rejected_flush_is_counted_as_failed(self, meili):
+        meili.status = "failed"
+        buffer = SearchWriteBuffer(INDEX_NAME, meili.handle_task)
+        buffer.upsert([{"id": 1}, {"id": 2}])
+        buffer.delete([3])
+
+        await buffer.flush()
+
+        assert buffer.depth == 0
+        assert buffer.failed_documents_count == 3
+        assert buffer.flushed_documents_count == 0
+
+    async def test_flushes_once_max_batch_size_is_reached(self, meili):
+        buffer = SearchWriteBuffer(
+            INDEX_NAME, meili.handle_task, max_batch_size=2, flush_interval=60
+        )
+        buffer.start()
+        try:
+            buffer.upsert([{"id": 1}])
+            await asyncio.sleep(0.01)
+            assert meili.added == []
+
+            buffer.upsert([{"id": 2}])
+            await wait_until(lambda: meili.added)
+            assert meili.added == [[{"id": 1}, {"id": 2}]]
+        finally:
+            await buffer.stop()
+
+    async def test_flushes_after_flush_interval(self, meili):
+        buffer = SearchWriteBuffer(
+            INDEX_NAME, meili.handle_task, max_batch_size=100, flush_interval=0.05
+        )
+        buffer.start()
+        try:
+            buffer.upsert([{"id": 1}])
+            await asyncio.sleep(0.01)
+            assert meili.added == []
+
+            await wait_until(lambda: meili.added)
+            assert meili.added == [[{"id": 1}]]
+        finally:
+            await buffer.stop()
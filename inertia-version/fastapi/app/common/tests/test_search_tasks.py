@@ -0,0 +1,43 @@
+from app.common.search_client import async_meili_search_client
+from app.common.search_tasks import TaskReconciler
+from app.common.test_utils.search import make_task, make_task_info
+
+
+class TestTaskReconciler:
+    async def test_reconcile_counts_done_tasks_and_keeps_pending_ones(
+        self, monkeypatch
+    ):
+        tasks = {
+            1: make_task(1, "succeeded"),
+            2: make_task(2, "failed"),
+            3: make_task(3, "processing"),
+        }
+
+        async def get_tasks(task_uids):
+            return [tasks[uid] for uid in task_uids]
+
+        monkeypatch.setattr(async_meili_search_client, "get_tasks", get_tasks)
+        reconciler = TaskReconciler()
+        for uid in tasks:
+            reconciler.track(make_task_info(uid))
+
+        failed = await reconciler.reconcile()
+
+        assert [task.uid for task in failed] == [2]
+        assert reconciler.pending == {3}
+        assert reconciler.succeeded_count == 1
+        assert reconciler.failed_count == 1
+
+    async def test_reconcile_drops_tasks_unknown_to_meilisearch(self, monkeypatch):
+        async def get_tasks(task_uids):
+            return [make_task(uid, "processing") for uid in task_uids if uid != 2]
+
+        monkeypatch.setattr(async_meili_search_client, "get_tasks", get_tasks)
+        reconciler = TaskReconciler()
+        reconciler.track(make_task_info(1))
+        reconciler.track(make_task_info(2))
+
+        await reconciler.reconcile()
+
+        assert reconciler.pending == {1}
+        assert reconciler.missing_count == 1
@@ -0,0 +1,96 @@
+import pytest
+
+from app.common.test_utils.search import FakeSearchClient
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.models import User, UserOut
+from app.user.search import UserSearch
+from commands.search_commands.update import IndexReconciler
+
+INDEX_NAME = "test_reconcile_users"
+
+
+@pytest.fixture
+def meili(monkeypatch):
+    fake = FakeSearchClient()
+    fake.install(monkeypatch)
+    return fake
+
+
+async def create_users(session, count: int):
+    users = [
+        User(
+            email=random_email(),
+            username=random_lower_string(),
+            hashed_password=random_lower_string(),
+        )
+        for _ in range(count)
+    ]
+    session.add_all(users)
+    await session.flush()
+    return users
+
+
+def get_documents(users):
+    return [UserOut.model_validate(user).model_dump(mode="json") for user in users]
+
+
+class TestIndexReconciler:
+    async def test_reconcile_upserts_and_deletes_only_what_differs(
+        self, session, meili
+    ):
+        users = await create_users(session, 5)
+        documents = get_documents(users)
+        stale_document = {**documents[1], "first_name": "stale"}
+        deleted_documents = [
+            {**documents[3], "email": random_email()},
+            {**documents[4], "id": users[-1].id + 100},
+        ]
+        await session.delete(users[3])
+        await session.flush()
+        await meili.add_documents(
+            INDEX_NAME,
+            [documents[0], stale_document, documents[4], *deleted_documents],
+        )
+        reconciler = IndexReconciler(
+            UserSearch(index_name=INDEX_NAME), User, chunk_size=2
+        )
+
+        report = await reconciler.reconcile(session)
+
+        assert (report.unchanged, report.upserted, report.deleted) == (2, 2, 2)
+        assert meili.get_documents(INDEX_NAME) == [
+            documents[0],
+            documents[1],
+            documents[2],
+            documents[4],
+        ]
+
+    async def test_reconcile_index_in_sync_writes_nothing(self, session, meili):
+        users = await create_users(session, 5)
+        await meili.add_documents(INDEX_NAME, get_documents(users))
+        tasks_count = len(meili.tasks)
+        reconciler = IndexReconciler(
+            UserSearch(index_name=INDEX_NAME), User, chunk_size=2
+        )
+
+        report = await reconciler.reconcile(session)
+
+        assert (report.unchanged, report.upserted, report.deleted) == (5, 0, 0)
+        assert reconciler.task_infos == []
+        assert len(meili.tasks) == tasks_count
+
+    async def test_reconcile_empty_table_empties_index(self, session, meili):
+        users = await create_users(session, 2)
+        documents = get_documents(users)
+        for user in users:
+            await session.delete(user)
+        await session.flush()
+        await meili.add_documents(INDEX_NAME, documents)
+        reconciler = IndexReconciler(
+            UserSearch(index_name=INDEX_NAME), User, chunk_size=2
+        )
+
+        report = await reconciler.reconcile(session)
+
+        assert (report.unchanged, report.upserted, report.deleted) == (0, 0, 2)
+        assert meili.get_documents(INDEX_NAME) == []
@@ -1,4 +1,7 @@
+import asyncio
 import os
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -8,23 +11,66 @@ from starlette.middleware.sessions import SessionMiddleware
 from app.api_v1 import api_router_v1
 from app.auth.api import router as auth_router
 from app.auth.exceptions import AlreadyLoggedInException, InvalidTokenException
+from app.auth.utils.hashing import password_hashing_pool
+from app.auth.utils.password_policy import tune_password_policy
 from app.webapp.api import webapp_router
 from inertia import (
     inertia_version_conflict_exception_handler,
     InertiaVersionConflictException,
     InertiaConfig,
 )
+from app.common.deps.fga import shared_fga_client
+from app.common.fga_local import load_local_fga_evaluator
+from app.common.deps.search import (
+    setup_search_indexes_on_startup,
+    start_search_write_buffers,
+    stop_search_write_buffers,
+)
 from app.common.exceptions import (
     CommonDetailedException,
     already_logged_in_handler,
     common_error_handler,
     invalid_token_handler,
 )
+from app.common.search_client import async_meili_search_client
+from app.common.search_tasks import search_task_reconciler
 from app.core.admin import create_admin
 from app.core.config import settings
+from app.core.db import dispose_engine, get_engine
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Each cleanup is registered once what it releases exists. They run in
+    # reverse order on shutdown, or when a later startup step raises, and one
+    # raising does not skip the others.
+    async with AsyncExitStack() as cleanup:
+        cleanup.callback(password_hashing_pool.shutdown)
+        get_engine()
+        cleanup.push_async_callback(dispose_engine)
+        cleanup.push_async_callback(async_meili_search_client.close)
+        if settings.PASSWORD_HASH_TARGET_SECONDS is not None:
+            await asyncio.to_thread(
+                tune_password_policy, settings.PASSWORD_HASH_TARGET_SECONDS
+            )
+        cleanup.push_async_callback(shared_fga_client.close)
+        fga_client = await shared_fga_client.open()
+        if settings.FGA_LOCAL_EVALUATOR_ENABLED:
+            await load_local_fga_evaluator(fga_client)
+        if settings.MEILI_SETUP_INDEXES_ON_STARTUP:
+            await setup_search_indexes_on_startup()
+        if not settings.MEILI_WAIT_FOR_TASKS:
+            cleanup.push_async_callback(search_task_reconciler.stop)
+            search_task_reconciler.start()
+        if settings.MEILI_WRITE_BUFFER_ENABLED:
+            cleanup.push_async_callback(stop_search_write_buffers)
+            start_search_write_buffers()
+        yield
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url="/api/openapi.json",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
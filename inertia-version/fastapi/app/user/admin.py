@@ -1,10 +1,10 @@
 from typing import Any, Dict, cast
 
 from fastapi import Request
-from openfga_sdk import OpenFgaClient
 from sqladmin import ModelView
 
-from app.common.deps.fga import get_fga_config
+from app.common.deps.fga import get_fga_client
+from app.user.cache import user_identity_cache
 from app.user.fga import UserFGA, UserRole
 from app.user.models import User
 
@@ -15,18 +15,18 @@ class UserAdminView(ModelView, model=User):
     async def after_model_change(
         self, data: Dict[str, Any], model: User, is_created: bool, request: Request
     ) -> None:
+        user_identity_cache.invalidate(model.id, model.email)
         if is_created:
             user_id = cast(int, model.id)
             user_role = cast(
                 UserRole, "client" if not model.is_superuser else "superuser"
             )
-            config = get_fga_config()
-            async with OpenFgaClient(config) as fga_client:
-                await UserFGA.create_relationships(fga_client, user_id, user_role)
+            fga_client = await get_fga_client()
+            await UserFGA.create_relationships(fga_client, user_id, user_role)
 
     async def after_model_delete(self, model: User, request: Request) -> None:
         user_id = cast(int, model.id)
+        user_identity_cache.invalidate(user_id, model.email)
         user_role = cast(UserRole, "client" if not model.is_superuser else "superuser")
-        config = get_fga_config()
-        async with OpenFgaClient(config) as fga_client:
-            await UserFGA.delete_relationships(fga_client, user_id, user_role)
+        fga_client = await get_fga_client()
+        await UserFGA.delete_relationships(fga_client, user_id, user_role)
@@ -1,26 +1,38 @@
+from typing import Optional, cast
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Request, UploadFile
+from fastapi import APIRouter, Query, Request, UploadFile
 from starlette.responses import RedirectResponse
 
 from app.auth.deps import AnnotatedCurrentUserDep, CurrentUserDep
 from app.auth.utils.auth import add_token_to_response
 from app.common.deps.common import AnnotatedCommonDep
 from app.common.deps.db import SessionDep
+from app.common.deps.fga import AnnotatedFGAClientDep
 from app.common.deps.inertia import InertiaDep
 from app.common.deps.search import AnnotatedSearchClientsDep
+from app.common.pagination import Page
+from app.core.config import settings
 from app.user.deps import (
     CurrentCanDeleteUser,
     CurrentCanReadUser,
     CurrentCanUpdateUser,
+    CurrentIsSuperuser,
     UserExists,
 )
 from app.user.exceptions import (
     EmailAlreadyRegisteredException,
     PasswordNotStrongException,
 )
-from app.user.models import UserCreate, UserOut, UserUpdate
-from app.user.repository import UserRepo
+from app.user.fga import UserFGA
+from app.user.importer import (
+    ImportFormat,
+    UserImporter,
+    get_import_format,
+    read_user_rows,
+)
+from app.user.models import UserCreate, UserImportReport, UserOut, UserUpdate
+from app.user.repository import UserOrderBy, UserRepo
 
 router = APIRouter()
 
@@ -40,15 +52,81 @@ async def create_user(
         return response
 
 
-@router.get("/", response_model=list[UserOut])
+@router.post(
+    "/import",
+    response_model=UserImportReport,
+    dependencies=[CurrentIsSuperuser],
+)
+async def import_users(
+    file: UploadFile,
+    import_format: Optional[ImportFormat] = None,
+    *,
+    deps: AnnotatedCommonDep,
+):
+    """
+    Creates the users of a CSV or NDJSON file, holding the fields of UserCreate.
+    The format is guessed from the file extension when not given.
+    """
+    importer = UserImporter(deps.session, deps.fga_client, deps.search.user)
+    rows = read_user_rows(file.file, import_format or get_import_format(file.filename))
+    return await importer.import_rows(rows)
+
+
+@router.get("/", response_model=Page[UserOut])
 async def search_users(
     query: str = "",
-    offset: int = 0,
+    cursor: Optional[str] = None,
+    limit: int = Query(
+        settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT
+    ),
     *,
     search: AnnotatedSearchClientsDep,
     user: AnnotatedCurrentUserDep,
+    fga_client: AnnotatedFGAClientDep,
+):
+    """
+    Pass the `next_cursor` of a page as `cursor` to get the next one,
+    it is null on the last page.
+    """
+    hits, next_cursor = await search.user.get_search_page(
+        query, cursor, limit=limit, current_user=user
+    )
+    readable_ids = await UserFGA.filter_allowed(
+        fga_client, cast(int, user.id), "can_read", (hit["id"] for hit in hits)
+    )
+    return {
+        "items": [hit for hit in hits if hit["id"] in readable_ids],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/list", response_model=Page[UserOut])
+async def list_users(
+    cursor: Optional[str] = None,
+    limit: int = Query(
+        settings.PAGINATION_DEFAULT_LIMIT, ge=1, le=settings.PAGINATION_MAX_LIMIT
+    ),
+    order_by: UserOrderBy = "id",
+    descending: bool = False,
+    *,
+    session: SessionDep,
+    user: AnnotatedCurrentUserDep,
+    fga_client: AnnotatedFGAClientDep,
 ):
-    return search.user.get_search_result_hits(query, offset, current_user=user)
+    """
+    Pages through the users straight from the database. Pass the `next_cursor`
+    of a page as `cursor` to get the next one, it is null on the last page.
+    """
+    users, next_cursor = await UserRepo.list(
+        session, limit=limit, cursor=cursor, order_by=order_by, descending=descending
+    )
+    readable_ids = await UserFGA.filter_allowed(
+        fga_client, cast(int, user.id), "can_read", (cast(int, u.id) for u in users)
+    )
+    return {
+        "items": [u for u in users if u.id in readable_ids],
+        "next_cursor": next_cursor,
+    }
 
 
 @router.get("/me", response_model=UserOut)
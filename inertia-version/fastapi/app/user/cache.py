@@ -0,0 +1,110 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.user.models import User
+
+UserSnapshot = Dict[str, Any]
+
+ABSOLUTE_PATH = os.path.dirname(os.path.abspath(__file__))
+# Touched by the CLI commands changing users, the app clears its cache when it changes
+INVALIDATION_FILE = os.path.join(ABSOLUTE_PATH, "..", ".user_cache_invalidated_at")
+
+
+def get_invalidation_signature() -> float:
+    try:
+        return os.path.getmtime(INVALIDATION_FILE)
+    except FileNotFoundError:
+        return 0.0
+
+
+def invalidate_other_processes() -> None:
+    with open(INVALIDATION_FILE, "w", encoding="utf-8") as file:
+        file.write(str(time.time()))
+
+
+class UserIdentityCache:
+    """
+    Users resolved from an access token, keyed by the token subject (email).
+    It holds a snapshot of the row and hands out a new, transient, User each time,
+    so it is only meant for reading the current user, not for adding it to a session.
+    Writes in this process invalidate their user, the CLI clears the whole cache
+    through INVALIDATION_FILE. Writes from other app workers are only seen once
+    the entry expires.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.USER_CACHE_MAX_SIZE,
+        ttl: float = settings.USER_CACHE_TTL_SECONDS,
+    ) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries: OrderedDict[str, Tuple[UserSnapshot, float]] = OrderedDict()
+        self.emails_by_id: Dict[int, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self._invalidation_signature = get_invalidation_signature()
+        self._last_invalidation_check = time.monotonic()
+
+    def clear_if_invalidated_elsewhere(self) -> None:
+        now = time.monotonic()
+        if (
+            now - self._last_invalidation_check
+            < settings.USER_CACHE_INVALIDATION_CHECK_SECONDS
+        ):
+            return
+        self._last_invalidation_check = now
+        signature = get_invalidation_signature()
+        if signature != self._invalidation_signature:
+            self._invalidation_signature = signature
+            self.clear()
+
+    def get(self, email: str) -> Optional[User]:
+        self.clear_if_invalidated_elsewhere()
+        entry = self.entries.get(email)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._discard(email)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(email)
+        self.hits += 1
+        return User(**entry[0])
+
+    def set(self, user: User) -> None:
+        snapshot = {field: getattr(user, field) for field in User.model_fields}
+        self.entries[user.email] = (snapshot, time.monotonic() + self.ttl)
+        self.entries.move_to_end(user.email)
+        if user.id is not None:
+            self.emails_by_id[user.id] = user.email
+        while len(self.entries) > self.max_size:
+            self._discard(next(iter(self.entries)))
+
+    def _discard(self, email: str) -> None:
+        entry = self.entries.pop(email, None)
+        if entry is not None:
+            self.emails_by_id.pop(entry[0]["id"], None)
+
+    def invalidate(
+        self, user_id: Optional[int] = None, email: Optional[str] = None
+    ) -> None:
+        """
+        Drops the user by id, which also covers an email change, and/or by email
+        """
+        if user_id is not None and user_id in self.emails_by_id:
+            self._discard(self.emails_by_id[user_id])
+        if email is not None:
+            self._discard(email)
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.emails_by_id.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"size": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+user_identity_cache = UserIdentityCache()
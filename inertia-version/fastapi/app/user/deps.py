@@ -45,3 +45,11 @@ async def check_can_read_user(
 
 
 CurrentCanReadUser = Depends(check_can_read_user)
+
+
+async def check_is_superuser(user: AnnotatedCurrentUserDep) -> None:
+    if not user.is_superuser:
+        raise ForbiddenException(target="user")
+
+
+CurrentIsSuperuser = Depends(check_is_superuser)
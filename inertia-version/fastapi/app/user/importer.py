@@ -0,0 +1,176 @@
+import asyncio
+import csv
+import io
+import itertools
+import json
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from openfga_sdk import OpenFgaClient
+from pydantic import ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.auth.utils.password import is_strong_password
+from app.core.config import settings
+from app.user.fga import UserFGA
+from app.user.models import User, UserCreate, UserImportError, UserImportReport
+from app.user.repository import UserRepo, get_users_tuples
+from app.user.search import UserSearch
+
+ImportFormat = Literal["csv", "ndjson"]
+# (line number, row), the row is None when the line could not be parsed
+ImportRow = Tuple[int, Optional[Dict[str, Any]]]
+
+MAX_REPORTED_ERRORS = 100
+
+
+def get_import_format(filename: Optional[str]) -> ImportFormat:
+    if filename is not None and filename.lower().endswith(".csv"):
+        return "csv"
+    return "ndjson"
+
+
+def read_csv_rows(file: IO[str]) -> Iterator[ImportRow]:
+    """
+    The first line holds the column names, empty cells are left out
+    """
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, {key: value for key, value in row.items() if value}
+
+
+def read_ndjson_rows(file: IO[str]) -> Iterator[ImportRow]:
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def read_user_rows(file: IO[bytes], import_format: ImportFormat) -> Iterator[ImportRow]:
+    """
+    Reads the rows one at a time, the file is never loaded at once
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        if import_format == "csv":
+            yield from read_csv_rows(text)
+        else:
+            yield from read_ndjson_rows(text)
+    finally:
+        # Leaves the underlying file open for its owner
+        text.detach()
+
+
+def read_next_rows(rows: Iterator[ImportRow], count: int) -> List[ImportRow]:
+    return list(itertools.islice(rows, count))
+
+
+class UserImporter:
+    """
+    Creates users by batches of `batch_size` rows: their passwords are hashed in
+    parallel on the password hashing pool, they are inserted with a single
+    `INSERT ... ON CONFLICT (email) DO NOTHING ... RETURNING`, then their FGA
+    tuples and search documents are written with one call each.
+    Rows whose email is already registered are skipped, invalid rows are reported,
+    as are rows repeating the email of an earlier row of the import.
+    The rows are read, and parsed, on a thread as the file may be on disk.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        fga_client: OpenFgaClient,
+        search: UserSearch,
+        batch_size: int = settings.USER_IMPORT_BATCH_SIZE,
+    ) -> None:
+        self.session = session
+        self.fga_client = fga_client
+        self.search = search
+        self.batch_size = batch_size
+        self.report = UserImportReport()
+        self.seen_emails: Set[str] = set()
+
+    def add_error(self, line: int, message: str) -> None:
+        self.report.invalid += 1
+        if len(self.report.errors) < MAX_REPORTED_ERRORS:
+            self.report.errors.append(UserImportError(line=line, message=message))
+
+    def validate(
+        self, line: int, row: Optional[Dict[str, Any]]
+    ) -> Optional[UserCreate]:
+        if row is None:
+            self.add_error(line, "invalid_row")
+            return None
+        try:
+            user_in = UserCreate.model_validate(row)
+        except ValidationError as exc:
+            fields = ", ".join(
+                ".".join(str(loc) for loc in error["loc"]) for error in exc.errors()
+            )
+            self.add_error(line, f"invalid_fields: {fields}")
+            return None
+        if not is_strong_password(user_in.password):
+            self.add_error(line, "password_not_strong")
+            return None
+        return user_in
+
+    async def import_rows(self, rows: Iterable[ImportRow]) -> UserImportReport:
+        rows_iterator = iter(rows)
+        batch: List[UserCreate] = []
+        while True:
+            next_rows = await asyncio.to_thread(
+                read_next_rows, rows_iterator, self.batch_size
+            )
+            if not next_rows:
+                break
+            for line, row in next_rows:
+                user_in = self.validate(line, row)
+                if user_in is None:
+                    continue
+                if user_in.email in self.seen_emails:
+                    self.add_error(line, "duplicate_email")
+                    continue
+                self.seen_emails.add(user_in.email)
+                batch.append(user_in)
+                if len(batch) >= self.batch_size:
+                    await self.import_batch(batch)
+                    batch = []
+        if batch:
+            await self.import_batch(batch)
+        return self.report
+
+    async def import_batch(self, users_in: List[UserCreate]) -> None:
+        values = await UserRepo.get_create_values(users_in)
+        users = await UserRepo.exec_insert_many(
+            self.session, values, on_conflict_do_nothing=["email"]
+        )
+        self.report.created += len(users)
+        self.report.skipped += len(users_in) - len(users)
+        if not users:
+            return
+        await self.create_side_effects(users)
+
+    async def create_side_effects(self, users: List[User]) -> None:
+        """
+        Awaited, unlike the background tasks of UserRepo.create_many, so that an
+        import does not outrun FGA and Meilisearch
+        """
+        await UserFGA.write_relationships(
+            self.fga_client, writes=get_users_tuples(users)
+        )
+        await self.search.add_documents_ndjson(users)
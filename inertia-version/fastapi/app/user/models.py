@@ -1,8 +1,8 @@
-from typing import Annotated, Union
+from typing import Annotated, List, Union
 
 from fastapi import UploadFile
-from pydantic import EmailStr
-from sqlalchemy import Column
+from pydantic import BaseModel, EmailStr
+from sqlalchemy import Column, Index
 from sqlmodel import AutoString, Field, SQLModel
 
 from app.common.models import FileType
@@ -17,6 +17,8 @@ class UserBase(SQLModel):
 
 class User(UserBase, table=True):
     __tablename__ = "users"
+    # Backs the keyset pagination ordered by username
+    __table_args__ = (Index("ix_users_username_id", "username", "id"),)
 
     id: Union[int, None] = Field(default=None, primary_key=True)
     hashed_password: str
@@ -50,3 +52,17 @@ class UserOut(UserBase):
     avatar_url: Union[str, None] = None
     first_name: Union[str, None] = None
     last_name: Union[str, None] = None
+
+
+class UserImportError(BaseModel):
+    line: int
+    message: str
+
+
+class UserImportReport(BaseModel):
+    created: int = 0
+    # Rows whose email is already registered
+    skipped: int = 0
+    invalid: int = 0
+    # The first invalid rows only
+    errors: List[UserImportError] = []
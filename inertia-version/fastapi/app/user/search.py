@@ -1,24 +1,28 @@
-from typing import Any, Dict, List, cast
+from typing import Any, Dict, List, Optional, Tuple
 
-from meilisearch.index import Index
-
-from app.common.search import meili_search_client, MeiliSearchBaseClass
-from app.user.models import User
+from app.common.search import MeiliSearchBaseClass
+from app.user.models import User, UserOut
 
 
 class UserSearch(MeiliSearchBaseClass[User]):
     index_name: str = "users"
-    index: Index = meili_search_client.index(index_name)
     filterable_attributes: List[str] = ["id"]
+    sortable_attributes: List[str] = ["id"]
+    # The search results are served as UserOut
+    document_model = UserOut
 
-    @staticmethod
-    def build_opts_with_filter(user_id: int) -> Dict[str, Any]:
-        return {"filter": f"id != {user_id}"}
-
-    def get_search_result_hits(
-        self, query: str = "", offset: int = 0, *, current_user: User
-    ) -> List[Dict[str, Any]]:
-        opts = self.build_opts_with_filter(cast(int, current_user.id))
-        opts.update({"offset": offset})
-        search_results = self.search(query, opts)
-        return search_results["hits"]
+    async def get_search_page(
+        self,
+        query: str = "",
+        cursor: Optional[str] = None,
+        *,
+        limit: int,
+        current_user: User,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        return await self.search_page(
+            query,
+            limit=limit,
+            cursor=cursor,
+            # Dropped after the search, every user shares the cached results
+            excluded_ids=(current_user.id,),
+        )
@@ -0,0 +1,190 @@
+import os
+
+import pytest
+
+from app.common.deps.common import StructuredCommonDeps
+from app.common.test_utils.utils import random_upload_file
+from app.core.config import settings
+from app.user import admin
+from app.user import cache
+from app.user.admin import UserAdminView
+from app.user.cache import UserIdentityCache, user_identity_cache
+from app.user.models import User, UserUpdate
+from app.user.repository import UserRepo
+
+
+@pytest.fixture
+def deps(session, background_tasks, fga_client, search_clients):
+    return StructuredCommonDeps(
+        session=session,
+        tasks=background_tasks,
+        fga_client=fga_client,
+        search=search_clients,
+    )
+
+
+@pytest.fixture
+def invalidation_file(monkeypatch, tmp_path):
+    path = tmp_path / ".user_cache_invalidated_at"
+    monkeypatch.setattr(cache, "INVALIDATION_FILE", str(path))
+    monkeypatch.setattr(settings, "USER_CACHE_INVALIDATION_CHECK_SECONDS", 0)
+    return path
+
+
+@pytest.fixture
+def cached_user(factory):
+    async def cache_user():
+        user = await factory(User)
+        user_identity_cache.set(user)
+        return user.id, user.email
+
+    user_identity_cache.clear()
+    yield cache_user
+    user_identity_cache.clear()
+
+
+def new_user(user_id: int) -> User:
+    return User(
+        id=user_id,
+        email=f"user{user_id}@test.com",
+        username=f"user{user_id}",
+        hashed_password="hashed",
+    )
+
+
+class TestUserIdentityCache:
+    def test_miss_then_hit(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=10, ttl=60)
+        user = new_user(1)
+
+        assert identity_cache.get(user.email) is None
+        identity_cache.set(user)
+        cached = identity_cache.get(user.email)
+
+        assert cached is not user
+        assert (cached.id, cached.email, cached.username) == (
+            user.id,
+            user.email,
+            user.username,
+        )
+        assert identity_cache.get_stats() == {"size": 1, "hits": 1, "misses": 1}
+
+    def test_expired_entry_is_a_miss(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=10, ttl=-1)
+        user = new_user(1)
+        identity_cache.set(user)
+
+        assert identity_cache.get(user.email) is None
+        assert identity_cache.entries == {}
+        assert identity_cache.emails_by_id == {}
+
+    def test_least_recently_used_entry_is_evicted(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=2, ttl=60)
+        first, second, third = new_user(1), new_user(2), new_user(3)
+        identity_cache.set(first)
+        identity_cache.set(second)
+        identity_cache.get(first.email)
+
+        identity_cache.set(third)
+
+        assert identity_cache.get(second.email) is None
+        assert identity_cache.get(first.email) is not None
+        assert identity_cache.get(third.email) is not None
+
+    def test_invalidate_by_id_drops_the_old_email(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=10, ttl=60)
+        user = new_user(1)
+        identity_cache.set(user)
+
+        identity_cache.invalidate(user.id, "changed@test.com")
+
+        assert identity_cache.get(user.email) is None
+        assert identity_cache.emails_by_id == {}
+
+    def test_invalidate_by_email(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=10, ttl=60)
+        user = new_user(1)
+        identity_cache.set(user)
+
+        identity_cache.invalidate(email=user.email)
+
+        assert identity_cache.get(user.email) is None
+
+    def test_invalidation_file_clears_the_cache(self, invalidation_file):
+        identity_cache = UserIdentityCache(max_size=10, ttl=60)
+        user = new_user(1)
+        identity_cache.set(user)
+        assert identity_cache.get(user.email) is not None
+
+        cache.invalidate_other_processes()
+        os.utime(invalidation_file, (2_000, 2_000))
+
+        assert identity_cache.get(user.email) is None
+
+    def test_invalidation_file_is_not_checked_before_interval(
+        self, invalidation_file, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "USER_CACHE_INVALIDATION_CHECK_SECONDS", 3600)
+        identity_cache = UserIdentityCache(max_size=10, ttl=60)
+        user = new_user(1)
+        identity_cache.set(user)
+
+        cache.invalidate_other_processes()
+
+        assert identity_cache.get(user.email) is not None
+
+
+class TestUserIdentityCacheInvalidation:
+    async def test_update_invalidates(self, deps, cached_user):
+        user_id, email = await cached_user()
+
+        await UserRepo.update(
+            deps, id_=user_id, obj_in=UserUpdate(first_name="Updated")
+        )
+
+        assert user_identity_cache.get(email) is None
+
+    async def test_remove_invalidates(self, deps, cached_user):
+        user_id, email = await cached_user()
+
+        await UserRepo.remove(deps, id_=user_id)
+
+        assert user_identity_cache.get(email) is None
+
+    async def test_set_avatar_url_invalidates(self, session, cached_user):
+        user_id, email = await cached_user()
+
+        await UserRepo.set_avatar_url(
+            session, id_=user_id, avatar=random_upload_file("avatar.png")
+        )
+
+        assert user_identity_cache.get(email) is None
+
+    async def test_admin_change_invalidates(self, session, cached_user):
+        user_id, email = await cached_user()
+        user = await UserRepo.get(session, id_=user_id)
+
+        await UserAdminView().after_model_change({}, user, False, None)
+
+        assert user_identity_cache.get(email) is None
+
+    async def test_admin_delete_invalidates(
+        self, session, cached_user, fga_client, monkeypatch
+    ):
+        user_id, email = await cached_user()
+        user = await UserRepo.get(session, id_=user_id)
+        deleted = []
+
+        async def get_fga_client():
+            return fga_client
+
+        async def delete_relationships(_, user_id, user_role):
+            deleted.append((user_id, user_role))
+
+        monkeypatch.setattr(admin, "get_fga_client", get_fga_client)
+        monkeypatch.setattr(admin.UserFGA, "delete_relationships", delete_relationships)
+
+        await UserAdminView().after_model_delete(user, None)
+
+        assert user_identity_cache.get(email) is None
+        assert deleted == [(user_id, "client")]
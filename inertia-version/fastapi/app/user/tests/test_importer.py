@@ -0,0 +1,37 @@
+import io
+
+from app.user.importer import UserImporter, read_user_rows
+from app.user.models import User
+from app.user.repository import UserRepo
+
+
+class TestUserImporter:
+    async def test_duplicate_emails_are_reported_across_batches(
+        self, session, fga_client, search_clients, factory
+    ):
+        user = await factory(User)
+        existing_email = user.email
+        content = (
+            '{"email": "first@test.com", "username": "first", "password": "secure_Password91"}\n'
+            '{"email": "first@test.com", "username": "again", "password": "secure_Password91"}\n'
+            f'{{"email": "{existing_email}", "username": "existing", "password": "secure_Password91"}}\n'
+            '{"email": "second@test.com", "username": "second", "password": "secure_Password91"}\n'
+            '{"email": "first@test.com", "username": "later", "password": "secure_Password91"}\n'
+            "not json\n"
+        )
+        importer = UserImporter(session, fga_client, search_clients.user, batch_size=2)
+
+        report = await importer.import_rows(
+            read_user_rows(io.BytesIO(content.encode()), "ndjson")
+        )
+
+        assert report.created == 2
+        assert report.skipped == 1
+        assert report.invalid == 3
+        assert [(error.line, error.message) for error in report.errors] == [
+            (2, "duplicate_email"),
+            (5, "duplicate_email"),
+            (6, "invalid_row"),
+        ]
+        first = await UserRepo.get_by_email(session, email="first@test.com")
+        assert first.username == "first"
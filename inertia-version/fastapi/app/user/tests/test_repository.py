@@ -0,0 +1,132 @@
+import unittest.mock
+
+import pytest
+
+from app.common.deps.common import StructuredCommonDeps
+from app.common.exceptions import NotFoundException
+from app.common.test_utils.utils import random_email, random_lower_string
+from app.user.exceptions import EmailAlreadyRegisteredException
+from app.user.fga import UserFGA
+from app.user.models import User, UserCreate
+from app.user.repository import UserRepo
+
+
+@pytest.fixture
+def deps(session, background_tasks, fga_client, search_clients):
+    return StructuredCommonDeps(
+        session=session,
+        tasks=background_tasks,
+        fga_client=fga_client,
+        search=search_clients,
+    )
+
+
+def new_users_in(count: int):
+    return [
+        UserCreate(
+            email=random_email(),
+            username=random_lower_string(),
+            password="secure_Password91",
+        )
+        for _ in range(count)
+    ]
+
+
+class TestUserRepoMany:
+    async def test_create_many_queues_one_write_of_each_kind(
+        self, deps, background_tasks, search_clients
+    ):
+        users_in = new_users_in(3)
+
+        users = await UserRepo.create_many(deps, objs_in=users_in)
+
+        assert [user.email for user in users] == [user_in.email for user_in in users_in]
+        tuples = [
+            tuple_
+            for user in users
+            for tuple_ in UserFGA.get_tuples(user.id, "client", user.id)
+        ]
+        assert background_tasks.add_task.call_args_list == [
+            unittest.mock.call(
+                UserFGA.write_relationships, deps.fga_client, writes=tuples
+            ),
+            unittest.mock.call(search_clients.user.queue_upserts, users),
+        ]
+
+    async def test_create_many_with_a_registered_email_creates_nothing(
+        self, deps, factory, background_tasks
+    ):
+        user = await factory(User)
+        users_in = new_users_in(2)
+        users_in[1].email = user.email
+
+        with pytest.raises(EmailAlreadyRegisteredException):
+            await UserRepo.create_many(deps, objs_in=users_in)
+
+        background_tasks.add_task.assert_not_called()
+
+    async def test_create_many_with_a_duplicate_email_creates_nothing(
+        self, deps, background_tasks
+    ):
+        users_in = new_users_in(2)
+        users_in[1].email = users_in[0].email
+
+        with pytest.raises(EmailAlreadyRegisteredException):
+            await UserRepo.create_many(deps, objs_in=users_in)
+
+        background_tasks.add_task.assert_not_called()
+
+    async def test_update_many_queues_one_upsert(
+        self, deps, background_tasks, search_clients
+    ):
+        users = await UserRepo.create_many(deps, objs_in=new_users_in(3))
+        ids = [user.id for user in users]
+        background_tasks.reset_mock()
+
+        updated = await UserRepo.update_many(
+            deps, ids=ids, obj_in={"first_name": "first"}
+        )
+
+        assert [user.id for user in updated] == ids
+        background_tasks.add_task.assert_called_once_with(
+            search_clients.user.queue_upserts, updated
+        )
+
+    async def test_update_many_to_a_registered_email_raises(self, deps, factory):
+        user = await factory(User)
+        email = user.email
+        users = await UserRepo.create_many(deps, objs_in=new_users_in(2))
+
+        with pytest.raises(EmailAlreadyRegisteredException):
+            await UserRepo.update_many(
+                deps, ids=[user.id for user in users], obj_in={"email": email}
+            )
+
+    async def test_remove_many_queues_one_deletion_of_each_kind(
+        self, deps, background_tasks, search_clients
+    ):
+        users = await UserRepo.create_many(deps, objs_in=new_users_in(3))
+        ids = [user.id for user in users]
+        background_tasks.reset_mock()
+
+        removed = await UserRepo.remove_many(deps, ids=ids)
+
+        tuples = [
+            tuple_ for id_ in ids for tuple_ in UserFGA.get_tuples(id_, "client", id_)
+        ]
+        assert background_tasks.add_task.call_args_list == [
+            unittest.mock.call(
+                UserFGA.write_relationships, deps.fga_client, deletes=tuples
+            ),
+            unittest.mock.call(search_clients.user.queue_deletes, removed),
+        ]
+
+    async def test_remove_many_with_a_missing_id_raises(self, deps, background_tasks):
+        users = await UserRepo.create_many(deps, objs_in=new_users_in(1))
+        missing_id = users[0].id + 1000
+        background_tasks.reset_mock()
+
+        with pytest.raises(NotFoundException):
+            await UserRepo.remove_many(deps, ids=[users[0].id, missing_id])
+
+        background_tasks.add_task.assert_not_called()
@@ -0,0 +1,74 @@
+import timeit
+from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, List, Tuple
+
+import typer
+from jose import jwt
+
+from app.auth.utils.auth import create_access_token
+from app.auth.utils.tokens import JWTVerifier
+from app.core.config import settings
+
+from .options import Option, handle_options
+from .print import print_default, print_info
+
+app = typer.Typer()
+
+
+def print_timing(name: str, seconds: float, iterations: int) -> None:
+    print_default(
+        f"{name:<28} {seconds / iterations * 1_000_000:8.2f}µs per token "
+        f"({iterations / seconds:,.0f}/s)"
+    )
+
+
+@app.command()
+def tokens(iterations: int = 20_000) -> None:
+    """
+    Compare the verification of access tokens with python-jose and JWTVerifier
+    """
+    user_token = create_access_token(data={"email": "benchmark@example.com"})
+    admin_token = create_access_token(
+        data={"id": 1, "is_superuser": True}, expires_delta=timedelta(hours=24)
+    )
+    cold_verifier = JWTVerifier(max_size=0)
+    warm_verifier = JWTVerifier()
+    for token in (user_token, admin_token):
+        assert cold_verifier.verify(token) == jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+
+    for name, token in (("User token", user_token), ("Admin token", admin_token)):
+        print_info(f"{name}, {iterations} verifications")
+        candidates: List[Tuple[str, Callable[[], Any]]] = [
+            (
+                "jose.jwt.decode",
+                partial(
+                    jwt.decode,
+                    token,
+                    settings.SECRET_KEY,
+                    algorithms=[settings.ALGORITHM],
+                ),
+            ),
+            ("JWTVerifier, uncached", partial(cold_verifier.verify, token)),
+            ("JWTVerifier, cached", partial(warm_verifier.verify, token)),
+        ]
+        for candidate_name, func in candidates:
+            seconds = timeit.timeit(func, number=iterations)
+            print_timing(candidate_name, seconds, iterations)
+
+
+@app.command()
+def i(allow_back: bool = False) -> None:
+    """
+    Interactive mode
+    """
+    handle_options(
+        [Option(index=1, description="Benchmark token verification", func=tokens)],
+        allow_back=allow_back,
+    )
+
+
+if __name__ == "__main__":
+    app()
@@ -6,6 +6,7 @@ from .admin import i as admin
 from .authz import i as authz
 from .docker import i as docker
 from .options import Option, handle_options
+from .search import i as search
 from app.core.config import settings
 
 ABSOLUTE_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -49,6 +50,12 @@ def i() -> None:
             ),
             Option(
                 index=4,
+                description="Search commands 🔍",
+                func=search,
+                func_args=common_func_args,
+            ),
+            Option(
+                index=5,
                 description="Update OpenAPI docs",
                 func=update_openapi,
             ),